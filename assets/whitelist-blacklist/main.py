@@ -1,14 +1,28 @@
-import urllib.request
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
 import time
 from datetime import datetime, timedelta, timezone
 import os
 from urllib.parse import urlparse
-import socket  #check p3p源 rtp源
 import subprocess #check rtmp源
+import sys
+
+# 仓库根目录，引用共用模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from github_mirror import default_mirror_stats, open_source
+from source_lines import EncodingMemo, SourceLines
+from dns_cache import default_dns_cache
+from probe_store import ProbeStore
+from probe_journal import ProbeJournal
+from channel_record import Channel
+from url_dedup import UrlDeduplicator
+from stream_equivalence import EQUIV_INDEX, EquivalenceIndex, learn_host_groups, write_host_groups
+from stream_checker import StreamChecker
 
 timestart = datetime.now()
 
+EQUIV_MAX_FALLBACKS = int(os.getenv("EQUIV_MAX_FALLBACKS", "2"))  # 代表检测失败时最多再依次检测几个备选
+EQUIV_UNKNOWN_SCORE = 0.5  # 没有检测历史的备选按此评分排序
+
 #读取文本方法
 def read_txt_to_array(file_name):
     try:
@@ -35,46 +49,30 @@ def read_txt_file(file_path):
         ]
     return lines
 
-# 检测URL是否可访问并记录响应时间
-def check_url(url, timeout=6):
-    start_time = time.time()
-    elapsed_time = None
-    success = False
-
-    # 将 URL 中的汉字编码
-    encoded_url = urllib.parse.quote(url, safe=':/?&=')
-    
-    try:
-        if url.startswith("http"):
-            headers = {
-                'User-Agent': 'PostmanRuntime-ApipostRuntime/1.1.0',
-            }
-            req = urllib.request.Request(encoded_url, headers=headers)
-            with urllib.request.urlopen(req, timeout=timeout) as response:
-                if response.status == 200:
-                    success = True
-        elif url.startswith("p3p"):
-            success = check_p3p_url(url, timeout)
-        elif url.startswith("p2p"):
-            success = check_p2p_url(url, timeout)        
-        elif url.startswith("rtmp") or url.startswith("rtsp") :
-            success = check_rtmp_url(url, timeout)
-        elif url.startswith("rtp"):
-            success = check_rtp_url(url, timeout)
-
-        # 如果执行到这一步，没有异常，计算时间
-        elapsed_time = (time.time() - start_time) * 1000  # 转换为毫秒
-
-    except Exception as e:
-        print(f"Error checking {url}: {e}")
-        record_host(get_host_from_url(url))
-        # 在发生异常的情况下，将 elapsed_time 设置为 None
-        elapsed_time = None
+# 非http协议的检测（阻塞实现，由异步检测器放到线程池执行）
+# http/https 由 stream_checker 直接检测，rtsp/rtmp/rtp 由 stream_protocols 原生检测，这里只处理 rtmpt 等其他变种
+def check_other_url(url, timeout):
+    if url.startswith("p3p"):
+        return check_p3p_url(url, timeout)
+    elif url.startswith("p2p"):
+        return check_p2p_url(url, timeout)
+    elif url.startswith("rtmp") or url.startswith("rtsp") :
+        return check_rtmp_url(url, timeout)
+    return False
 
-    return elapsed_time, success
+# 检测出错时记录host
+check_errors = {}
+def report_check_error(url, e):
+    print(f"Error checking {url}: {e or type(e).__name__}")
+    record_host(get_host_from_url(url))
+    check_errors[url] = str(e) or type(e).__name__
 
 def check_rtmp_url(url, timeout):
     try:
+        # host解析失败（含已缓存的失败）时不再启动ffprobe
+        host = urlparse(url).hostname
+        if host:
+            default_dns_cache().resolve(host)
         result = subprocess.run(['ffprobe', url], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
         if result.returncode == 0:
             return True
@@ -84,25 +82,6 @@ def check_rtmp_url(url, timeout):
         print(f"Error checking {url}: {e}")
     return False
 
-def check_rtp_url(url, timeout):
-    try:
-        # 解析URL
-        parsed_url = urlparse(url)
-        
-        # 提取主机名（IP地址）和端口号
-        host = parsed_url.hostname
-        port = parsed_url.port
-
-        # 创建一个 socket 连接
-        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-            s.settimeout(timeout)  # 设置超时时间
-            s.connect((host, port))
-            s.sendto(b'', (host, port))  # 发送空的UDP数据包
-            s.recv(1)  # 尝试接收数据
-        return True
-    except (socket.timeout, socket.error):
-        return False
-
 def check_p3p_url(url, timeout):
     try:
         # 解析URL
@@ -116,7 +95,7 @@ def check_p3p_url(url, timeout):
             raise ValueError("Invalid p3p URL")
 
         # 创建一个 TCP 连接
-        with socket.create_connection((host, port), timeout=timeout) as s:
+        with default_dns_cache().create_connection((host, port), timeout=timeout) as s:
             # 发送一个简单的请求（根据协议定义可能需要调整）
             # request = f"GET {path} P3P/1.0\r\nHost: {host}\r\n\r\n"
             # 构造请求
@@ -150,7 +129,7 @@ def check_p2p_url(url, timeout):
             raise ValueError("Invalid P2P URL")
 
         # 创建一个 TCP 连接
-        with socket.create_connection((host, port), timeout=timeout) as s:
+        with default_dns_cache().create_connection((host, port), timeout=timeout) as s:
             # 自定义请求，这里只是一个占位符，需根据具体协议定义
             request = f"YOUR_CUSTOM_REQUEST {path}\r\nHost: {host}\r\n\r\n"
             s.sendall(request.encode())
@@ -165,41 +144,201 @@ def check_p2p_url(url, timeout):
         print(f"Error checking {url}: {e}")
     return False
 
-# 处理单行文本并检测URL
-def process_line(line, whitelist): 
-    if "#genre#" in line or "://" not in line :
-        return None, None  # 跳过包含“#genre#”的行
-    line=line.strip()
-    parts = line.split(',')
-    if len(parts) == 2:
-        name, url = parts
-        # 白名单判断
-        if url in whitelist:
-            return 0, line
-        # 请求验证
-        elapsed_time, is_valid = check_url(url)
-        if is_valid:
-            return elapsed_time, line
-        else:
-            return None, line
-    return None, None
+# 检测单条直播源
+async def process_line(channel, whitelist, checker):
+    if "#genre#" in channel.url or "," in channel.url:
+        return None, None  # 跳过包含“#genre#”或多于两段的行
+    url = channel.url
+    # 白名单判断
+    if url in whitelist:
+        return 0, channel
+    # 请求验证
+    elapsed_time, is_valid = await checker.check(url)
+    if is_valid:
+        return elapsed_time, channel
+    else:
+        return None, channel
 
-# 多线程处理文本并检测URL
-def process_urls_multithreaded(lines, whitelist, max_workers=30):
+# 异步检测全部直播源（全局及每个host的并发上限见 stream_checker），journal 不为None时每条检测完成即写入日志
+def process_urls_async(lines, whitelist, checker=None, journal=None):
+    if checker is None:
+        checker = StreamChecker(blocking_check=check_other_url, on_error=report_check_error)
     blacklist =  [] 
     successlist = []
-    
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(process_line, line, whitelist): line for line in lines}
-        for future in as_completed(futures):
-            elapsed_time, result = future.result()
-            if result:
-                if elapsed_time is not None:
-                    successlist.append(f"{elapsed_time:.2f}ms,{result}")
-                else:
-                    blacklist.append(result)
+
+    async def check_one(channel):
+        elapsed_time, channel = await process_line(channel, whitelist, checker)
+        if channel and channel.url in checker.skipped:
+            return  # host熔断跳过，没有检测：不写日志，也不算失败
+        if channel and journal is not None:
+            hls = checker.hls_results.get(channel.url)
+            journal.record(channel.url, elapsed_time is not None, elapsed_time, check_errors.get(channel.url),
+                           hls.segment_ttfb_ms if hls else None)
+        if channel:
+            if elapsed_time is not None:
+                channel.latency = elapsed_time
+                successlist.append(channel)
+            else:
+                blacklist.append(channel)
+
+    async def check_all():
+        try:
+            checker.prepare(channel.url for channel in lines)
+            await asyncio.gather(*(check_one(channel) for channel in lines))
+        finally:
+            checker.close_connections()
+
+    try:
+        asyncio.run(check_all())
+    finally:
+        checker.close()
     return successlist, blacklist
 
+# 上次检测结果仍在有效期内的直播源直接沿用，返回 (需要检测的, 沿用的成功清单, 沿用的黑名单)
+def reuse_fresh_results(lines, whitelist, store, previous_results):
+    now = time.time()
+    to_check = []
+    successlist = []
+    blacklist = []
+    for channel in lines:
+        result = previous_results.get(channel.url)
+        if channel.url in whitelist or result is None or not store.is_fresh(result, now):
+            to_check.append(channel)
+        elif result.ok:
+            channel.latency = result.latency
+            successlist.append(channel)
+        else:
+            if result.error is not None:
+                record_host(get_host_from_url(channel.url))  # 沿用的出错也计入blackhost统计
+            blacklist.append(channel)
+    return to_check, successlist, blacklist
+
+# 日志中已有本轮结果的直播源不再检测（上次运行被中断时留下的），返回 (需要检测的, 从日志恢复的个数)
+def resume_from_journal(lines, journal):
+    to_check = []
+    resumed = 0
+    for channel in lines:
+        entry = journal.entries.get(channel.url)
+        if entry is None:
+            to_check.append(channel)
+            continue
+        resumed += 1
+        if entry["error"] is not None:
+            record_host(get_host_from_url(channel.url))  # 与检测出错时相同计入blackhost统计
+    return to_check, resumed
+
+# 由日志生成本轮检测（含从日志恢复的）的成功清单和黑名单
+def materialize_journal(lines, journal):
+    successlist = []
+    blacklist = []
+    for channel in lines:
+        entry = journal.entries.get(channel.url)
+        if entry is None:
+            continue  # 跳过的行
+        if entry["ok"]:
+            channel.latency = entry["latency"]
+            successlist.append(channel)
+        else:
+            blacklist.append(channel)
+    return successlist, blacklist
+
+# 保存本轮检测结果（白名单未检测，不保存）
+def save_probe_results(store, previous_results, lines, journal, whitelist):
+    for channel in lines:
+        entry = journal.entries.get(channel.url)
+        if entry is None or channel.url in whitelist:
+            continue
+        store.record(channel.url, entry["ok"], entry["latency"] if entry["ok"] else None, previous_results.get(channel.url),
+                     checked_at=entry["checked_at"], error=entry["error"], segment_ttfb=entry["segment_ttfb"])
+
+# host熔断跳过（没有检测）的直播源：上次检测成功的沿用上次结果，其余本轮不判定（不进黑名单、不写检测结果库）
+# 返回 (沿用的成功清单, 不判定的)
+def carry_forward_skipped(lines, skipped, previous_results):
+    successlist = []
+    deferred = []
+    for channel in lines:
+        if channel.url not in skipped:
+            continue
+        result = previous_results.get(channel.url)
+        if result is not None and result.ok:
+            channel.latency = result.latency
+            successlist.append(channel)
+        else:
+            deferred.append(channel)
+    return successlist, deferred
+
+# 等价源分组：同一个源的备选按 白名单 > 历史评分 > 出现顺序 排列，第一个作为代表
+# 返回 (代表清单, {代表url: [其余备选]})
+def group_equivalent(lines, equivalence, store, previous_results, whitelist):
+    def rank(channel):
+        if channel.url in whitelist:
+            return 2.0
+        score = store.score(previous_results.get(channel.url))
+        return EQUIV_UNKNOWN_SCORE if score is None else score
+
+    for channel in lines:
+        equivalence.add(channel.url, channel, channel.name)
+    representatives = []
+    fallbacks = {}
+    for alternates in equivalence.groups.values():
+        alternates = sorted(alternates, key=rank, reverse=True)  # 稳定排序，同分时先出现的在前
+        representatives.append(alternates[0])
+        if len(alternates) > 1:
+            fallbacks[alternates[0].url] = alternates[1:]
+    return representatives, fallbacks
+
+# 检测一批直播源：沿用有效期内的结果 -> 从日志恢复 -> 检测其余的并保存结果，返回 (成功清单, 黑名单, 熔断跳过未判定的, checker)
+# counts 累计沿用/恢复/检测/熔断跳过的条数
+def check_channels(lines, whitelist, store, previous_results, journal, counts):
+    lines_to_check, reused_successlist, reused_blacklist = reuse_fresh_results(lines, whitelist, store, previous_results)
+    lines_probed = lines_to_check
+    lines_to_check, resumed = resume_from_journal(lines_probed, journal)
+    checker = StreamChecker(blocking_check=check_other_url, on_error=report_check_error)
+    process_urls_async(lines_to_check, whitelist, checker, journal)
+    successlist, blacklist = materialize_journal(lines_probed, journal)
+    save_probe_results(store, previous_results, lines_probed, journal, whitelist)
+    carried_successlist, deferred = carry_forward_skipped(lines_to_check, checker.skipped, previous_results)
+    counts["reused"] += len(reused_successlist) + len(reused_blacklist)
+    counts["resumed"] += resumed
+    counts["probed"] += len(lines_to_check) - len(checker.skipped)
+    counts["skipped"] += len(checker.skipped)
+    counts["carried"] += len(carried_successlist)
+    return successlist + reused_successlist + carried_successlist, blacklist + reused_blacklist, deferred, checker
+
+# 代表检测失败（或因熔断未判定）的源依次检测下一个备选，直到有一个成功或达到次数上限，返回 (成功清单, 黑名单)
+def check_fallbacks(pending, fallbacks, whitelist, store, previous_results, journal, counts, max_rounds=EQUIV_MAX_FALLBACKS):
+    successlist = []
+    failed = []
+    for _ in range(max_rounds):
+        candidates = []
+        for channel in pending:
+            alternates = fallbacks.pop(channel.url, None)
+            if alternates:
+                candidates.append(alternates[0])
+                if len(alternates) > 1:
+                    fallbacks[alternates[0].url] = alternates[1:]
+        if not candidates:
+            break
+        round_successlist, round_blacklist, round_deferred, _ = check_channels(
+            candidates, whitelist, store, previous_results, journal, counts)
+        successlist += round_successlist
+        failed += round_blacklist
+        pending = round_blacklist + round_deferred
+    return successlist, failed
+
+# 可靠性评分（0~1，见 probe_store），白名单为1，按评分从高到低排序，返回 [(评分, channel)]
+def score_successlist(store, successlist, whitelist):
+    latest_results = store.get_many(channel.url for channel in successlist)
+    scored = []
+    for channel in successlist:
+        if channel.url in whitelist:
+            score = 1.0
+        else:
+            score = store.score(latest_results.get(channel.url)) or 0.0
+        scored.append((score, channel))
+    scored.sort(key=lambda item: (-item[0], item[1].latency))
+    return scored
+
 # 写入文件
 def write_list(file_path, data_list):
     with open(file_path, 'w', encoding='utf-8') as file:
@@ -210,19 +349,8 @@ def write_list(file_path, data_list):
 # urls里所有的源都读到这里。
 urls_all_lines = []
 
-#M3U格式判断
-def is_m3u_content(text):
-    lines = text.splitlines()
-    first_line = lines[0].strip()
-    return first_line.startswith("#EXTM3U")
-
-def convert_m3u_to_txt(m3u_content):
-    # 分行处理
-    lines = m3u_content.split('\n')
-    
-    # 用于存储结果的列表
-    txt_lines = []
-    
+# 逐行把M3U转换为 "频道名,url"（流式解析时收到一行转换一行）
+def convert_m3u_lines(lines):
     # 临时变量用于存储频道名称
     channel_name = ""
     
@@ -236,11 +364,10 @@ def convert_m3u_to_txt(m3u_content):
             channel_name = line.split(',')[-1].strip()
         # 处理 URL 行
         elif line.startswith("http"):
-            txt_lines.append(f"{channel_name},{line.strip()}")
-
-    return txt_lines
+            yield f"{channel_name},{line.strip()}"
 
 url_statistics=[]
+encoding_memo = EncodingMemo()  # 各源上次使用的编码
 
 def process_url(url):
     try:
@@ -248,39 +375,35 @@ def process_url(url):
         headers = {
             'User-Agent': 'PostmanRuntime-ApipostRuntime/1.1.0',
         }
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req, timeout=10) as response:
-            # 以二进制方式读取数据
-            data = response.read()
-            # 将二进制数据解码为字符串
-            text = data.decode('utf-8')
-            if is_m3u_content(text):
-                m3u_lines=convert_m3u_to_txt(text)
-                url_statistics.append(f"{len(m3u_lines)},{url.strip()}")
-                urls_all_lines.extend(m3u_lines) # 注意：extend
-            else:
-                lines = text.split('\n')
-                url_statistics.append(f"{len(lines)},{url.strip()}")
-                for line in lines:
-                    if  "#genre#" not in line and "," in line and "://" in line:
-                        urls_all_lines.append(line.strip())
+        # 边下载边解码、分行（经磁盘缓存，内容未变化时服务器返回304直接用缓存；GitHub raw 源在各镜像间竞速）
+        # 下载中途出错时整个源都不用，与原来读完再解析相同
+        source_lines = []
+        with open_source(url, headers=headers, timeout=10) as body:
+            lines = SourceLines(body, convert_m3u_lines, url, encoding_memo)
+            for line in lines:
+                if lines.is_m3u:
+                    source_lines.append(line)
+                elif  "#genre#" not in line and "," in line and "://" in line:
+                    source_lines.append(line.strip())
+        url_statistics.append(f"{lines.count},{url.strip()}")
+        urls_all_lines.extend(source_lines) # 注意：extend
     
     except Exception as e:
         print(f"处理URL时发生错误：{e}")
 
 
 # 去重复源 2024-08-06 (检测前剔除重复url，提高检测效率)
-def remove_duplicates_url(lines):
-    urls =[]
-    newlines=[]
+# 同时把行文本解析为Channel，后续检测、排序、输出直接使用字段
+# 按规范化后的url去重（host大小写、默认端口、空?、参数顺序等，见 url_dedup），各规则去掉的个数记在 dedup.stats
+def remove_duplicates_url(lines, dedup=None):
+    if dedup is None:
+        dedup = UrlDeduplicator()
+    channels=[]
     for line in lines:
-        if "," in line and "://" in line:
-            # channel_name=line.split(',')[0].strip()
-            channel_url=line.split(',')[1].strip()
-            if channel_url not in urls: # 如果发现当前url不在清单中，则假如newlines
-                urls.append(channel_url)
-                newlines.append(line)
-    return newlines
+        channel = Channel.from_line(line)
+        if channel is not None and dedup.add(channel.url): # 规范化后的url不在索引中，则加入channels
+            channels.append(channel)
+    return channels
 
 # 处理带$的URL，把$之后的内容都去掉（包括$也去掉） 【2024-08-08 22:29:11】
 #def clean_url(url):
@@ -344,6 +467,8 @@ if __name__ == "__main__":
         if url.startswith("http"):
             print(f"处理URL: {url}")
             process_url(url)   #读取上面url清单中直播源存入urls_all_lines
+    encoding_memo.save()
+    default_mirror_stats().save()
             
     # 获取当前脚本所在的目录
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -379,43 +504,56 @@ if __name__ == "__main__":
     lines_whitelist=clean_url(lines_whitelist)
 
     # 去重
-    lines=remove_duplicates_url(lines)
+    url_dedup = UrlDeduplicator()
+    lines=remove_duplicates_url(lines, url_dedup)
     lines_whitelist=remove_duplicates_url(lines_whitelist)
     urls_hj = len(lines)
 
-    # 白名单提前处理
-    # 先使用列表推导式提取逗号后的内容，同时可以添加更多的条件判断和处理逻辑
-    extracted_parts = [white_line.split(',')[1].strip() if ',' in white_line and len(white_line.split(',')) >= 2 else "" for white_line in lines_whitelist]
-    # 再将提取出来的内容构建成集合，利用集合去重等特性（如果有需要的话）
-    white_line_parts_set = set(extracted_parts)
+    # 白名单提前处理，url构建成集合
+    white_line_parts_set = {channel.url for channel in lines_whitelist}
     # 处理URL并生成成功清单和黑名单
-    successlist, blacklist = process_urls_multithreaded(set(lines), white_line_parts_set)
+    # 检测结果库：上次结果仍在有效期内的不再检测
+    store = ProbeStore()
+    previous_results = store.get_many(channel.url for channel in lines)
+    # 等价源：只换了签名参数或在镜像host上的url归为同一个源，只检测代表，代表失败时再检测备选
+    # 镜像host组由历史检测成功的url学习，检测全部完成后写入文件供 main.py 合并 live.txt 中的等价源
+    host_groups = learn_host_groups(store.ok_urls())
+    if EQUIV_INDEX:
+        lines, fallbacks = group_equivalent(lines, EquivalenceIndex(host_groups), store, previous_results, white_line_parts_set)
+    else:
+        fallbacks = {}
+    urls_alternates = sum(len(alternates) for alternates in fallbacks.values())
+    # 检测结果日志：上次运行中途被中断时，已完成的检测不再重做
+    journal = ProbeJournal()
+    journal.load()
+    check_counts = dict.fromkeys(["reused", "resumed", "probed", "skipped", "carried"], 0)
+    successlist, blacklist, deferred, checker = check_channels(
+        set(lines), white_line_parts_set, store, previous_results, journal, check_counts)
+    fallback_successlist, fallback_blacklist = check_fallbacks(
+        blacklist + deferred, fallbacks, white_line_parts_set, store, previous_results, journal, check_counts)
+    journal.close()
+    successlist += fallback_successlist
+    blacklist += fallback_blacklist
+    scored_successlist = score_successlist(store, successlist, white_line_parts_set)
+    store.close()
     
     # 给successlist, blacklist排序
     # 定义排序函数
-    def successlist_sort_key(item):
-        time_str = item.split(',')[0].replace('ms', '')
-        return float(time_str)
+    def successlist_sort_key(channel):
+        return channel.latency
     
     successlist=sorted(successlist, key=successlist_sort_key)
-    blacklist=sorted(blacklist)
+    blacklist=sorted(blacklist, key=Channel.to_line)
 
     # 计算check后ok和ng个数
     urls_ok = len(successlist)
     urls_ng = len(blacklist)
 
-    # 把successlist整理一下，生成一个可以直接引用的源，方便用zyplayer手动check
-    def remove_prefix_from_lines(lines):
-        result = []
-        for line in lines:
-            if  "#genre#" not in line and "," in line and "://" in line:
-                parts = line.split(",")
-                result.append(",".join(parts[1:]))
-        return result
 
     # 输出文件路径
     success_file = os.path.join(current_dir, 'whitelist_auto.txt')  # 成功清单文件路径
     success_file_tv = os.path.join(current_dir, 'whitelist_auto_tv.txt')  # 成功清单文件路径（另存一份直接引用源）
+    score_file = os.path.join(current_dir, 'whitelist_score.txt')  # 可靠性评分清单文件路径（main.py 按评分选用）
     blacklist_file = os.path.join(current_dir, 'blacklist_auto.txt')  # 黑名单文件路径
 
     # 加时间戳
@@ -424,23 +562,31 @@ if __name__ == "__main__":
     # 北京时间
     beijing_time = utc_time + timedelta(hours=8)
     version=beijing_time.strftime("%Y%m%d %H:%M")+",url"
+    # successlist_tv不带响应时间，生成一个可以直接引用的源，方便用zyplayer手动check
     successlist_tv = ["更新时间,#genre#"] +[version] + ['\n'] +\
-                  ["whitelist,#genre#"] + remove_prefix_from_lines(successlist)
+                  ["whitelist,#genre#"] + [channel.to_line() for channel in successlist]
     successlist = ["更新时间,#genre#"] +[version] + ['\n'] +\
-                  ["RespoTime,whitelist,#genre#"] + successlist
+                  ["RespoTime,whitelist,#genre#"] + [f"{channel.latency:.2f}ms,{channel}" for channel in successlist]
     blacklist = ["更新时间,#genre#"] +[version] + ['\n'] +\
-                ["blacklist,#genre#"]  + blacklist
+                ["blacklist,#genre#"]  + [channel.to_line() for channel in blacklist]
+    # 评分综合了历史成功率和响应时间p95，比单次响应时间稳定
+    scorelist = ["更新时间,#genre#"] +[version] + ['\n'] +\
+                ["Score,whitelist,#genre#"] + [f"{score:.3f},{channel}" for score, channel in scored_successlist]
 
     
     # 写入成功清单文件
     write_list(success_file, successlist)
     write_list(success_file_tv, successlist_tv)
+    write_list(score_file, scorelist)
 
     # 写入黑名单文件
     write_list(blacklist_file, blacklist)
+    # 镜像host组（检测中途被中断时不写，避免只提交这一个文件）
+    write_host_groups(host_groups)
 
     print(f"成功清单文件已生成: {success_file}")
     print(f"成功清单文件已生成(tv): {success_file_tv}")
+    print(f"评分清单文件已生成: {score_file}")
     print(f"黑名单文件已生成: {blacklist_file}")
 
     # 执行的代码
@@ -463,8 +609,22 @@ if __name__ == "__main__":
     print(f"执行时间: {minutes} 分 {seconds} 秒")
     print(f"urls_hj最初: {urls_hj_before} ")
     print(f"urls_hj去重后: {urls_hj} ")
+    print(f"去重规则去掉的重复url: {url_dedup.stats}")
     print(f"urls_ok: {urls_ok} ")
     print(f"urls_ng: {urls_ng} ")
+    print(f"等价源: {len(host_groups)} 个镜像host组, 合并为备选 {urls_alternates} 条, 代表失败后备选检测成功 {len(fallback_successlist)} 条")
+    print(f"沿用上次检测结果: {check_counts['reused']} 条, 从中断的检测日志恢复: {check_counts['resumed']} 条, 本次检测: {check_counts['probed']} 条")
+    print(f"host熔断: {checker.stats}, 熔断跳过 {check_counts['skipped']} 条"
+          f"（沿用上次成功结果 {check_counts['carried']} 条，其余本轮不判定，不进黑名单）")
+    print(f"连接复用: {checker.pool.stats}")
+    print(f"DNS缓存: {default_dns_cache().stats}")
+    print(f"GitHub镜像耗时: {default_mirror_stats().summary()}")
+    if checker.hls_results:
+        hls_probes = checker.hls_results.values()
+        print(f"HLS深度检测通过: {len(hls_probes)} 条, "
+              f"播放列表平均响应 {sum(p.manifest_ms for p in hls_probes) / len(hls_probes):.0f}ms, "
+              f"分片平均首字节 {sum(p.segment_ttfb_ms for p in hls_probes) / len(hls_probes):.0f}ms, "
+              f"平均读取 {sum(p.bytes_read for p in hls_probes) / len(hls_probes) / 1024:.1f}KB")
 
     # 黑名单Host路径
     blackhost_file = os.path.join(current_dir, "blackhost_count.txt")
@@ -476,6 +636,8 @@ if __name__ == "__main__":
         print(f"结果已保存到 {filename}")
 
     save_blackhost_to_txt()
+    # 结果文件都已写好，删除本轮的检测日志
+    journal.remove()
             
     for statistics in url_statistics: #查看各个url的量有多少 2024-08-19
         print(statistics)
@@ -0,0 +1,587 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步直播源检测器（asyncio）
+  - 每条检测只占一个协程，可同时有几千条检测在途，慢源不再占满线程池
+  - 全局并发上限 + 每个host并发上限，避免同一台服务器被打爆
+  - http/https 直接用 asyncio 发请求，读到状态行和响应头即判定，结果与原 urllib 检测一致
+  - rtsp/rtmp 用 stream_protocols 原生握手检测，ffprobe 仅在开启深度检测时运行，同时运行的进程数有上限；
+    本机没有ffprobe时只做握手检测，不计入host熔断
+  - rtp/udp 也在事件循环中检测，不占线程；udpxy 的http地址要求在超时内收到数据
+  - 其他协议（p3p/p2p 等）仍用原来的阻塞检测，放到线程池执行
+  - 每个host一个熔断器：连续失败达到阈值后，该host剩余的url不再发请求，冷却后放一个试探；
+    熔断跳过的url没有检测过，不算失败，记在 skipped 中由调用方决定（如沿用上次结果）
+  - 同一host的检测复用 keep-alive 连接（含TLS），小响应体读完后连接放回池中
+  - host解析使用 dns_cache：检测开始前并发解析全部host，解析失败的host直接判失败
+  - HLS深度检测：m3u8 返回200后再解析播放列表，主播放列表跟到码率最低的子播放列表，
+    用 Range 读第一个分片开头；每条检测读取的字节数有上限，播放列表为空、分片打不开判失败
+"""
+
+import asyncio
+import os
+import re
+import shutil
+import ssl
+import string
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urljoin, urlparse
+
+from dns_cache import default_dns_cache
+from stream_protocols import (NATIVE_SCHEMES, UDP_SCHEMES, UDPXY_PROBE_BYTES, ProtocolError, RTSPStatusError, get_scheme,
+                              is_udpxy_url, open_connection, probe_rtp, probe_stream, run_ffprobe, udpxy_url)
+
+CHECK_MAX_CONCURRENCY = int(os.getenv("CHECK_MAX_CONCURRENCY", "2048"))  # 全局同时检测数
+CHECK_PER_HOST = int(os.getenv("CHECK_PER_HOST", "32"))  # 同一host同时检测数
+CHECK_TIMEOUT = float(os.getenv("CHECK_TIMEOUT", "6"))  # 秒
+CHECK_BLOCKING_WORKERS = int(os.getenv("CHECK_BLOCKING_WORKERS", "30"))  # 阻塞检测线程数
+# 连接池：每个host最多保留的空闲连接数、空闲多久关闭、响应体不超过多少字节时读完并复用连接
+CHECK_POOL_MAX_IDLE = int(os.getenv("CHECK_POOL_MAX_IDLE", str(CHECK_PER_HOST)))  # 在用连接数受host并发上限约束，空闲数与之相同即可
+CHECK_POOL_IDLE_TIMEOUT = float(os.getenv("CHECK_POOL_IDLE_TIMEOUT", "15"))  # 秒
+CHECK_BODY_BUDGET = int(os.getenv("CHECK_BODY_BUDGET", str(16 * 1024)))  # 字节
+# 熔断：window秒内失败threshold次即熔断，cooldown秒后半开试探，最多试探trials次，threshold=0关闭熔断
+CHECK_BREAKER_THRESHOLD = int(os.getenv("CHECK_BREAKER_THRESHOLD", "5"))
+CHECK_BREAKER_WINDOW = float(os.getenv("CHECK_BREAKER_WINDOW", "60"))  # 秒
+CHECK_BREAKER_COOLDOWN = float(os.getenv("CHECK_BREAKER_COOLDOWN", "10"))  # 秒
+CHECK_BREAKER_TRIALS = int(os.getenv("CHECK_BREAKER_TRIALS", "1"))
+# 熔断期间到来的url：1=等半开试探的结果再决定（默认），0=直接跳过（记入 skipped）
+CHECK_BREAKER_DEFER = os.getenv("CHECK_BREAKER_DEFER", "1") == "1"
+# HLS深度检测：1=开启（默认），0=与原检测相同只看状态码
+CHECK_HLS_DEEP = os.getenv("CHECK_HLS_DEEP", "1") == "1"
+HLS_MANIFEST_BYTES = int(os.getenv("HLS_MANIFEST_BYTES", str(64 * 1024)))  # 每个播放列表最多读多少字节
+HLS_SEGMENT_BYTES = int(os.getenv("HLS_SEGMENT_BYTES", str(32 * 1024)))  # 分片开头读多少字节
+HLS_BYTE_BUDGET = int(os.getenv("HLS_BYTE_BUDGET", str(128 * 1024)))  # 每条检测最多读多少字节
+HLS_MAX_DEPTH = 3  # 播放列表最多嵌套层数
+# rtsp/rtmp 握手通过后是否再用ffprobe确认可播放：0=不运行（默认），1=运行；同时运行的ffprobe进程数
+CHECK_FFPROBE_DEEP = os.getenv("CHECK_FFPROBE_DEEP", "0") == "1"
+CHECK_FFPROBE_WORKERS = int(os.getenv("CHECK_FFPROBE_WORKERS", "4"))
+
+USER_AGENT = 'PostmanRuntime-ApipostRuntime/1.1.0'
+MAX_REDIRECTS = 10  # 与urllib相同
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, code, reason):
+        super().__init__(f"HTTP Error {code}: {reason}")
+        self.code = code
+
+
+class HlsError(Exception):
+    pass
+
+
+# HLS深度检测结果：播放列表响应时间、分片首字节时间（ms）、共读取字节数
+HlsProbe = namedtuple("HlsProbe", "manifest_ms segment_ttfb_ms bytes_read")
+BANDWIDTH_RE = re.compile(r"[:,]BANDWIDTH=(\d+)")
+
+
+def is_hls(url, headers):
+    """响应是否为m3u8：Content-Type 为 mpegurl，或路径以 .m3u8 结尾且不是音视频类型（有的源直接返回ts流）"""
+    content_type = headers.get("content-type", "").lower()
+    if "mpegurl" in content_type:
+        return True
+    return urlparse(url).path.lower().endswith(".m3u8") and not content_type.startswith(("video/", "audio/"))
+
+
+def always(url, headers):
+    return True
+
+
+def parse_m3u8(body):
+    """解析m3u8，返回 ("variant", 码率最低的子播放列表uri) 或 ("segment", 第一个分片uri)，无效播放列表抛 HlsError"""
+    text = body.decode("utf-8", "replace").lstrip("\ufeff \t\r\n")
+    if not text.startswith("#EXTM3U"):
+        raise HlsError("不是m3u8播放列表")
+    variants = []
+    bandwidth = None  # 上一行 #EXT-X-STREAM-INF 的码率
+    for line in text.splitlines()[1:]:
+        line = line.strip()
+        if line.startswith("#EXT-X-STREAM-INF"):
+            match = BANDWIDTH_RE.search(line)
+            bandwidth = int(match.group(1)) if match else 0
+        elif not line or line.startswith("#"):
+            continue
+        elif bandwidth is not None:
+            variants.append((bandwidth, line))
+            bandwidth = None
+        else:
+            return "segment", line
+    if variants:
+        return "variant", min(variants, key=lambda variant: variant[0])[1]
+    raise HlsError("播放列表中没有分片")
+
+
+async def read_partial_body(reader, headers, limit):
+    """最多读limit字节响应体（支持chunked），读够即止"""
+    body = b""
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        while len(body) < limit:
+            size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                break
+            body += await reader.readexactly(min(size, limit - len(body)))
+            if len(body) < limit:
+                await reader.readexactly(2)  # 块结尾的 \r\n
+        return body
+    length = headers.get("content-length", "")
+    if length.isdigit():
+        return await reader.readexactly(min(int(length), limit))
+    while len(body) < limit:
+        data = await reader.read(limit - len(body))
+        if not data:
+            break
+        body += data
+    return body
+
+
+def get_host_key(url):
+    """并发限制按host计，与 record_host 统计口径相同"""
+    return urlparse(url).netloc
+
+
+def raise_nofile_limit(wanted):
+    """同时打开的socket较多，尽量调高进程文件描述符上限"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+    if soft != resource.RLIM_INFINITY and soft < target:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        except (ValueError, OSError):
+            pass
+
+
+class ConnectionPool:
+    """按 (协议, host, 端口) 保存空闲的 keep-alive 连接，后进先出，空闲超时的连接取用时淘汰"""
+
+    def __init__(self, ssl_context, dns, max_idle=CHECK_POOL_MAX_IDLE, idle_timeout=CHECK_POOL_IDLE_TIMEOUT):
+        self.ssl_context = ssl_context
+        self.dns = dns
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self._idle = {}  # key -> [(reader, writer, 放回时间)]
+        self.stats = {"connect": 0, "reuse": 0, "stale": 0, "evict_idle": 0, "discard": 0}
+
+    async def acquire(self, key):
+        """取一个连接，返回 (reader, writer, 是否复用)"""
+        idle = self._idle.get(key)
+        now = time.monotonic()
+        while idle:
+            reader, writer, released_at = idle.pop()
+            if now - released_at > self.idle_timeout or writer.is_closing() or reader.at_eof():
+                self.stats["evict_idle"] += 1
+                writer.close()
+                continue
+            self.stats["reuse"] += 1
+            return reader, writer, True
+        scheme, host, port = key
+        reader, writer = await open_connection(self.dns, host, port, self.ssl_context if scheme == "https" else None)
+        self.stats["connect"] += 1
+        return reader, writer, False
+
+    def release(self, key, reader, writer):
+        idle = self._idle.setdefault(key, [])
+        if len(idle) >= self.max_idle:
+            self.discard(writer)
+            return
+        idle.append((reader, writer, time.monotonic()))
+
+    def discard(self, writer):
+        self.stats["discard"] += 1
+        writer.close()
+
+    def close_all(self):
+        for idle in self._idle.values():
+            for _, writer, _ in idle:
+                writer.close()
+        self._idle.clear()
+
+
+def is_reusable(version, code, headers, budget):
+    """响应体长度已知且不超过budget，读完后连接可以复用"""
+    if version != "HTTP/1.1" or headers.get("connection", "").lower() == "close":
+        return False
+    if code < 200 or code in (204, 304):
+        return True
+    if "transfer-encoding" in headers:
+        return False
+    length = headers.get("content-length", "")
+    return length.isdigit() and int(length) <= budget
+
+
+class HostCircuitBreaker:
+    """
+    单个host的熔断器
+      closed    正常检测，记录网络层失败（连接失败、超时、DNS等，HTTP 4xx/5xx说明host还活着，不计）
+      open      不发请求；冷却结束后下一个检测作为半开试探
+      half_open 只有试探在检测，其他检测等待试探结果：成功则恢复closed，失败则重新open
+    试探次数用完后，该host剩余的url不再检测；试探被取消时不算结果，交还试探次数，由等待中的检测接着试探
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, threshold=CHECK_BREAKER_THRESHOLD, window=CHECK_BREAKER_WINDOW, cooldown=CHECK_BREAKER_COOLDOWN,
+                 trials=CHECK_BREAKER_TRIALS, defer=CHECK_BREAKER_DEFER):
+        self.threshold = threshold
+        self.window = window
+        self.cooldown = cooldown
+        self.trials = trials
+        self.defer = defer
+        self.state = self.CLOSED
+        self.failures = deque()  # window内失败的时间
+        self.opened_at = 0.0
+        self.trials_used = 0
+        self.trial_done = None
+
+    async def allow(self):
+        """检测前调用，返回 "probe"（正常检测）、"trial"（半开试探）或 "reject"（熔断，跳过检测）"""
+        while True:
+            if self.state == self.CLOSED:
+                return "probe"
+            if self.state == self.OPEN:
+                if self.trials_used >= self.trials:
+                    return "reject"
+                wait = self.opened_at + self.cooldown - time.monotonic()
+                if wait > 0:
+                    if not self.defer:
+                        return "reject"
+                    await asyncio.sleep(wait)
+                    continue
+                self.state = self.HALF_OPEN
+                self.trials_used += 1
+                self.trial_done = asyncio.Event()
+                return "trial"
+            if not self.defer:
+                return "reject"
+            await self.trial_done.wait()
+
+    def record_success(self, trial=False):
+        # host可达，恢复正常
+        self.state = self.CLOSED
+        self.failures.clear()
+        if trial:
+            self.trial_done.set()
+
+    def release_trial(self):
+        # 试探没有结果（被取消）：回到open，冷却已过，等待中的下一个检测成为试探
+        self.state = self.OPEN
+        self.trials_used -= 1
+        self.trial_done.set()
+
+    def record_failure(self, trial=False):
+        """记录一次网络层失败，返回是否因此熔断"""
+        now = time.monotonic()
+        if trial:
+            self.state = self.OPEN
+            self.opened_at = now
+            self.trial_done.set()
+            return True
+        if self.state != self.CLOSED or self.threshold <= 0:
+            return False
+        self.failures.append(now)
+        while self.failures and self.failures[0] < now - self.window:
+            self.failures.popleft()
+        if len(self.failures) >= self.threshold:
+            self.state = self.OPEN
+            self.opened_at = now
+            return True
+        return False
+
+
+class StreamChecker:
+    def __init__(self, max_concurrency=CHECK_MAX_CONCURRENCY, per_host=CHECK_PER_HOST, timeout=CHECK_TIMEOUT,
+                 blocking_check=None, on_error=None, blocking_workers=CHECK_BLOCKING_WORKERS, dns=None,
+                 hls_deep=CHECK_HLS_DEEP, ffprobe_deep=CHECK_FFPROBE_DEEP, ffprobe_workers=CHECK_FFPROBE_WORKERS):
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.blocking_check = blocking_check  # 非http协议的检测 (url, timeout) -> bool
+        self.on_error = on_error  # 检测出错时回调 (url, exception)
+        self.hls_deep = hls_deep
+        self.hls_results = {}  # url -> HlsProbe，HLS深度检测通过的url
+        self.ffprobe_workers = ffprobe_workers
+        # 启动时确认一次ffprobe可用；找不到时关闭深度检测，rtsp/rtmp 按握手结果判定
+        self.ffprobe_path = shutil.which("ffprobe") if ffprobe_deep else None
+        self.ffprobe_deep = self.ffprobe_path is not None
+        if ffprobe_deep and not self.ffprobe_deep:
+            print("找不到 ffprobe，rtsp/rtmp 只做握手检测")
+        self.executor = ThreadPoolExecutor(max_workers=blocking_workers)
+        self.ssl_context = ssl.create_default_context()
+        # rtsps/rtmps 与ffprobe默认行为相同，不校验证书
+        self.stream_ssl_context = ssl.create_default_context()
+        self.stream_ssl_context.check_hostname = False
+        self.stream_ssl_context.verify_mode = ssl.CERT_NONE
+        self.dns = dns or default_dns_cache()
+        self.pool = ConnectionPool(self.ssl_context, self.dns)
+        self._global = None
+        self._ffprobe = None
+        self._hosts = {}
+        self._breakers = {}
+        self.stats = {"trip": 0, "short_circuit": 0, "trial": 0, "hls": 0, "ffprobe": 0}
+        self.skipped = set()  # 因host熔断没有检测的url
+        raise_nofile_limit(max_concurrency + 256)
+
+    def _host_semaphore(self, url):
+        key = get_host_key(url)
+        semaphore = self._hosts.get(key)
+        if semaphore is None:
+            semaphore = self._hosts[key] = asyncio.Semaphore(self.per_host)
+        return semaphore
+
+    def _breaker(self, url):
+        key = get_host_key(url)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = HostCircuitBreaker()
+        return breaker
+
+    async def _request(self, url, extra_headers=None, body_limit=0, read_body=None, body_timeout=None):
+        """发GET请求，返回 (状态码, 原因, 响应头, 响应体)
+        不超过预算的小响应体读完以复用连接；read_body(url, 响应头) 为真时最多读 body_limit 字节响应体返回，否则不返回响应体；
+        body_timeout 为收到响应头后等响应体的时间，超时说明服务器在线但没有数据，抛 ProtocolError"""
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https"):
+            raise ValueError(f"unknown url type: {parsed.scheme}")
+        host = parsed.hostname
+        if not host:
+            raise ValueError("no host given")
+        is_https = parsed.scheme == "https"
+        port = parsed.port or (443 if is_https else 80)
+        path = parsed.path or "/"
+        if parsed.query:
+            path += "?" + parsed.query
+        host_header = f"[{host}]" if ":" in host else host
+        if parsed.port:
+            host_header += f":{parsed.port}"
+        extra = "".join(f"{name}: {value}\r\n" for name, value in (extra_headers or {}).items())
+        request = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {host_header}\r\n"
+            f"User-Agent: {USER_AGENT}\r\n"
+            f"Accept-Encoding: identity\r\n{extra}\r\n"
+        ).encode("latin-1")
+        key = (parsed.scheme, host, port)
+        while True:
+            reader, writer, reused = await self.pool.acquire(key)
+            try:
+                writer.write(request)
+                head = await reader.readuntil(b"\r\n\r\n")
+                break
+            except (asyncio.IncompleteReadError, ConnectionError) as e:
+                self.pool.discard(writer)
+                # 复用的连接已被服务器关闭，换新连接重试
+                if reused and not getattr(e, "partial", b""):
+                    self.pool.stats["stale"] += 1
+                    continue
+                raise
+            except BaseException:
+                self.pool.discard(writer)
+                raise
+        lines = head.decode("iso-8859-1").split("\r\n")
+        status = lines[0].split(" ", 2)
+        if len(status) < 2 or not status[0].startswith("HTTP/") or not status[1].isdigit():
+            self.pool.discard(writer)
+            raise ValueError(f"bad status line: {lines[0]!r}")
+        code = int(status[1])
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        want_body = read_body is not None and body_limit > 0 and read_body(url, headers)
+        body = b""
+        try:
+            if is_reusable(status[0], code, headers, CHECK_BODY_BUDGET):
+                # 小响应体读完，连接放回池中
+                length = int(headers.get("content-length") or 0) if code >= 200 and code not in (204, 304) else 0
+                if length:
+                    body = await reader.readexactly(length)
+                self.pool.release(key, reader, writer)
+            else:
+                # 其他情况只读需要的部分，连接关闭
+                if want_body:
+                    try:
+                        body = await asyncio.wait_for(read_partial_body(reader, headers, body_limit), body_timeout)
+                    except asyncio.TimeoutError:
+                        if body_timeout is None:
+                            raise
+                        raise ProtocolError(f"响应头后 {body_timeout:g} 秒内没有收到数据") from None
+                self.pool.discard(writer)
+        except Exception:
+            self.pool.discard(writer)
+            if want_body:
+                raise
+        except BaseException:
+            self.pool.discard(writer)
+            raise
+        return code, status[2] if len(status) > 2 else "", headers, body[:body_limit] if want_body else b""
+
+    async def _fetch(self, url, extra_headers=None, body_limit=0, read_body=None, body_timeout=None):
+        """跟随重定向请求url，返回 (最终url, 状态码, 响应头, 响应体, 读完响应的时间)，非2xx抛 HTTPStatusError"""
+        current = url
+        for _ in range(MAX_REDIRECTS + 1):
+            code, reason, headers, body = await asyncio.wait_for(
+                self._request(current, extra_headers, body_limit, read_body, body_timeout), self.timeout + (body_timeout or 0))
+            location = headers.get("location") or headers.get("uri")
+            if code in REDIRECT_CODES and location:
+                current = quote(urljoin(current, location), encoding="iso-8859-1", safe=string.punctuation)
+                continue
+            if 200 <= code < 300:
+                return current, code, headers, body, time.time()
+            raise HTTPStatusError(code, reason)
+        raise HTTPStatusError(code, "redirect loop")
+
+    async def _check_http(self, url, start_time):
+        """返回 (是否成功, 响应时间ms)；响应时间取最终响应读完的时间（m3u8含播放列表，udpxy含首个数据包），
+        HLS分片的耗时另外记录"""
+        # 与原检测相同，先把url中的汉字编码
+        current = quote(url, safe=':/?&=')
+        if is_udpxy_url(current):
+            # udpxy 组播没有数据时也先返回200，要在超时内收到数据才算可用
+            current, code, headers, body, received_at = await self._fetch(
+                current, body_limit=UDPXY_PROBE_BYTES, read_body=always, body_timeout=self.timeout)
+            if not body:
+                raise ProtocolError("udpxy 没有收到数据")
+            return code == 200, (received_at - start_time) * 1000
+        current, code, headers, body, received_at = await self._fetch(
+            current, body_limit=HLS_MANIFEST_BYTES, read_body=is_hls if self.hls_deep else None)
+        elapsed = (received_at - start_time) * 1000
+        if code == 200 and self.hls_deep and is_hls(current, headers):
+            await self._check_hls(url, current, body, elapsed)
+        return code == 200, elapsed
+
+    async def _check_hls(self, url, playlist_url, body, manifest_ms):
+        """HLS深度检测：解析m3u8，主播放列表跟到一个子播放列表，再读第一个分片开头，失败抛 HlsError"""
+        used = len(body)
+        limit = HLS_MANIFEST_BYTES
+        for _ in range(HLS_MAX_DEPTH):
+            try:
+                kind, uri = parse_m3u8(body)
+            except HlsError:
+                if len(body) >= limit:
+                    return  # 播放列表超出读取上限，只能按状态码判定
+                raise
+            if kind == "segment":
+                break
+            playlist_url = urljoin(playlist_url, uri)
+            limit = min(HLS_MANIFEST_BYTES, HLS_BYTE_BUDGET - used)
+            playlist_url, _, _, body, _ = await self._fetch(playlist_url, body_limit=limit, read_body=always)
+            used += len(body)
+        else:
+            raise HlsError("播放列表嵌套过深")
+        segment_url = urljoin(playlist_url, uri)
+        size = min(HLS_SEGMENT_BYTES, HLS_BYTE_BUDGET - used)
+        if size <= 0:
+            raise HlsError("播放列表超出字节预算")
+        start_time = time.time()
+        segment_url, _, _, data, received_at = await self._fetch(
+            segment_url, {"Range": f"bytes=0-{size - 1}"}, body_limit=size, read_body=always)
+        if not data:
+            raise HlsError(f"分片无数据: {segment_url}")
+        self.stats["hls"] += 1
+        self.hls_results[url] = HlsProbe(round(manifest_ms, 1), round((received_at - start_time) * 1000, 1), used + len(data))
+
+    async def _check_native(self, url, start_time):
+        """rtsp/rtmp 原生握手检测，返回 (是否成功, 响应时间ms)；响应时间取握手完成的时间，不含ffprobe"""
+        await asyncio.wait_for(probe_stream(url, self.dns, self.stream_ssl_context), self.timeout)
+        elapsed = (time.time() - start_time) * 1000
+        if not self.ffprobe_deep:
+            return True, elapsed
+        if self._ffprobe is None:
+            self._ffprobe = asyncio.Semaphore(self.ffprobe_workers)
+        async with self._ffprobe:
+            self.stats["ffprobe"] += 1
+            try:
+                return await run_ffprobe(url, self.timeout, self.ffprobe_path), elapsed
+            except OSError as e:
+                # ffprobe 无法启动是本机的问题，握手已经通过，不计入host熔断；之后不再运行ffprobe
+                if self.ffprobe_deep:
+                    print(f"ffprobe 无法运行，rtsp/rtmp 改为只做握手检测: {e}")
+                    self.ffprobe_deep = False
+                return True, elapsed
+
+    async def _check_rtp(self, url, start_time):
+        """rtp/udp 检测，返回 (是否成功, 响应时间ms)；配置了 UDPXY_PROXY 的组播地址经代理用http检测"""
+        proxied = udpxy_url(url)
+        if proxied is not None:
+            return await self._check_http(proxied, start_time)
+        success = await probe_rtp(url, self.dns, self.timeout)
+        return success, (time.time() - start_time) * 1000
+
+    def prepare(self, urls):
+        """检测开始前并发解析全部url的host，返回host个数"""
+        hosts = []
+        for url in urls:
+            try:
+                hosts.append(urlparse(url).hostname)
+            except ValueError:
+                pass
+        return self.dns.prefetch(hosts)
+
+    async def check(self, url):
+        """检测url是否可访问，返回 (响应时间ms或None, 是否成功)；host熔断跳过时返回 (None, False) 并记入 skipped"""
+        if self._global is None:
+            self._global = asyncio.Semaphore(self.max_concurrency)
+        breaker = self._breaker(url)
+        while True:
+            # 熔断判断在排队之前，等待中的检测不占host并发名额
+            mode = await breaker.allow()
+            if mode == "reject":
+                self.stats["short_circuit"] += 1
+                self.skipped.add(url)
+                return None, False
+            async with self._host_semaphore(url):
+                # 排队期间host可能已熔断，重新判断
+                if mode == "probe" and breaker.state != breaker.CLOSED:
+                    continue
+                async with self._global:
+                    return await self._probe(url, breaker, mode == "trial")
+
+    async def _probe(self, url, breaker, trial):
+        if trial:
+            self.stats["trial"] += 1
+        try:
+            return await self._probe_once(url, breaker, trial)
+        finally:
+            # 试探结束时仍是half_open说明没有记录结果（被取消），不释放的话等待试探结果的检测会一直等下去
+            if trial and breaker.state == breaker.HALF_OPEN:
+                breaker.release_trial()
+
+    async def _probe_once(self, url, breaker, trial):
+        start_time = time.time()
+        try:
+            if url.startswith("http"):
+                success, elapsed = await self._check_http(url, start_time)
+            elif get_scheme(url) in NATIVE_SCHEMES:
+                success, elapsed = await self._check_native(url, start_time)
+            elif get_scheme(url) in UDP_SCHEMES:
+                success, elapsed = await self._check_rtp(url, start_time)
+            else:
+                if self.blocking_check is not None:
+                    loop = asyncio.get_running_loop()
+                    success = await loop.run_in_executor(self.executor, self.blocking_check, url, self.timeout)
+                else:
+                    success = False
+                elapsed = (time.time() - start_time) * 1000  # 转换为毫秒
+        except Exception as e:
+            # HTTP/RTSP状态码错误、播放列表无效、协议不符说明host可达，不计入熔断
+            if isinstance(e, (HTTPStatusError, HlsError, RTSPStatusError, ProtocolError)):
+                breaker.record_success(trial)
+            elif breaker.record_failure(trial) and not trial:
+                self.stats["trip"] += 1
+            if self.on_error is not None:
+                self.on_error(url, e)
+            return None, False
+        breaker.record_success(trial)
+        return elapsed, success
+
+    def close_connections(self):
+        """关闭池中的空闲连接，需在事件循环结束前调用"""
+        self.pool.close_all()
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
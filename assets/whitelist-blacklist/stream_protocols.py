@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+rtsp/rtmp/rtp 直播源的原生检测（asyncio 非阻塞socket，不启动ffprobe进程，不占线程）
+  - rtsp/rtsps：依次发 OPTIONS、DESCRIBE，DESCRIBE 返回200且SDP中有媒体描述即判定可用；
+    url带用户名密码时按服务器要求做 Basic/Digest 认证，DESCRIBE 重定向最多跟随 RTSP_MAX_REDIRECTS 次
+  - rtmp/rtmps：发 C0/C1，收到版本正确的 S0/S1 即判定可用（只确认服务器在线，不确认流存在）
+  - ffprobe 深度检测（可选）：握手通过后再用 ffprobe 确认流可播放，由调用方限制同时运行的进程数
+  - rtp/udp：单播地址发一个空包等回包，组播地址加入组等数据；所有端点的收发都挂在事件循环的
+    selector（Linux 为 epoll）上，每个端点各自超时；设置 UDPXY_PROXY 时组播地址改为经 udpxy 用http检测
+  - udpxy 的 http 地址（/udp/组播地址:端口、/rtp/组播地址:端口）：响应200后还要在超时内收到数据
+"""
+
+import asyncio
+import base64
+import hashlib
+import ipaddress
+import os
+import re
+import socket
+import struct
+import time
+from urllib.parse import unquote, urljoin, urlparse
+
+RTSP_USER_AGENT = "Lavf/60.3.100"  # 与ffprobe相同，有的服务器按UA过滤
+RTSP_MAX_BODY = 64 * 1024  # SDP最多读多少字节
+RTSP_MAX_REDIRECTS = 3
+RTMP_HANDSHAKE_SIZE = 1536
+RTMP_VERSION = 3
+MAX_HEADER_BYTES = 64 * 1024
+DEFAULT_PORTS = {"rtsp": 554, "rtsps": 322, "rtmp": 1935, "rtmps": 443}
+NATIVE_SCHEMES = tuple(DEFAULT_PORTS)  # 可以原生检测的协议，其他协议（rtmpt等）仍用原检测
+UDP_SCHEMES = ("rtp", "udp")
+UDPXY_PROXY = os.getenv("UDPXY_PROXY", "").rstrip("/")  # 例如 http://192.168.1.1:4022，为空时直接检测组播
+UDPXY_PROBE_BYTES = 188  # udpxy 地址读到一个TS包大小即可
+UDPXY_PATH_RE = re.compile(r"^/(?:udp|rtp)/@?\d{1,3}(?:\.\d{1,3}){3}:\d+")
+
+
+class ProtocolError(Exception):
+    """服务器有响应，但响应不符合协议或没有可播放的内容"""
+
+
+class RTSPStatusError(Exception):
+    def __init__(self, code, reason):
+        super().__init__(f"RTSP Error {code}: {reason}")
+        self.code = code
+
+
+async def open_connection(dns, host, port, ssl_context=None, limit=MAX_HEADER_BYTES):
+    """用缓存的解析结果逐个IP尝试连接，返回 (reader, writer)；加密连接的SNI和证书校验仍用原host"""
+    last_error = None
+    for ip in await dns.resolve_async(host):
+        try:
+            return await asyncio.open_connection(
+                ip, port, ssl=ssl_context, server_hostname=host if ssl_context else None, limit=limit)
+        except OSError as e:
+            last_error = e
+    raise last_error
+
+
+def get_scheme(url):
+    return url.split("://", 1)[0].lower() if "://" in url else ""
+
+
+def split_stream_url(url):
+    """返回 (协议, host, 端口, 不带用户名密码的url, 用户名, 密码)"""
+    parsed = urlparse(url)
+    host = parsed.hostname
+    if not host:
+        raise ValueError("no host given")
+    scheme = parsed.scheme.lower()
+    port = parsed.port or DEFAULT_PORTS[scheme]
+    netloc = f"[{host}]" if ":" in host else host
+    if parsed.port:
+        netloc += f":{parsed.port}"
+    request_url = f"{scheme}://{netloc}{parsed.path or '/'}"
+    if parsed.query:
+        request_url += "?" + parsed.query
+    username = unquote(parsed.username) if parsed.username is not None else None
+    password = unquote(parsed.password or "")
+    return scheme, host, port, request_url, username, password
+
+
+def md5_hex(text):
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+def rtsp_authorization(method, uri, username, password, challenge):
+    """按 WWW-Authenticate 生成 Authorization 头"""
+    if not challenge.lower().startswith("digest"):
+        return "Basic " + base64.b64encode(f"{username}:{password}".encode("utf-8")).decode("ascii")
+    params = {key.lower(): value for key, value in re.findall(r'(\w+)="?([^",]*)"?', challenge[6:])}
+    realm, nonce = params.get("realm", ""), params.get("nonce", "")
+    ha1 = md5_hex(f"{username}:{realm}:{password}")
+    ha2 = md5_hex(f"{method}:{uri}")
+    fields = f'username="{username}", realm="{realm}", nonce="{nonce}", uri="{uri}"'
+    if "auth" in params.get("qop", "").split(","):
+        cnonce = os.urandom(8).hex()
+        response = md5_hex(f"{ha1}:{nonce}:00000001:{cnonce}:auth:{ha2}")
+        return f'Digest {fields}, response="{response}", qop=auth, nc=00000001, cnonce="{cnonce}"'
+    return f'Digest {fields}, response="{md5_hex(f"{ha1}:{nonce}:{ha2}")}"'
+
+
+async def read_rtsp_response(reader):
+    """读一个RTSP响应，返回 (状态码, 原因, 响应头, 响应体)"""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("iso-8859-1").split("\r\n")
+    status = lines[0].split(" ", 2)
+    if len(status) < 2 or not status[0].startswith("RTSP/") or not status[1].isdigit():
+        raise ProtocolError(f"bad RTSP status line: {lines[0]!r}")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers.setdefault(name.strip().lower(), value.strip())  # 多个认证方式时取第一个
+    length = headers.get("content-length", "")
+    body = await reader.readexactly(min(int(length), RTSP_MAX_BODY)) if length.isdigit() else b""
+    return int(status[1]), status[2] if len(status) > 2 else "", headers, body
+
+
+async def probe_rtsp(url, dns, ssl_context=None, redirects=RTSP_MAX_REDIRECTS):
+    """OPTIONS + DESCRIBE，成功返回True，失败抛异常"""
+    scheme, host, port, request_url, username, password = split_stream_url(url)
+    reader, writer = await open_connection(dns, host, port, ssl_context if scheme == "rtsps" else None)
+    try:
+        cseq = 0
+
+        async def request(method, extra=""):
+            nonlocal cseq
+            cseq += 1
+            writer.write((
+                f"{method} {request_url} RTSP/1.0\r\n"
+                f"CSeq: {cseq}\r\n"
+                f"User-Agent: {RTSP_USER_AGENT}\r\n{extra}\r\n"
+            ).encode("latin-1"))
+            return await read_rtsp_response(reader)
+
+        # OPTIONS 只要有合法的RTSP响应即可（有的服务器对 OPTIONS 也要求认证），是否可播放看 DESCRIBE
+        await request("OPTIONS")
+        code, reason, headers, body = await request("DESCRIBE", "Accept: application/sdp\r\n")
+        if code == 401 and username is not None and "www-authenticate" in headers:
+            authorization = rtsp_authorization("DESCRIBE", request_url, username, password, headers["www-authenticate"])
+            code, reason, headers, body = await request(
+                "DESCRIBE", f"Accept: application/sdp\r\nAuthorization: {authorization}\r\n")
+    finally:
+        writer.close()
+    location = headers.get("location")
+    if code in (301, 302, 303, 307) and location and redirects > 0:
+        return await probe_rtsp(urljoin(url, location), dns, ssl_context, redirects - 1)
+    if code != 200:
+        raise RTSPStatusError(code, reason)
+    if not re.search(rb"(^|\n)m=", body):
+        raise ProtocolError("DESCRIBE 响应中没有媒体描述")
+    return True
+
+
+async def probe_rtmp(url, dns, ssl_context=None):
+    """C0/C1 -> S0/S1 握手，成功返回True，失败抛异常"""
+    scheme, host, port, _, _, _ = split_stream_url(url)
+    reader, writer = await open_connection(dns, host, port, ssl_context if scheme == "rtmps" else None)
+    try:
+        # C1：4字节时间戳 + 4字节0 + 随机数
+        c1 = struct.pack(">II", int(time.time()) & 0xFFFFFFFF, 0) + os.urandom(RTMP_HANDSHAKE_SIZE - 8)
+        writer.write(bytes([RTMP_VERSION]) + c1)
+        s0 = await reader.readexactly(1)
+        if s0[0] != RTMP_VERSION:
+            raise ProtocolError(f"RTMP版本不符: {s0[0]}")
+        await reader.readexactly(RTMP_HANDSHAKE_SIZE)  # S1
+    finally:
+        writer.close()
+    return True
+
+
+async def probe_stream(url, dns, ssl_context=None):
+    if get_scheme(url) in ("rtsp", "rtsps"):
+        return await probe_rtsp(url, dns, ssl_context)
+    return await probe_rtmp(url, dns, ssl_context)
+
+
+async def run_ffprobe(url, timeout, executable="ffprobe"):
+    """ffprobe 检测流是否可播放，超时或被取消时结束进程；ffprobe 无法启动时抛 OSError"""
+    process = await asyncio.create_subprocess_exec(
+        executable, url, stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+    try:
+        return await asyncio.wait_for(process.wait(), timeout) == 0
+    except asyncio.TimeoutError:
+        print(f"Timeout checking {url}")
+        return False
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+
+def is_udpxy_url(url):
+    """http://代理/udp/组播地址:端口 或 /rtp/ 形式的 udpxy 地址"""
+    return UDPXY_PATH_RE.match(urlparse(url).path) is not None
+
+
+def udpxy_url(url, proxy=UDPXY_PROXY):
+    """rtp://组播地址:端口 经 udpxy 代理后的http地址；没有配置代理或不是组播地址返回None"""
+    parsed = urlparse(url)
+    if not proxy or not parsed.hostname or not parsed.port:
+        return None
+    try:
+        if not ipaddress.ip_address(parsed.hostname).is_multicast:
+            return None
+    except ValueError:
+        return None
+    return f"{proxy}/{'udp' if parsed.scheme == 'udp' else 'rtp'}/{parsed.hostname}:{parsed.port}"
+
+
+async def probe_rtp(url, dns, timeout):
+    """rtp/udp 检测，收到数据返回True；超时、端口不可达、解析失败返回False（与原检测相同不抛异常）"""
+    parsed = urlparse(url)
+    loop = asyncio.get_running_loop()
+    try:
+        host, port = parsed.hostname, parsed.port
+        ipv4 = [ip for ip in await dns.resolve_async(host) if ":" not in ip]  # 只用IPv4
+        if not ipv4 or not port:
+            return False
+        ip = ipv4[0]
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.setblocking(False)
+            if ipaddress.ip_address(ip).is_multicast:
+                # 组播：加入组，等组内的数据
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                s.bind((ip, port))
+                s.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, socket.inet_aton(ip) + socket.inet_aton("0.0.0.0"))
+            else:
+                # 单播：发一个空包，端口不可达时 recv 会立刻报错
+                s.connect((ip, port))
+                s.send(b"")
+            await asyncio.wait_for(loop.sock_recv(s, 1), timeout)
+        return True
+    except (OSError, ValueError, asyncio.TimeoutError):
+        return False
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+频道名清理的微基准：live.txt 中的全部频道名，逐条replace 与 编译版（一次扫描）各跑若干轮
+用法: python bench/bench_channel_name_cleaner.py [轮数]
+"""
+
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import main  # noqa: E402
+
+
+def main_bench(rounds=20):
+    with open(os.path.join(ROOT, "live.txt"), encoding="utf-8") as file:
+        names = [line.split(",", 1)[0] for line in file if "," in line and "#genre#" not in line]
+    # 同时混入未清理的写法，接近上游源中的频道名
+    names += [f"{name}高清" for name in names[::4]] + [f"CCTV-{i} [HD]" for i in range(1, 18)] * 50
+    removal_list, rewrite_list = main.removal_list, main.rewrite_list
+    clean = main.compile_channel_name_cleaner(removal_list, rewrite_list)
+    assert all(clean(name) == main.clean_channel_name_sequential(name, removal_list, rewrite_list) for name in names)
+
+    def sequential():
+        for name in names:
+            main.clean_channel_name_sequential(name, removal_list, rewrite_list)
+
+    def compiled():
+        for name in names:
+            clean(name)
+
+    print(f"频道名 {len(names)} 个, {rounds} 轮")
+    results = {}
+    for label, func in (("逐条replace", sequential), ("编译版", compiled)):
+        seconds = min(timeit.repeat(func, number=rounds, repeat=3)) / rounds
+        results[label] = seconds
+        print(f"{label}: {seconds * 1000:.1f} ms/轮, {seconds / len(names) * 1e9:.0f} ns/个")
+    print(f"加速: {results['逐条replace'] / results['编译版']:.2f}x")
+
+
+if __name__ == "__main__":
+    main_bench(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
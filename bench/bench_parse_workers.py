@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多进程解析（--parse-workers）的扩展性基准：合成的100万行源，进程数从1到N，
+分别计时 解析（含标准化、分类、子进程算指纹）与 分发（去重、等价合并、入桶），并核对各进程数的结果完全相同
+用法: python bench/bench_parse_workers.py [--lines 1000000] [--workers 1,2,4,8]
+注意：只有机器上真有这么多空闲核心，多进程的数字才有意义（结果中会打印可用核心数）
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # 字典等资源按相对路径读取
+
+import main  # noqa: E402
+
+
+def synthetic_lines(count, seed=7):
+    """接近聚合源的合成内容：字典中的频道名及其变体、带签名参数的url、# 连接的多个url、$ 后缀、分组行"""
+    rng = random.Random(seed)
+    names = [name for names in main.get_category_dictionaries().values() for name in names if name and "#" not in name][:3000]
+    names += ["鳳凰衛視中文台", "CCTV-1 高清", "CCTV1综合HD", "翡翠台[1080p]"] + [f"未知频道{i}" for i in range(997)]
+    lines = []
+    for i in range(count):
+        url = f"http://h{i % 4000}.example.com/live/{i % 250000}/index.m3u8?token={i}"
+        if i % 50 == 0:
+            url += f"#http://m{i % 31}.cdn/live/{i}.m3u8"
+        if i % 40 == 0:
+            url += "$线路1"
+        lines.append(f"{rng.choice(names)},{url}")
+        if i % 5000 == 0:
+            lines.append(f"分组{i},#genre#")
+    return lines
+
+
+def run(lines, workers, pool):
+    main.normalize_channel_name.cache_clear()
+    equivalence = main.EquivalenceIndex()
+    t = time.perf_counter()
+    cpu = time.process_time()
+    with main.gc_paused():  # 与 main() 相同，解析阶段暂停垃圾回收
+        records, fingerprints = main.parse_source_lines(iter(lines), "bench", pool, workers)
+    parse_seconds, parse_cpu = time.perf_counter() - t, time.process_time() - cpu
+    router = main.ChannelRouter(set(), equivalence)
+    equivalence.precomputed = fingerprints
+    t = time.perf_counter()
+    with main.gc_paused():
+        for channel in records:
+            router.dispatch(channel)
+    route_seconds = time.perf_counter() - t
+    buckets = {key: [channel.url for channel in bucket.lines] for key, bucket in router.category_buckets.items()}
+    return parse_seconds, parse_cpu, route_seconds, len(records), buckets
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--workers", default=",".join(str(w) for w in (1, 2, 4, 8) if w <= max(2, os.cpu_count() or 1)))
+    args = parser.parse_args()
+    worker_counts = [int(w) for w in args.workers.split(",")]
+    main.PARSE_PARALLEL_MIN_LINES = 1  # 合成源一定走多进程
+    # 与 main.load_assets() 相同，但不需要黑名单（分发时传入空黑名单）
+    for load in (main.get_category_dictionaries, main.get_channel_category_index, main.get_corrections_name,
+                 main.get_channel_name_cleaner, main.get_converter):
+        load()
+
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    lines = synthetic_lines(args.lines)
+    print(f"可用核心: {cores}, 行数: {len(lines)}")
+    print("进程数  解析(墙钟)  主进程CPU  分发    合计    加速比  结果一致")
+    baseline = None
+    reference = None
+    for workers in worker_counts:
+        pool = None
+        if workers > 1:
+            # 与 main() 相同：先fork出子进程再开始计时，子进程继承已加载的字典
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=main.init_parse_worker,
+                                       initargs=(main.EquivalenceIndex(),))
+            pool.submit(main.get_channel_category_index).result()
+        try:
+            parse_seconds, parse_cpu, route_seconds, count, buckets = run(lines, workers, pool)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        total = parse_seconds + route_seconds
+        baseline = baseline or total
+        reference = reference or buckets
+        print(f"{workers:>6}  {parse_seconds:>9.2f}s  {parse_cpu:>8.2f}s  {route_seconds:>5.2f}s  {total:>5.2f}s  "
+              f"{baseline / total:>5.2f}x  {buckets == reference}")
+        if workers > cores:
+            print(f"        （进程数超过可用核心 {cores}，此行不反映多核扩展性）")
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+直播源检测的吞吐基准：本地一组HTTP服务器（单独进程）模拟上游，
+原来的 30 线程 urllib 检测 与 asyncio 检测器（StreamChecker）检测同一批url，比较每秒检测数与结果，
+并打印服务器端看到的同时在途请求数峰值（全局与单个host），用来核对 CHECK_MAX_CONCURRENCY / CHECK_PER_HOST
+url构成与真实源接近：60% 正常、20% 1.5秒后才响应、15% 返回404、5% 不响应（等到超时）
+用法: python bench/bench_stream_checker.py [--urls 2000] [--servers 20] [--timeout 6] [--per-host 32] [--max-concurrency 2048]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "assets", "whitelist-blacklist"))
+sys.path.insert(0, ROOT)
+
+from stream_checker import StreamChecker  # noqa: E402
+
+SLOW_SECONDS = 1.5
+
+
+def run_fleet(count, conn):
+    # 模拟上游的服务器进程：/ok/ /slow/ /missing/ /hang/ 四种路径；/_peak 返回在途请求数峰值，/_reset 清零
+    async def serve():
+        state = {"active": 0, "peak": 0, "hosts": {}}
+
+        async def handle(reader, writer):
+            port = writer.get_extra_info("sockname")[1]
+            try:
+                while True:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                    path = head.split(b" ", 2)[1].decode()
+                    if path.startswith("/_"):
+                        if path == "/_reset":
+                            state["peak"] = 0
+                            for host in state["hosts"].values():
+                                host[1] = host[0]
+                        peaks = {"global": state["peak"], "host": max((host[1] for host in state["hosts"].values()), default=0)}
+                        body = json.dumps(peaks).encode()
+                        writer.write(b"HTTP/1.1 200 OK\r\nConnection: close\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body))
+                        break
+                    host = state["hosts"].setdefault(port, [0, 0])
+                    state["active"] += 1
+                    host[0] += 1
+                    state["peak"] = max(state["peak"], state["active"])
+                    host[1] = max(host[1], host[0])
+                    try:
+                        if path.startswith("/hang/"):
+                            await reader.read()  # 不响应，直到客户端超时断开
+                            break
+                        if path.startswith("/slow/"):
+                            await asyncio.sleep(SLOW_SECONDS)
+                        if path.startswith(("/ok/", "/slow/")):
+                            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: video/mp2t\r\nContent-Length: 4096\r\n\r\n" + b"x" * 4096)
+                        else:
+                            writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 2\r\n\r\nnf")
+                        await writer.drain()
+                    finally:
+                        state["active"] -= 1
+                        host[0] -= 1
+            except (asyncio.IncompleteReadError, ConnectionError, asyncio.LimitOverrunError):
+                pass
+            finally:
+                writer.close()
+
+        servers = [await asyncio.start_server(handle, "127.0.0.1", 0, backlog=4096) for _ in range(count)]
+        conn.send([server.sockets[0].getsockname()[1] for server in servers])
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def make_urls(ports, count, seed=1):
+    rng = random.Random(seed)
+    urls = []
+    for i in range(count):
+        r = rng.random()
+        kind = "ok" if r < 0.6 else "slow" if r < 0.8 else "missing" if r < 0.95 else "hang"
+        urls.append(f"http://127.0.0.1:{rng.choice(ports)}/{kind}/{i}")
+    return urls
+
+
+def fleet_peaks(port, reset=False):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/{'_reset' if reset else '_peak'}", timeout=5) as response:
+        return json.load(response)
+
+
+def thread_pool_check(url, timeout):
+    # 改为asyncio之前的 check_url（http部分）：urllib 请求，状态码200为成功
+    start_time = time.time()
+    try:
+        req = urllib.request.Request(urllib.parse.quote(url, safe=':/?&='), headers={'User-Agent': 'PostmanRuntime-ApipostRuntime/1.1.0'})
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            success = response.status == 200
+        return (time.time() - start_time) * 1000, success
+    except Exception:
+        return None, False
+
+
+def run_thread_pool(urls, timeout, workers=30):
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda url: thread_pool_check(url, timeout), urls))
+
+
+def run_checker(urls, timeout, max_concurrency, per_host):
+    checker = StreamChecker(max_concurrency=max_concurrency, per_host=per_host, timeout=timeout)
+
+    async def check_all():
+        try:
+            return await asyncio.gather(*(checker.check(url) for url in urls))
+        finally:
+            checker.close_connections()
+
+    try:
+        return asyncio.run(check_all()), checker
+    finally:
+        checker.close()
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--urls", type=int, default=2000)
+    parser.add_argument("--servers", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=6)
+    parser.add_argument("--per-host", type=int, default=32)
+    parser.add_argument("--max-concurrency", type=int, default=2048)
+    parser.add_argument("--skip-threads", action="store_true", help="只测asyncio检测器")
+    args = parser.parse_args()
+
+    parent, child = multiprocessing.Pipe()
+    fleet = multiprocessing.Process(target=run_fleet, args=(args.servers, child), daemon=True)
+    fleet.start()
+    try:
+        ports = parent.recv()
+        urls = make_urls(ports, args.urls)
+        print(f"url数: {len(urls)}, 服务器数: {len(ports)}, 超时: {args.timeout:g}秒")
+        print("检测方式              耗时       每秒检测数  成功  全局在途峰值  单host在途峰值")
+        results = {}
+        runs = [] if args.skip_threads else [("线程池 x30 (urllib)", lambda: run_thread_pool(urls, args.timeout))]
+        checkers = []
+
+        def run_async():
+            result, checker = run_checker(urls, args.timeout, args.max_concurrency, args.per_host)
+            checkers.append(checker)
+            return result
+
+        runs.append((f"asyncio ({args.max_concurrency}/{args.per_host})", run_async))
+        for name, run in runs:
+            fleet_peaks(ports[0], reset=True)
+            start = time.perf_counter()
+            results[name] = run()
+            seconds = time.perf_counter() - start
+            peaks = fleet_peaks(ports[0])
+            print(f"{name:<20}  {seconds:>7.2f}s  {len(urls) / seconds:>10.1f}  {sum(ok for _, ok in results[name]):>4}  "
+                  f"{peaks['global']:>12}  {peaks['host']:>14}")
+        print(f"asyncio 熔断: {checkers[0].stats}, 连接复用: {checkers[0].pool.stats}")
+        if peaks["host"] > args.per_host or peaks["global"] > args.max_concurrency:
+            print(f"!! 在途请求数超过并发上限（全局 {args.max_concurrency}，单host {args.per_host}）")
+        if len(results) == 2:
+            threads, checker = ([ok for _, ok in result] for result in results.values())
+            print(f"两种检测结果一致: {threads == checker}（熔断跳过的url会使结果不同）")
+    finally:
+        fleet.terminate()
+
+
+if __name__ == "__main__":
+    main_bench()
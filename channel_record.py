@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+直播源记录（各脚本共用）
+  - 读入时解析一次 "频道名,url"，之后各环节直接使用字段，不再反复 split
+  - 输出时再序列化为 "频道名,url"
+"""
+
+
+class Channel:
+    __slots__ = ("name", "url", "category", "source", "latency")
+
+    def __init__(self, name, url, category=None, source=None, latency=None):
+        self.name = name
+        self.url = url
+        self.category = category  # 分类
+        self.source = source  # 来源（上游url或名称）
+        self.latency = latency  # 响应时间(ms)
+
+    @classmethod
+    def from_line(cls, line, **fields):
+        """解析 "频道名,url"，不是直播源返回None"""
+        line = line.strip()
+        if "," not in line or "://" not in line:
+            return None
+        name, url = line.split(",", 1)
+        return cls(name, url.strip(), **fields)
+
+    def to_line(self):
+        return f"{self.name},{self.url}"
+
+    __str__ = to_line
+
+    def __repr__(self):
+        return f"Channel({self.name!r}, {self.url!r}, category={self.category!r}, source={self.source!r}, latency={self.latency!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Channel):
+            return NotImplemented
+        return self.name == other.name and self.url == other.url
+
+    def __hash__(self):
+        return hash((self.name, self.url))
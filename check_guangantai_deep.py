@@ -16,6 +16,7 @@ import os
 import time
 import requests
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from channel_record import Channel
 
 LIVE_FILE = "live.txt"
 TARGET_GROUPS = ["港澳台,#genre#", "台湾台,#genre#"]
@@ -93,7 +94,7 @@ def process_group(group_name, items):
             name, url = line.split(",", 1)
             url = url.strip()
             if url.startswith(("http://", "https://")):  # 支持 http 和 https
-                entries.append((name.strip(), url, line))  # 保留原行格式
+                entries.append(Channel(name.strip(), url, category=group_name))
             else:
                 print(f"⚠️ 忽略不合法 URL: {line}")
 
@@ -103,18 +104,18 @@ def process_group(group_name, items):
 
     seen_urls = set()
     unique_entries = []
-    for name, url, original_line in entries:
-        if url not in seen_urls:
-            seen_urls.add(url)
-            unique_entries.append((name, url, original_line))
+    for channel in entries:
+        if channel.url not in seen_urls:
+            seen_urls.add(channel.url)
+            unique_entries.append(channel)
         else:
-            print(f"🗑️ 去重（保留先出现的）：{name} ({url})")
+            print(f"🗑️ 去重（保留先出现的）：{channel.name} ({channel.url})")
 
     print(f"\n🚀 {group_name.replace(',#genre#','')} 去重后 {len(unique_entries)} 条直播源，开始深度测速...\n")
 
     results = []
     with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = [executor.submit(deep_test, name, url) for name, url, _ in unique_entries]
+        futures = [executor.submit(deep_test, channel.name, channel.url) for channel in unique_entries]
         for fut in as_completed(futures):
             res = fut.result()
             results.append(res)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进程内 DNS 缓存（下载直播源、检测直播源共用）
+  - 同一 host 只解析一次，结果缓存 DNS_CACHE_TTL 秒
+  - 解析失败（NXDOMAIN、超时等）缓存 DNS_NEGATIVE_TTL 秒，之后对该 host 的请求直接失败，不再等超时
+  - 同一 host 同时只有一个解析在进行，其他请求等待同一结果
+  - resolver 可替换（默认 socket.getaddrinfo），方便测试时使用本地解析
+"""
+
+import asyncio
+import ipaddress
+import os
+import socket
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+
+DNS_CACHE_TTL = float(os.getenv("DNS_CACHE_TTL", "300"))  # 秒
+DNS_NEGATIVE_TTL = float(os.getenv("DNS_NEGATIVE_TTL", "60"))  # 秒
+DNS_TIMEOUT = float(os.getenv("DNS_TIMEOUT", "5"))  # 秒
+DNS_WORKERS = int(os.getenv("DNS_WORKERS", "32"))  # 同时解析数
+
+
+def system_resolver(host):
+    """默认解析：返回去重后的IP列表，保持 getaddrinfo 的顺序"""
+    infos = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+    return list(dict.fromkeys(info[4][0] for info in infos))
+
+
+def is_ip_address(host):
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+class DnsCache:
+    def __init__(self, resolver=system_resolver, ttl=DNS_CACHE_TTL, negative_ttl=DNS_NEGATIVE_TTL,
+                 timeout=DNS_TIMEOUT, workers=DNS_WORKERS):
+        self.resolver = resolver  # host -> [ip, ...]，失败抛异常
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.stats = {"hit": 0, "miss": 0, "negative_hit": 0, "error": 0}
+        self._entries = {}  # host -> (过期时间, ip列表, 异常)
+        self._pending = {}  # host -> 正在进行的解析
+        self._lock = threading.Lock()
+
+    def _cached(self, host):
+        """命中缓存返回 (ip列表, 异常)，未命中返回None；调用时需持有锁"""
+        entry = self._entries.get(host)
+        if entry is None:
+            return None
+        expires_at, addresses, error = entry
+        if expires_at < time.monotonic():
+            del self._entries[host]
+            return None
+        self.stats["negative_hit" if error else "hit"] += 1
+        return addresses, error
+
+    def _resolve_and_store(self, host):
+        """解析并写入缓存，返回 (ip列表, 异常)；失败不抛出，prefetch 提交的解析可能没有人等待结果"""
+        try:
+            addresses = self.resolver(host)
+            if not addresses:
+                raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+            entry = (time.monotonic() + self.ttl, addresses, None)
+        except Exception as e:
+            entry = (time.monotonic() + self.negative_ttl, None, e)
+        with self._lock:
+            if entry[2] is not None:
+                self.stats["error"] += 1
+            self._entries[host] = entry
+            self._pending.pop(host, None)
+        return entry[1], entry[2]
+
+    def _lookup(self, host):
+        """返回 (ip列表, 异常, 正在进行的解析)，三者只有一个有效"""
+        with self._lock:
+            cached = self._cached(host)
+            if cached is not None:
+                return cached[0], cached[1], None
+            future = self._pending.get(host)
+            if future is None:
+                self.stats["miss"] += 1
+                future = self._pending[host] = self.executor.submit(self._resolve_and_store, host)
+            return None, None, future
+
+    def _timed_out(self, host):
+        # 解析超时也按失败缓存，后续请求直接失败；解析线程稍后完成时会覆盖这条记录
+        error = socket.timeout(f"DNS解析超时: {host}")
+        with self._lock:
+            if host in self._pending:
+                self._entries[host] = (time.monotonic() + self.negative_ttl, None, error)
+                self.stats["error"] += 1
+        return error
+
+    def resolve(self, host):
+        """解析host，返回IP列表，失败抛异常（阻塞版，线程中使用）"""
+        if is_ip_address(host):
+            return [host]
+        addresses, error, future = self._lookup(host)
+        if future is not None:
+            try:
+                addresses, error = future.result(timeout=self.timeout)
+            except FuturesTimeoutError:
+                raise self._timed_out(host)
+        if error is not None:
+            raise error
+        return addresses
+
+    async def resolve_async(self, host):
+        """解析host，返回IP列表，失败抛异常（asyncio版）"""
+        if is_ip_address(host):
+            return [host]
+        addresses, error, future = self._lookup(host)
+        if future is not None:
+            try:
+                # shield：一个等待者超时取消不影响其他等待同一解析的请求
+                addresses, error = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.timeout)
+            except asyncio.TimeoutError:
+                raise self._timed_out(host)
+        if error is not None:
+            raise error
+        return addresses
+
+    def prefetch(self, hosts):
+        """检测开始前把全部host的解析并发提交（不等待结果），检测时各自等待自己host的结果"""
+        hosts = [host for host in dict.fromkeys(hosts) if host and not is_ip_address(host)]
+        for host in hosts:
+            self._lookup(host)
+        return len(hosts)
+
+    def create_connection(self, address, timeout=None, source_address=None):
+        """与 socket.create_connection 相同，但用缓存解析host，逐个IP尝试连接"""
+        host, port = address
+        last_error = None
+        for ip in self.resolve(host):
+            try:
+                return socket.create_connection((ip, port), timeout, source_address)
+            except OSError as e:
+                last_error = e
+        raise last_error
+
+
+_default_dns_cache = None
+_default_dns_cache_lock = threading.Lock()
+
+
+def default_dns_cache():
+    global _default_dns_cache
+    with _default_dns_cache_lock:
+        if _default_dns_cache is None:
+            _default_dns_cache = DnsCache()
+    return _default_dns_cache
+
+
+def set_default_resolver(resolver):
+    """替换默认缓存的解析函数（同时清空缓存），测试时用本地解析"""
+    global _default_dns_cache
+    with _default_dns_cache_lock:
+        _default_dns_cache = DnsCache(resolver=resolver)
+    return _default_dns_cache
+
+
+# urllib 使用缓存解析：连接时用缓存的IP，https 的证书校验和SNI仍使用原host
+def _cached_connection(connection_class):
+    def factory(host, **kwargs):
+        connection = connection_class(host, **kwargs)
+        connection._create_connection = lambda address, timeout=None, source_address=None: \
+            default_dns_cache().create_connection(address, timeout, source_address)
+        return connection
+    return factory
+
+
+class CachedDnsHTTPHandler(urllib.request.HTTPHandler):
+    def do_open(self, http_class, req, **http_conn_args):
+        return super().do_open(_cached_connection(http_class), req, **http_conn_args)
+
+
+class CachedDnsHTTPSHandler(urllib.request.HTTPSHandler):
+    def do_open(self, http_class, req, **http_conn_args):
+        return super().do_open(_cached_connection(http_class), req, **http_conn_args)
+
+
+def build_opener(*handlers):
+    return urllib.request.build_opener(CachedDnsHTTPHandler, CachedDnsHTTPSHandler, *handlers)
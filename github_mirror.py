@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GitHub raw 内容的镜像竞速下载（各脚本共用）
+  - 不管url用的是哪个镜像前缀（gh-proxy.com、ghfast.top、raw.bgithub.xyz 等）或直连 raw.githubusercontent.com，
+    都识别出其中的 GitHub raw 路径（用户/仓库/分支/文件）
+  - 按各镜像的历史耗时排序，先请求最快的镜像；MIRROR_HEDGE_DELAY 秒内没有收到数据（或请求失败）就加请求下一个镜像，
+    第一个收到响应体数据的镜像胜出，其余请求关闭；胜出的响应体仍是边下载边读取（不在内存中保存整个响应体）
+  - 各镜像到达第一块数据的耗时（指数平均）保存在 .cache/github_mirrors.json，下次运行按它排序
+  - 所有镜像共用一个以 raw.githubusercontent.com 地址为键的HTTP缓存条目，任一镜像返回304都可以用缓存
+  - 不是 GitHub raw 的url照常下载
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from http_cache import default_cache, open_stream
+
+RAW_HOST = "raw.githubusercontent.com"
+# 镜像前缀，前缀 + raw路径 即为镜像url；可用环境变量 GITHUB_MIRRORS 替换（逗号分隔）
+GITHUB_MIRRORS = [prefix.strip() for prefix in os.getenv("GITHUB_MIRRORS", ",".join([
+    f"https://{RAW_HOST}/",
+    f"https://gh-proxy.com/https://{RAW_HOST}/",
+    f"https://hk.gh-proxy.com/https://{RAW_HOST}/",
+    f"https://ghfast.top/https://{RAW_HOST}/",
+    "https://raw.bgithub.xyz/",
+])).split(",") if prefix.strip()]
+# 路径与 raw.githubusercontent.com 相同、直接替换host的镜像
+RAW_HOST_ALIASES = {"raw.bgithub.xyz"} | {host.strip() for host in os.getenv("GITHUB_RAW_ALIASES", "").split(",") if host.strip()}
+MIRROR_RACE = os.getenv("MIRROR_RACE", "1") == "1"  # 为0时只用url原来的镜像
+MIRROR_HEDGE_DELAY = float(os.getenv("MIRROR_HEDGE_DELAY", "1.5"))  # 秒，前面的镜像这么久没收到数据就加请求下一个
+MIRROR_STATS_PATH = os.getenv("MIRROR_STATS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "github_mirrors.json"))
+MIRROR_LATENCY_ALPHA = 0.3  # 耗时指数平均的权重
+
+
+def split_raw_url(url):
+    """返回 (镜像前缀, raw路径)，不是 GitHub raw 的url返回None
+    如 https://ghfast.top/https://raw.githubusercontent.com/用户/仓库/main/a.txt
+       -> ("https://ghfast.top/https://raw.githubusercontent.com/", "用户/仓库/main/a.txt")"""
+    marker = f"{RAW_HOST}/"
+    index = url.find(marker)
+    if index != -1:
+        prefix, path = url[:index + len(marker)], url[index + len(marker):]
+    else:
+        scheme, sep, rest = url.partition("://")
+        host, slash, path = rest.partition("/")
+        if not sep or not slash or host.lower() not in RAW_HOST_ALIASES:
+            return None
+        prefix = f"{scheme}://{host}/"
+    # 至少要有 用户/仓库/分支/文件
+    if path.count("/") < 3 or "://" in path:
+        return None
+    return prefix, path
+
+
+class MirrorStats:
+    """各镜像的耗时（指数平均）与成功/失败/取消次数（JSON文件）"""
+
+    def __init__(self, path=MIRROR_STATS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._changed = False
+        try:
+            with open(path, encoding="utf-8") as file:
+                self._mirrors = json.load(file)
+        except (OSError, ValueError):
+            self._mirrors = {}
+
+    def record(self, prefix, seconds, outcome):
+        """outcome: ok / fail / cancel；失败按超时时间计，取消按已用时间计（至少这么慢）"""
+        with self._lock:
+            entry = self._mirrors.setdefault(prefix, {"latency": seconds, "ok": 0, "fail": 0, "cancel": 0})
+            entry["latency"] = round(entry["latency"] + MIRROR_LATENCY_ALPHA * (seconds - entry["latency"]), 3)
+            entry[outcome] += 1
+            self._changed = True
+
+    def order(self, prefixes):
+        """按耗时从小到大排序；没有记录的镜像排在最前（先试一次），同耗时保持原顺序"""
+        with self._lock:
+            return sorted(prefixes, key=lambda prefix: self._mirrors.get(prefix, {}).get("latency", 0.0))
+
+    def summary(self):
+        with self._lock:
+            return {prefix: entry["latency"] for prefix, entry in self._mirrors.items()}
+
+    def save(self):
+        with self._lock:
+            if not self._changed:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(self._mirrors, file, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            self._changed = False
+
+
+_default_stats = None
+_default_stats_lock = threading.Lock()
+
+
+def default_mirror_stats():
+    global _default_stats
+    with _default_stats_lock:
+        if _default_stats is None:
+            _default_stats = MirrorStats()
+    return _default_stats
+
+
+class _Race:
+    """一次竞速的状态：第一个收到数据的镜像胜出，之后到达的响应直接关闭"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.winner = None
+        self.results = queue.Queue()
+
+    def claim(self, prefix):
+        with self.lock:
+            if self.winner is None:
+                self.winner = prefix
+            return self.winner == prefix
+
+
+def _download(race, cache, prefix, url, cache_key, headers, timeout, stats):
+    # 竞速中的一个请求（在单独的线程中执行）：收到响应体的第一块即算到达，
+    # 胜出的响应体交给调用方继续逐块读取（边读边写入缓存），落后的关闭并删除写了一半的缓存文件
+    start = time.monotonic()
+    try:
+        body = cache.open(url, headers=headers, timeout=timeout, cache_key=cache_key)
+        try:
+            body.peek()
+        except BaseException:
+            body.close()
+            raise
+    except Exception as e:
+        stats.record(prefix, timeout, "fail")
+        race.results.put((prefix, None, e))
+        return
+    if not race.claim(prefix):
+        body.close()
+        stats.record(prefix, time.monotonic() - start, "cancel")
+        return
+    stats.record(prefix, time.monotonic() - start, "ok")
+    race.results.put((prefix, body, None))
+
+
+def race_open(prefixes, path, headers=None, timeout=10, hedge_delay=MIRROR_HEDGE_DELAY, stats=None, cache=None):
+    """按顺序对各镜像发出对冲请求，返回 (镜像前缀, CachedBody)，响应体已收到第一块、其余部分边读边下载；
+    全部失败时抛出最先出现的错误"""
+    stats = stats or default_mirror_stats()
+    cache = cache or default_cache()
+    cache_key = f"https://{RAW_HOST}/{path}"
+    pending = deque(prefixes)
+    race = _Race()
+    running = 0
+    errors = []
+
+    def start_next():
+        nonlocal running
+        prefix = pending.popleft()
+        threading.Thread(target=_download, args=(race, cache, prefix, prefix + path, cache_key, headers, timeout, stats),
+                         daemon=True).start()
+        running += 1
+
+    start_next()
+    while True:
+        try:
+            prefix, body, error = race.results.get(timeout=hedge_delay if pending else None)
+        except queue.Empty:
+            start_next()  # 前面的镜像太慢，加请求下一个
+            continue
+        running -= 1
+        if error is None:
+            return prefix, body  # 其余请求收到数据后自行关闭
+        errors.append(error)
+        if pending:
+            start_next()  # 失败了马上换下一个镜像
+        elif not running:
+            raise errors[0]
+
+
+def open_source(url, headers=None, timeout=10):
+    """打开上游源，返回 CachedBody；GitHub raw 的url在各镜像间竞速，其余url与 http_cache.open_stream 相同"""
+    parts = split_raw_url(url) if MIRROR_RACE else None
+    if parts is None:
+        return open_stream(url, headers=headers, timeout=timeout)
+    prefix, path = parts
+    # url原来的镜像不在配置中时也参与竞速
+    prefixes = GITHUB_MIRRORS if prefix in GITHUB_MIRRORS else GITHUB_MIRRORS + [prefix]
+    return race_open(default_mirror_stats().order(prefixes), path, headers, timeout)[1]
+
+
+def fetch_source(url, headers=None, timeout=10):
+    """下载上游源内容（bytes）"""
+    with open_source(url, headers=headers, timeout=timeout) as body:
+        return body.read()
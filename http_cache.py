@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+直播源下载的磁盘 HTTP 缓存（main.py 与 assets/whitelist-blacklist/main.py 共用）
+  - 保存响应内容及 ETag / Last-Modified
+  - 再次下载时发送条件请求，服务器返回 304 时直接使用缓存内容
+  - 缓存总大小超过上限时，按最久未使用淘汰
+  - 连接时使用 dns_cache 的进程内DNS缓存
+  - 响应体可逐块读取（open）：边读边写入缓存文件并计算sha256，不在内存中保存整个响应体
+  - 可指定缓存键（cache_key）：同一内容的多个镜像url共用一个缓存条目
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from dns_cache import build_opener
+
+CACHE_DIR = os.getenv("HTTP_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "http"))
+CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+STREAM_CHUNK_BYTES = int(os.getenv("HTTP_STREAM_CHUNK_BYTES", str(64 * 1024)))
+STALE_TMP_SECONDS = 3600  # 超过这么久的临时文件是没读完就退出的下载，淘汰时删除
+
+
+class CachedBody:
+    """HttpCache.open 返回的响应体，逐块迭代（只能迭代一次）
+    content_hash 为响应体的sha256：缓存命中且缓存中已有时一开始就知道，否则读完后才有
+    peek() 先读出第一块（迭代时仍从第一块开始），用于判断哪个响应先到"""
+
+    def __init__(self, cache, url, source, meta=None, headers=None):
+        self.cache = cache
+        self.url = url
+        self.from_cache = meta is not None
+        self.content_hash = meta.get("sha256") if meta else None
+        self._source = source
+        self._meta = meta
+        self._headers = headers
+        self._reader = None  # peek() 后尚未迭代的读取器
+        self._peeked = None
+
+    @property
+    def has_validator(self):
+        """响应带有 ETag / Last-Modified（304命中的缓存也算）：内容没变时服务器会返回304"""
+        if self.from_cache:
+            return True
+        return bool(self._headers and (self._headers.get("ETag") or self._headers.get("Last-Modified")))
+
+    def peek(self):
+        """读出第一块并返回（响应体为空时返回 b""）"""
+        if self._reader is None:
+            self._reader = self._read_chunks()
+            self._peeked = next(self._reader, b"")
+        return self._peeked
+
+    def __iter__(self):
+        reader, self._reader = self._reader, None
+        if reader is None:
+            yield from self._read_chunks()
+            return
+        if self._peeked:
+            yield self._peeked
+        yield from reader
+
+    def _read_chunks(self):
+        hasher = hashlib.sha256()
+        size = 0
+        writer = self.cache._open_writer(self.url, self._headers) if not self.from_cache else None
+        # read1 有多少读多少，不等凑满一块，收到数据就能交给调用方（也便于中途放弃）
+        read = getattr(self._source, "read1", self._source.read)
+        try:
+            while True:
+                chunk = read(STREAM_CHUNK_BYTES)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                size += len(chunk)
+                if writer is not None:
+                    writer.write(chunk)
+                yield chunk
+        except BaseException:
+            if writer is not None:
+                writer.close()
+                os.remove(writer.name)  # 没读完不缓存
+            raise
+        finally:
+            # 只关闭来源；不能调用 self.close()，peek() 时读取器就是本生成器，生成器内不能关闭自己
+            self._source.close()
+        self.content_hash = hasher.hexdigest()
+        if writer is not None:
+            writer.close()
+            self.cache._commit(self.url, writer.name, self._headers, size, self.content_hash)
+        elif self.from_cache and "sha256" not in self._meta:
+            self.cache._save_meta(self.url, dict(self._meta, sha256=self.content_hash))  # 旧版本缓存补上hash
+
+    def read(self):
+        return b"".join(self)
+
+    def close(self):
+        reader, self._reader = self._reader, None
+        if reader is not None:
+            reader.close()  # peek() 后放弃读取：删除写了一半的缓存文件
+        self._source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HttpCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.stats = {"hit": 0, "miss": 0, "store": 0, "evict": 0}
+        self._lock = threading.Lock()
+        self._opener = build_opener()
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + ".body", base + ".json"
+
+    def _load(self, url):
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("url") == url and os.path.exists(body_path):
+                return meta
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def _write_atomic(self, path, data):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _save_meta(self, url, meta):
+        self._write_atomic(self._paths(url)[1], json.dumps(meta).encode("utf-8"))
+
+    def _open_writer(self, url, headers):
+        """响应可以缓存时，返回写入临时文件的文件对象，否则返回None"""
+        if not headers.get("ETag") and not headers.get("Last-Modified"):
+            return None  # 没有校验信息，无法做条件请求，不缓存
+        os.makedirs(self.cache_dir, exist_ok=True)
+        return open(f"{self._paths(url)[0]}.{os.getpid()}.{threading.get_ident()}.tmp", "wb")
+
+    def _commit(self, url, tmp_path, headers, size, content_hash):
+        body_path, _ = self._paths(url)
+        # 同一条目可能被几个线程同时写入（镜像竞速），加锁保证内容与校验信息来自同一个响应
+        with self._lock:
+            os.replace(tmp_path, body_path)
+            self._save_meta(url, {"url": url, "etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified"),
+                                  "size": size, "sha256": content_hash})
+            self.stats["store"] += 1
+        self.evict()
+
+    def open(self, url, headers=None, timeout=10, revalidate=True, cache_key=None):
+        """发出请求，返回 CachedBody（逐块读取响应体），服务器返回304时读取本地缓存
+        cache_key 为缓存条目的键，默认为url"""
+        key = cache_key or url
+        request_headers = dict(headers or {})
+        meta = self._load(key) if revalidate else None
+        if meta:
+            if meta.get("etag"):
+                request_headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                request_headers["If-Modified-Since"] = meta["last_modified"]
+        if not url.isascii():
+            url = urllib.parse.quote(url, safe=":/?#[]@!$&'()*+,;=%~")  # 路径中直接写了中文等字符
+        req = urllib.request.Request(url, headers=request_headers)
+        try:
+            response = self._opener.open(req, timeout=timeout)
+        except urllib.error.HTTPError as e:
+            if e.code != 304 or not meta:
+                raise
+            body_path, _ = self._paths(key)
+            try:
+                body = open(body_path, "rb")
+            except OSError:
+                # 缓存内容已被淘汰，不带条件重新下载
+                return self.open(url, headers, timeout, revalidate=False, cache_key=cache_key)
+            os.utime(body_path)  # 记录最近使用时间，淘汰时参考
+            with self._lock:
+                self.stats["hit"] += 1
+            return CachedBody(self, key, body, meta=meta)
+        with self._lock:
+            self.stats["miss"] += 1
+        return CachedBody(self, key, response, headers=response.headers)
+
+    def evict(self):
+        """缓存总大小超过上限时，删除最久未使用的条目"""
+        with self._lock:
+            try:
+                names = os.listdir(self.cache_dir)
+            except OSError:
+                return
+            entries = []
+            total = 0
+            now = time.time()
+            for name in names:
+                path = os.path.join(self.cache_dir, name)
+                if name.endswith(".tmp"):
+                    try:
+                        if now - os.stat(path).st_mtime > STALE_TMP_SECONDS:
+                            os.remove(path)
+                    except OSError:
+                        pass
+                    continue
+                if not name.endswith(".body"):
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                for stale in (path, path[:-len(".body")] + ".json"):
+                    try:
+                        os.remove(stale)
+                    except OSError:
+                        pass
+                total -= size
+                self.stats["evict"] += 1
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_cache():
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = HttpCache()
+    return _default_cache
+
+
+def open_stream(url, headers=None, timeout=10):
+    return default_cache().open(url, headers=headers, timeout=timeout)
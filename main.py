@@ -1,700 +1,820 @@
-import urllib.request
-from urllib.parse import urlparse
-import re #正则
-import os
-from datetime import datetime, timedelta, timezone
-import random
-import opencc #简繁转换
-
-# 执行开始时间
-timestart = datetime.now()
-
-#读取文本方法
-def read_txt_to_array(file_name):
-    try:
-        with open(file_name, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-            lines = [line.strip() for line in lines]
-            return lines
-    except FileNotFoundError:
-        print(f"File '{file_name}' not found.")
-        return []
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        return []
-
-#read BlackList 2024-06-17 15:02
-def read_blacklist_from_txt(file_path):
-    with open(file_path, 'r', encoding='utf-8') as file:
-        lines = file.readlines()
-
-    BlackList = [line.split(',')[1].strip() for line in lines if ',' in line]
-    return BlackList
-
-blacklist_auto=read_blacklist_from_txt('assets/whitelist-blacklist/blacklist_auto.txt') 
-blacklist_manual=read_blacklist_from_txt('assets/whitelist-blacklist/blacklist_manual.txt') 
-combined_blacklist = set(blacklist_auto + blacklist_manual)  #list是个列表，set是个集合，据说检索速度集合要快很多。2024-08-08
-
-# 定义多个对象用于存储不同内容的行文本
-# 主频道
-ys_lines = [] #央视频道
-ws_lines = [] #卫视频道
-ty_lines = [] #体育频道
-dy_lines = [] #电影频道
-dsj_lines = [] #电视剧频道
-gat_lines = [] #港澳台
-twt_lines = [] #台湾台
-gj_lines = [] #国际台
-jlp_lines = [] #记录片
-xq_lines = [] #戏曲
-js_lines = [] #解说
-newtv_lines = [] #NewTV
-ihot_lines = [] #iHot
-et_lines = [] #儿童
-zy_lines = [] #综艺频道
-mdd_lines = [] #埋堆堆
-yy_lines = [] #音乐频道
-game_lines = [] #游戏频道
-radio_lines = [] #收音机频道
-zb_lines = [] #直播中国
-cw_lines = [] #春晚
-mtv_lines = [] #MTV
-migu_lines = [] #咪咕直播
-
-# 地方台
-sh_lines = [] #地方台-上海频道
-zj_lines = [] #地方台-浙江频道
-jsu_lines = [] #地方台-江苏频道
-gd_lines = [] #地方台-广东频道
-hn_lines = [] #地方台-湖南频道
-ah_lines = [] #地方台-安徽频道
-hain_lines = [] #地方台-海南频道
-nm_lines = [] #地方台-内蒙频道
-hb_lines = [] #地方台-湖北频道
-ln_lines = [] #地方台-辽宁频道
-sx_lines = [] #地方台-陕西频道
-shanxi_lines = [] #地方台-山西频道
-shandong_lines = [] #地方台-山东频道
-yunnan_lines = [] #地方台-云南频道
-bj_lines = [] #地方台-北京频道
-cq_lines = [] #地方台-重庆频道
-fj_lines = [] #地方台-福建频道
-gs_lines = [] #地方台-甘肃频道
-gx_lines = [] #地方台-广西频道
-gz_lines = [] #地方台-贵州频道
-heb_lines = [] #地方台-河北频道
-hen_lines = [] #地方台-河南频道
-hlj_lines = [] #地方台-黑龙江频道
-jl_lines = [] #地方台-吉林频道
-jx_lines = [] #地方台-江西频道
-nx_lines = [] #地方台-宁夏频道
-qh_lines = [] #地方台-青海频道
-sc_lines = [] #地方台-四川频道
-tj_lines = [] #地方台-天津频道
-xj_lines = [] #地方台-新疆频道
-
-other_lines = [] #其他
-other_lines_url = [] # 为降低other文件大小，剔除重复url添加
-
-whitelist_lines=read_txt_to_array('assets/whitelist-blacklist/whitelist_manual.txt') #白名单
-whitelist_auto_lines=read_txt_to_array('assets/whitelist-blacklist/whitelist_auto.txt') #白名单
-
-#读取文本
-# 主频道
-ys_dictionary=read_txt_to_array('主频道/央视频道.txt')
-ws_dictionary=read_txt_to_array('主频道/卫视频道.txt') 
-ty_dictionary=read_txt_to_array('主频道/体育频道.txt') 
-dy_dictionary=read_txt_to_array('主频道/电影.txt') 
-dsj_dictionary=read_txt_to_array('主频道/电视剧.txt') 
-gat_dictionary=read_txt_to_array('主频道/港澳台.txt') 
-twt_dictionary=read_txt_to_array('主频道/台湾台.txt')
-gj_dictionary=read_txt_to_array('主频道/国际台.txt') 
-jlp_dictionary=read_txt_to_array('主频道/纪录片.txt') 
-xq_dictionary=read_txt_to_array('主频道/戏曲频道.txt') 
-js_dictionary=read_txt_to_array('主频道/解说频道.txt') 
-cw_dictionary=read_txt_to_array('主频道/春晚.txt') 
-newtv_dictionary=read_txt_to_array('主频道/NewTV.txt') 
-ihot_dictionary=read_txt_to_array('主频道/iHOT.txt')
-et_dictionary=read_txt_to_array('主频道/儿童频道.txt')
-zy_dictionary=read_txt_to_array('主频道/综艺频道.txt') 
-mdd_dictionary=read_txt_to_array('主频道/埋堆堆.txt') 
-yy_dictionary=read_txt_to_array('主频道/音乐频道.txt') 
-game_dictionary=read_txt_to_array('主频道/游戏频道.txt') 
-radio_dictionary=read_txt_to_array('主频道/收音机频道.txt') 
-zb_dictionary=read_txt_to_array('主频道/直播中国.txt') 
-mtv_dictionary=read_txt_to_array('主频道/MTV.txt') 
-migu_dictionary=read_txt_to_array('主频道/咪咕直播.txt') 
-
-# 地方台
-sh_dictionary=read_txt_to_array('地方台/上海频道.txt') 
-zj_dictionary=read_txt_to_array('地方台/浙江频道.txt') 
-jsu_dictionary=read_txt_to_array('地方台/江苏频道.txt') 
-gd_dictionary=read_txt_to_array('地方台/广东频道.txt') 
-hn_dictionary=read_txt_to_array('地方台/湖南频道.txt') 
-ah_dictionary=read_txt_to_array('地方台/安徽频道.txt') 
-hain_dictionary=read_txt_to_array('地方台/海南频道.txt') 
-nm_dictionary=read_txt_to_array('地方台/内蒙频道.txt') 
-hb_dictionary=read_txt_to_array('地方台/湖北频道.txt') 
-ln_dictionary=read_txt_to_array('地方台/辽宁频道.txt') 
-sx_dictionary=read_txt_to_array('地方台/陕西频道.txt') 
-shanxi_dictionary=read_txt_to_array('地方台/山西频道.txt') 
-shandong_dictionary=read_txt_to_array('地方台/山东频道.txt') 
-yunnan_dictionary=read_txt_to_array('地方台/云南频道.txt') 
-bj_dictionary=read_txt_to_array('地方台/北京频道.txt') 
-cq_dictionary=read_txt_to_array('地方台/重庆频道.txt') 
-fj_dictionary=read_txt_to_array('地方台/福建频道.txt') 
-gs_dictionary=read_txt_to_array('地方台/甘肃频道.txt') 
-gx_dictionary=read_txt_to_array('地方台/广西频道.txt') 
-gz_dictionary=read_txt_to_array('地方台/贵州频道.txt') 
-heb_dictionary=read_txt_to_array('地方台/河北频道.txt') 
-hen_dictionary=read_txt_to_array('地方台/河南频道.txt') 
-hlj_dictionary=read_txt_to_array('地方台/黑龙江频道.txt') 
-jl_dictionary=read_txt_to_array('地方台/吉林频道.txt') 
-jx_dictionary=read_txt_to_array('地方台/江西频道.txt') 
-nx_dictionary=read_txt_to_array('地方台/宁夏频道.txt') 
-qh_dictionary=read_txt_to_array('地方台/青海频道.txt') 
-sc_dictionary=read_txt_to_array('地方台/四川频道.txt') 
-tj_dictionary=read_txt_to_array('地方台/天津频道.txt') 
-xj_dictionary=read_txt_to_array('地方台/新疆频道.txt') 
-
-# 自定义源
-urls = read_txt_to_array('assets/urls.txt')
-
-#简繁转换
-def traditional_to_simplified(text: str) -> str:
-    # 初始化转换器，"t2s" 表示从繁体转为简体
-    converter = opencc.OpenCC('t2s')
-    simplified_text = converter.convert(text)
-    return simplified_text
-
-#M3U格式判断
-def is_m3u_content(text):
-    lines = text.splitlines()
-    first_line = lines[0].strip()
-    return first_line.startswith("#EXTM3U")
-
-def convert_m3u_to_txt(m3u_content):
-    # 分行处理
-    lines = m3u_content.split('\n')
-    
-    # 用于存储结果的列表
-    txt_lines = []
-    
-    # 临时变量用于存储频道名称
-    channel_name = ""
-    
-    for line in lines:
-        # 过滤掉 #EXTM3U 开头的行
-        if line.startswith("#EXTM3U"):
-            continue
-        # 处理 #EXTINF 开头的行
-        if line.startswith("#EXTINF"):
-            # 获取频道名称（假设频道名称在引号后）
-            channel_name = line.split(',')[-1].strip()
-        # 处理 URL 行
-        elif line.startswith("http") or line.startswith("rtmp") or line.startswith("p3p") :
-            txt_lines.append(f"{channel_name},{line.strip()}")
-        
-        # 处理后缀名为m3u，但是内容为txt的文件
-        if "#genre#" not in line and "," in line and "://" in line:
-            # 定义正则表达式，匹配频道名称,URL 的格式，并确保 URL 包含 "://"
-            # xxxx,http://xxxxx.xx.xx
-            pattern = r'^[^,]+,[^\s]+://[^\s]+$'
-            if bool(re.match(pattern, line)):
-                txt_lines.append(line)
-    
-    # 将结果合并成一个字符串，以换行符分隔
-    return '\n'.join(txt_lines)
-
-# 在list是否已经存在url 2024-07-22 11:18
-def check_url_existence(data_list, url):
-    """
-    Check if a given URL exists in a list of data.
-
-    :param data_list: List of strings containing the data
-    :param url: The URL to check for existence
-    :return: True if the URL exists in the list, otherwise False
-    """
-    if "127.0.0.1" in url:
-        return False
-    # Extract URLs from the data list
-    urls = [item.split(',')[1] for item in data_list]
-    return url not in urls #如果不存在则返回true，需要
-
-# 处理带$的URL，把$之后的内容都去掉（包括$也去掉） 【2024-08-08 22:29:11】
-def clean_url(url):
-    last_dollar_index = url.rfind('$')  # 安全起见找最后一个$处理
-    if last_dollar_index != -1:
-        return url[:last_dollar_index]
-    return url
-
-# 添加channel_name前剔除部分特定字符
-removal_list = ["「IPV4」","「IPV6」","[ipv6]","[ipv4]","_电信", "电信","（HD）","[超清]","高清","超清", "-HD","(HK)","AKtv","@","IPV6","🎞️","🎦"," ","[BD]","[VGA]","[HD]","[SD]","(1080p)","(720p)","(480p)"]
-def clean_channel_name(channel_name, removal_list):
-    for item in removal_list:
-        channel_name = channel_name.replace(item, "")
-    channel_name = channel_name.replace("CCTV-", "CCTV");
-    channel_name = channel_name.replace("CCTV0","CCTV");
-    channel_name = channel_name.replace("PLUS", "+");
-    channel_name = channel_name.replace("NewTV-", "NewTV");
-    channel_name = channel_name.replace("iHOT-", "iHOT");
-    channel_name = channel_name.replace("NEW", "New");
-    channel_name = channel_name.replace("New_", "New");
-    return channel_name
-
-#读取纠错频道名称方法
-def load_corrections_name(filename):
-    corrections = {}
-    with open(filename, 'r', encoding='utf-8') as f:
-        for line in f:
-            if not line.strip(): #跳过空行
-                continue
-            parts = line.strip().split(',')
-            correct_name = parts[0]
-            for name in parts[1:]:
-                corrections[name] = correct_name
-    return corrections
-
-#读取纠错文件
-corrections_name = load_corrections_name('assets/corrections_name.txt')
-def correct_name_data(name):
-    if name in corrections_name and name != corrections_name[name]:
-        name = corrections_name[name]
-    return name
-    
-# 分发直播源，归类，把这部分从process_url剥离出来，为以后加入whitelist源清单做准备。
-def process_channel_line(line):
-    if  "#genre#" not in line and "#EXTINF:" not in line and "," in line and "://" in line:
-        channel_name = line.split(',')[0]
-        channel_name = traditional_to_simplified(channel_name)  #繁转简
-        channel_name = clean_channel_name(channel_name, removal_list)  #分发前清理channel_name中特定字符
-        channel_name = correct_name_data(channel_name).strip() #根据纠错文件处理
-        
-        channel_address = clean_url(line.split(',')[1]).strip()  #把URL中$之后的内容都去掉
-        line=channel_name+","+channel_address #重新组织line
-        
-        if len(channel_address) > 0 and channel_address not in combined_blacklist: # 判断当前源是否在blacklist中
-            # 根据行内容判断存入哪个对象，开始分发
-            if channel_name in ys_dictionary: #央视频道
-                if check_url_existence(ys_lines, channel_address):
-                    ys_lines.append(line)
-            elif channel_name in ws_dictionary: #卫视频道
-                if check_url_existence(ws_lines, channel_address):
-                    ws_lines.append(line)
-            elif channel_name in ty_dictionary: #体育频道
-                if check_url_existence(ty_lines, channel_address):
-                    ty_lines.append(line)
-            elif channel_name in dy_dictionary: #电影频道
-                if check_url_existence(dy_lines, channel_address):  
-                    dy_lines.append(line)
-            elif channel_name in dsj_dictionary: #电视剧频道
-                if check_url_existence(dsj_lines, channel_address):  
-                    dsj_lines.append(line)
-            elif channel_name in gat_dictionary: #港澳台
-                if check_url_existence(gat_lines, channel_address):
-                    gat_lines.append(line)
-            elif channel_name in twt_dictionary: #台湾台
-                if check_url_existence(twt_lines, channel_address):
-                    twt_lines.append(line)            
-            elif channel_name in gj_dictionary: #国际台
-                if check_url_existence(gj_lines, channel_address):
-                    gj_lines.append(line)
-            elif channel_name in jlp_dictionary: #纪录片
-                if check_url_existence(jlp_lines, channel_address):
-                    jlp_lines.append(line)
-            elif channel_name in xq_dictionary: #戏曲
-                if check_url_existence(xq_lines, channel_address):
-                    xq_lines.append(line)
-            elif channel_name in js_dictionary: #解说
-                if check_url_existence(js_lines, channel_address):
-                    js_lines.append(line)
-            elif channel_name in cw_dictionary: #春晚
-                if check_url_existence(cw_lines, channel_address):
-                    cw_lines.append(line)
-            elif channel_name in newtv_dictionary: #NewTV
-                if check_url_existence(newtv_lines, channel_address):
-                    newtv_lines.append(line)
-            elif channel_name in ihot_dictionary: #iHOT
-                if check_url_existence(ihot_lines, channel_address):
-                    ihot_lines.append(line)
-            elif channel_name in et_dictionary: #儿童
-                if check_url_existence(et_lines, channel_address):
-                    et_lines.append(line)
-            elif channel_name in zy_dictionary: #综艺频道
-                if check_url_existence(zy_lines, channel_address):
-                    zy_lines.append(line)
-            elif channel_name in mdd_dictionary: #埋堆堆
-                if check_url_existence(mdd_lines, channel_address):
-                    mdd_lines.append(line)
-            elif channel_name in yy_dictionary: #音乐频道
-                if check_url_existence(yy_lines, channel_address): 
-                    yy_lines.append(line)
-            elif channel_name in game_dictionary: #游戏频道
-                if check_url_existence(game_lines, channel_address):
-                    game_lines.append(line)
-            elif channel_name in radio_dictionary: #收音机频道
-                if check_url_existence(radio_lines, channel_address):
-                    radio_lines.append(line)
-            elif channel_name in migu_dictionary: #咪咕直播
-                if check_url_existence(migu_lines, channel_address):
-                    migu_lines.append(line)
-            elif channel_name in sh_dictionary: #地方台-上海频道
-                if check_url_existence(sh_lines, channel_address): 
-                    sh_lines.append(line)
-            elif channel_name in zj_dictionary: #地方台-浙江频道
-                if check_url_existence(zj_lines, channel_address):
-                    zj_lines.append(line)
-            elif channel_name in jsu_dictionary: #地方台-江苏频道
-                if check_url_existence(jsu_lines, channel_address):
-                    jsu_lines.append(line)
-            elif channel_name in gd_dictionary: #地方台-广东频道
-                if check_url_existence(gd_lines, channel_address):
-                    gd_lines.append(line)
-            elif channel_name in hn_dictionary: #地方台-湖南频道
-                if check_url_existence(hn_lines, channel_address):
-                    hn_lines.append(line)
-            elif channel_name in hb_dictionary: #地方台-湖北频道
-                if check_url_existence(hb_lines, channel_address):
-                    hb_lines.append(line)
-            elif channel_name in ah_dictionary: #地方台-安徽频道
-                if check_url_existence(ah_lines, channel_address):
-                    ah_lines.append(line)
-            elif channel_name in hain_dictionary: #地方台-海南频道
-                if check_url_existence(hain_lines, channel_address):
-                    hain_lines.append(line)
-            elif channel_name in nm_dictionary: #地方台-内蒙频道
-                if check_url_existence(nm_lines, channel_address):
-                    nm_lines.append(line)
-            elif channel_name in ln_dictionary: #地方台-辽宁频道
-                if check_url_existence(ln_lines, channel_address):
-                    ln_lines.append(line)
-            elif channel_name in sx_dictionary: #地方台-陕西频道
-                if check_url_existence(sx_lines, channel_address): 
-                    sx_lines.append(line)
-            elif channel_name in shanxi_dictionary: #地方台-山西频道
-                if check_url_existence(shanxi_lines, channel_address):
-                    shanxi_lines.append(line)
-            elif channel_name in shandong_dictionary: #地方台-山东频道
-                if check_url_existence(shandong_lines, channel_address):
-                    shandong_lines.append(line)
-            elif channel_name in yunnan_dictionary: #地方台-云南频道
-                if check_url_existence(yunnan_lines, channel_address):
-                    yunnan_lines.append(line)
-            elif channel_name in bj_dictionary: #地方台-北京频道
-                if check_url_existence(bj_lines, channel_address):
-                    bj_lines.append(line)
-            elif channel_name in cq_dictionary: #地方台-重庆频道
-                if check_url_existence(cq_lines, channel_address):
-                    cq_lines.append(line)
-            elif channel_name in fj_dictionary: #地方台-福建频道
-                if check_url_existence(fj_lines, channel_address):
-                    fj_lines.append(line)
-            elif channel_name in gs_dictionary: #地方台-甘肃频道
-                if check_url_existence(gs_lines, channel_address):
-                    gs_lines.append(line)
-            elif channel_name in gx_dictionary: #地方台-广西频道
-                if check_url_existence(gx_lines, channel_address): 
-                    gx_lines.append(line)
-            elif channel_name in gz_dictionary: #地方台-贵州频道
-                if check_url_existence(gz_lines, channel_address):
-                    gz_lines.append(line)
-            elif channel_name in heb_dictionary: #地方台-河北频道
-                if check_url_existence(heb_lines, channel_address):
-                    heb_lines.append(line)
-            elif channel_name in hen_dictionary: #地方台-河南频道
-                if check_url_existence(hen_lines, channel_address):
-                    hen_lines.append(line)
-            elif channel_name in hlj_dictionary: #地方台-黑龙江频道
-                if check_url_existence(hlj_lines, channel_address):
-                    hlj_lines.append(line)
-            elif channel_name in jl_dictionary: #地方台-吉林频道
-                if check_url_existence(jl_lines, channel_address):
-                    jl_lines.append(line)
-            elif channel_name in nx_dictionary: #地方台-宁夏频道
-                if check_url_existence(nx_lines, channel_address):
-                    nx_lines.append(line)
-            elif channel_name in jx_dictionary: #地方台-江西频道
-                if check_url_existence(jx_lines, channel_address):
-                    jx_lines.append(line)
-            elif channel_name in qh_dictionary: #地方台-青海频道
-                if check_url_existence(qh_lines, channel_address):
-                    qh_lines.append(line)
-            elif channel_name in sc_dictionary: #地方台-四川频道
-                if check_url_existence(sc_lines, channel_address):
-                    sc_lines.append(line)
-            elif channel_name in tj_dictionary: #地方台-天津频道
-                if check_url_existence(tj_lines, channel_address):
-                    tj_lines.append(line)
-            elif channel_name in xj_dictionary: #地方台-新疆频道
-                if check_url_existence(xj_lines, channel_address):
-                    xj_lines.append(line)
-            elif channel_name in zb_dictionary: #直播中国
-                if check_url_existence(zb_lines, channel_address):
-                    zb_lines.append(line)
-            elif channel_name in mtv_dictionary: #MTV
-                if check_url_existence(mtv_lines, channel_address):
-                    mtv_lines.append(line)
-            else:
-                if channel_address not in other_lines_url:
-                    other_lines_url.append(channel_address)   #记录已加url
-                    other_lines.append(line)
-                    
-def process_url(url):
-    print(f"处理URL: {url}")
-    try:
-        other_lines.append(url+",#genre#")  # 存入other_lines便于check 2024-08-02 10:41
-        
-        # 创建一个请求对象并添加自定义header
-        headers = {
-            'User-Agent': 'PostmanRuntime-ApipostRuntime/1.1.0',
-        }
-        req = urllib.request.Request(url, headers=headers)
-        # 打开URL并读取内容
-        with urllib.request.urlopen(req,timeout=10) as response:
-            # 以二进制方式读取数据
-            data = response.read()
-            # 将二进制数据解码为字符串
-            try:
-                # 先尝试 UTF-8 解码
-                text = data.decode('utf-8')
-            except UnicodeDecodeError:
-                try:
-                    # 若 UTF-8 解码失败，尝试 GBK 解码
-                    text = data.decode('gbk')
-                except UnicodeDecodeError:
-                    try:
-                        # 若 GBK 解码失败，尝试 ISO-8859-1 解码
-                        text = data.decode('iso-8859-1')
-                    except UnicodeDecodeError:
-                        print("无法确定合适的编码格式进行解码。")
-                        
-            #处理m3u提取channel_name和channel_address
-            if is_m3u_content(text):
-                text=convert_m3u_to_txt(text)
-
-            # 逐行处理内容
-            lines = text.split('\n')
-            print(f"行数: {len(lines)}")
-            for line in lines:
-                if  "#genre#" not in line and "," in line and "://" in line:
-                    # 拆分成频道名和URL部分
-                    channel_name, channel_address = line.split(',', 1)
-                    #需要加处理带#号源=予加速源
-                    if "#" not in channel_address:
-                        process_channel_line(line) # 如果没有井号，则照常按照每行规则进行分发
-                    else: 
-                        # 如果有“#”号，则根据“#”号分隔
-                        url_list = channel_address.split('#')
-                        for channel_url in url_list:
-                            newline=f'{channel_name},{channel_url}'
-                            process_channel_line(newline)
-
-            other_lines.append('\n') #每个url处理完成后，在other_lines加个回车 2024-08-02 10:46
-
-    except Exception as e:
-        print(f"处理URL时发生错误：{e}")
-
-def sort_data(order, data):
-    # 创建一个字典来存储每行数据的索引
-    order_dict = {name: i for i, name in enumerate(order)}
-    
-    # 定义一个排序键函数，处理不在 order_dict 中的字符串
-    def sort_key(line):
-        name = line.split(',')[0]
-        return order_dict.get(name, len(order))
-    
-    # 按照 order 中的顺序对数据进行排序
-    sorted_data = sorted(data, key=sort_key)
-    return sorted_data
-
-#白名单加入
-other_lines.append("白名单,#genre#")
-print(f"添加白名单 whitelist.txt")
-for line in whitelist_lines:
-    process_channel_line(line)
-
-#读取whitelist,把高响应源从白名单中抽出加入。
-other_lines.append("白名单测速,#genre#")
-print(f"添加白名单 whitelist_auto.txt")
-for line in whitelist_auto_lines:
-    if  "#genre#" not in line and "," in line and "://" in line:
-        parts = line.split(",")
-        try:
-            response_time = float(parts[0].replace("ms", ""))
-        except ValueError:
-            print(f"response_time转换失败: {line}")
-            response_time = 60000  # 单位毫秒，转换失败给个60秒
-        if response_time < 2000: #2s以内的高响应源
-            process_channel_line(",".join(parts[1:]))
-
-#加入配置的url
-for url in urls:
-    if url.startswith("http"):        
-        process_url(url)
-
-# 获取当前的 UTC 时间
-utc_time = datetime.now(timezone.utc)
-# 北京时间
-beijing_time = utc_time + timedelta(hours=8)
-# 格式化为所需的格式
-formatted_time = beijing_time.strftime("%Y%m%d %H:%M")
-about_video1="https://d.kstore.dev/download/8880/%E5%85%AC%E5%91%8A.mp4"
-about_video2="https://d.kstore.dev/download/8880/%E6%B1%9F%E6%B9%BE%E9%B8%A3%E7%BF%A0103%E5%B9%B3%E8%A3%85%E4%BF%AE%E8%AE%BE%E8%AE%A1%E5%9B%BE%28%E5%8E%9F%E8%A7%86%E9%A2%91%29.mp4"
-version=formatted_time+","+about_video1
-about="关于本源(塔利班维护),"+about_video2
-
-# 瘦身版
-all_lines_simple =  ["更新时间,#genre#"] + [version] +[about]+['\n'] + read_txt_to_array('专区/4K.txt') + ['\n'] + \
-                    ["央视频道,#genre#"] + read_txt_to_array('专区/央视频道.txt') + sort_data(ys_dictionary,ys_lines) + ['\n'] + \
-                    ["卫视频道,#genre#"] + read_txt_to_array('专区/卫视频道.txt') + sort_data(ws_dictionary,ws_lines) + ['\n'] + \
-                    ["港澳台,#genre#"] + read_txt_to_array('专区/港澳台.txt') + sort_data(gat_dictionary,gat_lines) + ['\n'] + \
-                    ["台湾台,#genre#"] + read_txt_to_array('专区/台湾台.txt') + sort_data(twt_dictionary,twt_lines) + ['\n'] + \
-                    ["电影频道,#genre#"] + read_txt_to_array('专区/电影频道.txt') + sort_data(dy_dictionary,dy_lines) + ['\n'] + \
-                    ["电视剧频道,#genre#"] + read_txt_to_array('专区/电视剧频道.txt') + sort_data(dsj_dictionary,dsj_lines) + ['\n'] + \
-                    ["综艺频道,#genre#"] + sort_data(zy_dictionary,zy_lines) + ['\n'] + \
-                    ["NewTV,#genre#"] + sort_data(newtv_dictionary,newtv_lines) + ['\n'] + \
-                    ["iHOT,#genre#"] + sort_data(ihot_dictionary,ihot_lines) + ['\n'] + \
-                    ["体育频道,#genre#"] + sort_data(ty_dictionary,ty_lines) + ['\n'] + \
-                    ["咪咕直播,#genre#"] + sort_data(migu_dictionary,migu_lines)+ ['\n'] + \
-                    ["埋堆堆,#genre#"] + sort_data(mdd_dictionary,mdd_lines) + ['\n'] + \
-                    ["音乐频道,#genre#"] + sorted(yy_lines) + ['\n'] + \
-                    ["游戏频道,#genre#"] + sorted(game_lines) + ['\n'] + \
-                    ["解说频道,#genre#"] + sorted(js_lines)
-
-# 合并所有对象中的行文本（去重，排序后拼接）
-all_lines =  all_lines_simple + ['\n'] + \
-             ["儿童,#genre#"] + sort_data(et_dictionary,et_lines) + ['\n'] + \
-             ["国际台,#genre#"] + sort_data(gj_dictionary,gj_lines) + ['\n'] + \
-             ["纪录片,#genre#"] + sort_data(jlp_dictionary,jlp_lines)+ ['\n'] + \
-             ["戏曲频道,#genre#"] + sort_data(xq_dictionary,xq_lines) + ['\n'] + \
-             ["上海频道,#genre#"] + sort_data(sh_dictionary,sh_lines) + ['\n'] + \
-             ["湖南频道,#genre#"] + sort_data(hn_dictionary,hn_lines) + ['\n'] + \
-             ["湖北频道,#genre#"] + sort_data(hb_dictionary,hb_lines) + ['\n'] + \
-             ["广东频道,#genre#"] + sort_data(gd_dictionary,gd_lines) + ['\n'] + \
-             ["浙江频道,#genre#"] + sort_data(zj_dictionary,zj_lines) + ['\n'] + \
-             ["山东频道,#genre#"] + sort_data(shandong_dictionary,shandong_lines) + ['\n'] + \
-             ["江苏频道,#genre#"] + sorted(jsu_lines) + ['\n'] + \
-             ["安徽频道,#genre#"] + sorted(ah_lines) + ['\n'] + \
-             ["海南频道,#genre#"] + sorted(hain_lines) + ['\n'] + \
-             ["内蒙频道,#genre#"] + sorted(nm_lines) + ['\n'] + \
-             ["辽宁频道,#genre#"] + sorted(ln_lines) + ['\n'] + \
-             ["陕西频道,#genre#"] + sorted(sx_lines) + ['\n'] + \
-             ["山西频道,#genre#"] + sorted(shanxi_lines) + ['\n'] + \
-             ["云南频道,#genre#"] + sorted(yunnan_lines) + ['\n'] + \
-             ["北京频道,#genre#"] + sorted(bj_lines) + ['\n'] + \
-             ["重庆频道,#genre#"] + sorted(cq_lines) + ['\n'] + \
-             ["福建频道,#genre#"] + sorted(fj_lines) + ['\n'] + \
-             ["甘肃频道,#genre#"] + sorted(gs_lines) + ['\n'] + \
-             ["广西频道,#genre#"] + sorted(gx_lines) + ['\n'] + \
-             ["贵州频道,#genre#"] + sorted(gz_lines) + ['\n'] + \
-             ["河北频道,#genre#"] + sorted(heb_lines) + ['\n'] + \
-             ["河南频道,#genre#"] + sorted(hen_lines) + ['\n'] + \
-             ["黑龙江频道,#genre#"] + sorted(hlj_lines) + ['\n'] + \
-             ["吉林频道,#genre#"] + sorted(jl_lines) + ['\n'] + \
-             ["江西频道,#genre#"] + sorted(jx_lines) + ['\n'] + \
-             ["宁夏频道,#genre#"] + sorted(nx_lines) + ['\n'] + \
-             ["青海频道,#genre#"] + sorted(qh_lines) + ['\n'] + \
-             ["四川频道,#genre#"] + sorted(sc_lines) + ['\n'] + \
-             ["天津频道,#genre#"] + sorted(tj_lines) + ['\n'] + \
-             ["新疆频道,#genre#"] + sorted(xj_lines) + ['\n'] + \
-             ["春晚,#genre#"] + sort_data(cw_dictionary,cw_lines)  + ['\n'] + \
-             ["直播中国,#genre#"] + sorted(zb_lines) + ['\n'] + \
-             ["MTV,#genre#"] + sorted(mtv_lines) + ['\n'] + \
-             ["收音机频道,#genre#"] + sort_data(radio_dictionary,radio_lines)
-
-# 将合并后的文本写入文件
-output_file = "live.txt"
-output_file_simple = "live_lite.txt"
-# 未匹配的写入文件
-others_file = "others.txt"
-
-try:
-    # 瘦身版
-    with open(output_file_simple, 'w', encoding='utf-8') as f:
-        for line in all_lines_simple:
-            f.write(line + '\n')
-    print(f"合并后的精简文本已保存到文件: {output_file_simple}")
-
-    # 全集版
-    with open(output_file, 'w', encoding='utf-8') as f:
-        for line in all_lines:
-            f.write(line + '\n')
-    print(f"合并后的文本已保存到文件: {output_file}")
-
-    # 其他
-    with open(others_file, 'w', encoding='utf-8') as f:
-        for line in other_lines:
-            f.write(line + '\n')
-    print(f"其他已保存到文件: {others_file}")
-
-except Exception as e:
-    print(f"保存文件时发生错误：{e}")
-
-def make_m3u(txt_file, m3u_file):
-    try:
-        output_text = '#EXTM3U x-tvg-url="https://epg.112114.xyz/pp.xml.gz"\n'
-        with open(txt_file, "r", encoding='utf-8') as file:
-            input_text = file.read()
-
-        lines = input_text.strip().split("\n")
-        group_name = ""
-        for line in lines:
-            parts = line.split(",")
-            if len(parts) == 2 and "#genre#" in line:
-                group_name = parts[0]
-            elif len(parts) == 2:
-                channel_name = parts[0]
-                channel_url = parts[1]
-                logo_url="https://epg.112114.xyz/logo/"+channel_name+".png"
-                if logo_url is None: #not found logo
-                    output_text += f"#EXTINF:-1 group-title=\"{group_name}\",{channel_name}\n"
-                    output_text += f"{channel_url}\n"
-                else:
-                    output_text += f"#EXTINF:-1  tvg-name=\"{channel_name}\" tvg-logo=\"{logo_url}\"  group-title=\"{group_name}\",{channel_name}\n"
-                    output_text += f"{channel_url}\n"
-
-        with open(f"{m3u_file}", "w", encoding='utf-8') as file:
-            file.write(output_text)
-        print(f"M3U文件 '{m3u_file}' 生成成功。")
-    except Exception as e:
-        print(f"发生错误: {e}")
-
-make_m3u(output_file, "live.m3u")
-make_m3u(output_file_simple, "live_lite.m3u")
-
-# 执行结束时间
-timeend = datetime.now()
-
-# 计算时间差
-elapsed_time = timeend - timestart
-total_seconds = elapsed_time.total_seconds()
-
-# 转换为分钟和秒
-minutes = int(total_seconds // 60)
-seconds = int(total_seconds % 60)
-
-print(f"执行时间: {minutes} 分 {seconds} 秒")
-
-combined_blacklist_hj = len(combined_blacklist)
-all_lines_hj = len(all_lines)
-other_lines_hj = len(other_lines)
-print(f"blacklist行数: {combined_blacklist_hj} ")
-print(f"live.txt行数: {all_lines_hj} ")
-print(f"others.txt行数: {other_lines_hj} ")
-
-#备用1：http://tonkiang.us
-#备用2：https://www.zoomeye.hk,https://www.shodan.io,https://tv.cctv.com/live/
-#备用3：(BlackList检测对象)http,rtmp,p3p,rtp（rtsp，p2p）
-
-
-
-
-
-
-
-
-
-
-
-
-
+from urllib.parse import urlparse
+import re #正则
+import os
+import argparse
+from datetime import datetime, timedelta, timezone
+import random
+import time
+import hashlib
+import json
+import gc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from http_cache import default_cache
+from github_mirror import default_mirror_stats, open_source
+from source_lines import EncodingMemo, SourceLines
+from channel_record import Channel
+from stream_equivalence import EQUIV_INDEX, EquivalenceIndex, read_host_groups
+from functools import lru_cache, partial
+from itertools import islice
+from contextlib import contextmanager, ExitStack
+
+# 说明：导入本模块不会读文件或访问网络，字典、黑名单、简繁转换器等都在第一次使用时才加载，
+# 完整流程见 main()：load -> fetch -> parse -> route -> render
+
+#读取文本方法
+def read_txt_to_array(file_name):
+    try:
+        with open(file_name, 'r', encoding='utf-8') as file:
+            lines = file.readlines()
+            lines = [line.strip() for line in lines]
+            return lines
+    except FileNotFoundError:
+        print(f"File '{file_name}' not found.")
+        return []
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        return []
+
+#read BlackList 2024-06-17 15:02
+def read_blacklist_from_txt(file_path):
+    with open(file_path, 'r', encoding='utf-8') as file:
+        lines = file.readlines()
+
+    BlackList = [line.split(',')[1].strip() for line in lines if ',' in line]
+    return BlackList
+
+# 黑名单（首次使用时加载）
+@lru_cache(maxsize=None)
+def get_combined_blacklist():
+    blacklist_auto=read_blacklist_from_txt('assets/whitelist-blacklist/blacklist_auto.txt') 
+    blacklist_manual=read_blacklist_from_txt('assets/whitelist-blacklist/blacklist_manual.txt') 
+    return set(blacklist_auto + blacklist_manual)  #list是个列表，set是个集合，据说检索速度集合要快很多。2024-08-08
+
+# 分类桶：按加入顺序保存直播源记录，同时用set索引已加入的url，查重O(1)
+# 给定等价索引时按 (频道名, 指纹) 查重：同一频道只换了签名参数或镜像host的url视为同一个源，只保留先加入的
+class ChannelBucket:
+    def __init__(self, skip_local=True, equivalence=None):
+        self.lines = []
+        self.urls = set()
+        self.skip_local = skip_local  # 剔除127.0.0.1的本地源
+        self.equivalence = equivalence
+        self.fingerprints = set()  # (频道名, 指纹)
+        self.merged = 0  # 按指纹合并掉的url个数
+
+    def add(self, channel):
+        """url不在桶中时加入channel，返回是否加入"""
+        url = channel.url
+        if self.skip_local and "127.0.0.1" in url:
+            return False
+        if url in self.urls:
+            return False
+        self.urls.add(url)
+        if self.equivalence is not None:
+            key = (channel.name, self.equivalence.fingerprint(url))
+            if key in self.fingerprints:
+                self.merged += 1
+                return False
+            self.fingerprints.add(key)
+        self.lines.append(channel)
+        return True
+
+    def __len__(self):
+        return len(self.lines)
+
+# 频道分类注册表：(分类key, 字典文件)，顺序即分发时的匹配优先级（先匹配先得）
+# 新增分类只需在此登记，无需再加分支
+channel_categories = [
+    # 主频道
+    ("ys", '主频道/央视频道.txt'), #央视频道
+    ("ws", '主频道/卫视频道.txt'), #卫视频道
+    ("ty", '主频道/体育频道.txt'), #体育频道
+    ("dy", '主频道/电影.txt'), #电影频道
+    ("dsj", '主频道/电视剧.txt'), #电视剧频道
+    ("gat", '主频道/港澳台.txt'), #港澳台
+    ("twt", '主频道/台湾台.txt'), #台湾台
+    ("gj", '主频道/国际台.txt'), #国际台
+    ("jlp", '主频道/纪录片.txt'), #纪录片
+    ("xq", '主频道/戏曲频道.txt'), #戏曲
+    ("js", '主频道/解说频道.txt'), #解说
+    ("cw", '主频道/春晚.txt'), #春晚
+    ("newtv", '主频道/NewTV.txt'), #NewTV
+    ("ihot", '主频道/iHOT.txt'), #iHOT
+    ("et", '主频道/儿童频道.txt'), #儿童
+    ("zy", '主频道/综艺频道.txt'), #综艺频道
+    ("mdd", '主频道/埋堆堆.txt'), #埋堆堆
+    ("yy", '主频道/音乐频道.txt'), #音乐频道
+    ("game", '主频道/游戏频道.txt'), #游戏频道
+    ("radio", '主频道/收音机频道.txt'), #收音机频道
+    ("migu", '主频道/咪咕直播.txt'), #咪咕直播
+    # 地方台
+    ("sh", '地方台/上海频道.txt'), #地方台-上海频道
+    ("zj", '地方台/浙江频道.txt'), #地方台-浙江频道
+    ("jsu", '地方台/江苏频道.txt'), #地方台-江苏频道
+    ("gd", '地方台/广东频道.txt'), #地方台-广东频道
+    ("hn", '地方台/湖南频道.txt'), #地方台-湖南频道
+    ("hb", '地方台/湖北频道.txt'), #地方台-湖北频道
+    ("ah", '地方台/安徽频道.txt'), #地方台-安徽频道
+    ("hain", '地方台/海南频道.txt'), #地方台-海南频道
+    ("nm", '地方台/内蒙频道.txt'), #地方台-内蒙频道
+    ("ln", '地方台/辽宁频道.txt'), #地方台-辽宁频道
+    ("sx", '地方台/陕西频道.txt'), #地方台-陕西频道
+    ("shanxi", '地方台/山西频道.txt'), #地方台-山西频道
+    ("shandong", '地方台/山东频道.txt'), #地方台-山东频道
+    ("yunnan", '地方台/云南频道.txt'), #地方台-云南频道
+    ("bj", '地方台/北京频道.txt'), #地方台-北京频道
+    ("cq", '地方台/重庆频道.txt'), #地方台-重庆频道
+    ("fj", '地方台/福建频道.txt'), #地方台-福建频道
+    ("gs", '地方台/甘肃频道.txt'), #地方台-甘肃频道
+    ("gx", '地方台/广西频道.txt'), #地方台-广西频道
+    ("gz", '地方台/贵州频道.txt'), #地方台-贵州频道
+    ("heb", '地方台/河北频道.txt'), #地方台-河北频道
+    ("hen", '地方台/河南频道.txt'), #地方台-河南频道
+    ("hlj", '地方台/黑龙江频道.txt'), #地方台-黑龙江频道
+    ("jl", '地方台/吉林频道.txt'), #地方台-吉林频道
+    ("nx", '地方台/宁夏频道.txt'), #地方台-宁夏频道
+    ("jx", '地方台/江西频道.txt'), #地方台-江西频道
+    ("qh", '地方台/青海频道.txt'), #地方台-青海频道
+    ("sc", '地方台/四川频道.txt'), #地方台-四川频道
+    ("tj", '地方台/天津频道.txt'), #地方台-天津频道
+    ("xj", '地方台/新疆频道.txt'), #地方台-新疆频道
+    # 其他
+    ("zb", '主频道/直播中国.txt'), #直播中国
+    ("mtv", '主频道/MTV.txt'), #MTV
+]
+
+#读取分类字典（首次使用时加载）
+@lru_cache(maxsize=None)
+def get_category_dictionaries():
+    return {key: read_txt_to_array(path) for key, path in channel_categories}
+
+# 频道名 -> 分类key 的索引，启动时建一次，分发时一次hash查找即可（代替逐个list线性查找）
+def build_category_index(categories, dictionaries):
+    index = {}
+    for key, _ in categories:
+        for name in dictionaries[key]:
+            index.setdefault(name, key)  # 保持原elif链的先匹配优先
+    return index
+
+@lru_cache(maxsize=None)
+def get_channel_category_index():
+    return build_category_index(channel_categories, get_category_dictionaries())
+
+#简繁转换
+# 初始化转换器，"t2s" 表示从繁体转为简体；加载字典较慢，整个进程只初始化一次，首次使用时才加载
+@lru_cache(maxsize=None)
+def get_converter():
+    import opencc #简繁转换
+    return opencc.OpenCC('t2s')
+
+def traditional_to_simplified(text: str) -> str:
+    simplified_text = get_converter().convert(text)
+    return simplified_text
+
+# 逐行把M3U转换为 "频道名,url"（流式解析时收到一行转换一行）
+def convert_m3u_lines(lines):
+    # 临时变量用于存储频道名称
+    channel_name = ""
+    
+    for line in lines:
+        # 过滤掉 #EXTM3U 开头的行
+        if line.startswith("#EXTM3U"):
+            continue
+        # 处理 #EXTINF 开头的行
+        if line.startswith("#EXTINF"):
+            # 获取频道名称（假设频道名称在引号后）
+            channel_name = line.split(',')[-1].strip()
+        # 处理 URL 行
+        elif line.startswith("http") or line.startswith("rtmp") or line.startswith("p3p") :
+            yield f"{channel_name},{line.strip()}"
+        
+        # 处理后缀名为m3u，但是内容为txt的文件
+        if "#genre#" not in line and "," in line and "://" in line:
+            # 定义正则表达式，匹配频道名称,URL 的格式，并确保 URL 包含 "://"
+            # xxxx,http://xxxxx.xx.xx
+            pattern = r'^[^,]+,[^\s]+://[^\s]+$'
+            if bool(re.match(pattern, line)):
+                yield line
+
+# 处理带$的URL，把$之后的内容都去掉（包括$也去掉） 【2024-08-08 22:29:11】
+def clean_url(url):
+    last_dollar_index = url.rfind('$')  # 安全起见找最后一个$处理
+    if last_dollar_index != -1:
+        return url[:last_dollar_index]
+    return url
+
+# 添加channel_name前剔除部分特定字符
+removal_list = ["「IPV4」","「IPV6」","[ipv6]","[ipv4]","_电信", "电信","（HD）","[超清]","高清","超清", "-HD","(HK)","AKtv","@","IPV6","🎞️","🎦"," ","[BD]","[VGA]","[HD]","[SD]","(1080p)","(720p)","(480p)"]
+# 剔除后依次做的替换
+rewrite_list = [("CCTV-", "CCTV"), ("CCTV0", "CCTV"), ("PLUS", "+"), ("NewTV-", "NewTV"), ("iHOT-", "iHOT"), ("NEW", "New"), ("New_", "New")]
+
+# 逐条replace的原始实现，编译版遇到无法一次扫描确定结果的名称时回退到这里
+def clean_channel_name_sequential(channel_name, removal_list, rewrite_list):
+    for item in removal_list:
+        channel_name = channel_name.replace(item, "")
+    for old, new in rewrite_list:
+        channel_name = channel_name.replace(old, new)
+    return channel_name
+
+# 把removal_list和rewrite_list编译成一个正则，一次扫描完成清理，结果与逐条replace完全一致
+def compile_channel_name_cleaner(removal_list, rewrite_list):
+    rules = [(item, "") for item in removal_list] + list(rewrite_list)
+    replacements = {}
+    for old, new in rules:
+        replacements.setdefault(old, new)
+    max_len = max(len(old) for old, _ in rules)
+
+    # 两个规则交叠且逐条replace时后出现的先处理，一次扫描的结果会不同，遇到这种组合直接回退
+    conflicts = set()
+    for i, (a, _) in enumerate(rules):
+        for b, _ in rules[:i]:
+            for k in range(1, len(a)):
+                if b in a[k:]:
+                    conflicts.add(a)
+                elif b.startswith(a[k:]):
+                    conflicts.add(a[:k] + b)
+    alternatives = sorted(conflicts, key=len, reverse=True) + [old for old, _ in rules]
+    pattern = re.compile("|".join(re.escape(item) for item in dict.fromkeys(alternatives)))
+
+    def clean_channel_name(channel_name):
+        match = pattern.search(channel_name)
+        if match is None:  # 大部分频道名无需清理
+            return channel_name
+        parts = []
+        pos = 0
+        while match is not None:
+            item = match.group()
+            # 冲突组合，或两处匹配相距过近（逐条replace时剔除后可能拼出新的匹配）
+            if item in conflicts or (parts and match.start() - pos < max_len):
+                return clean_channel_name_sequential(channel_name, removal_list, rewrite_list)
+            parts.append(channel_name[pos:match.start()])
+            parts.append(replacements[item])
+            pos = match.end()
+            match = pattern.search(channel_name, pos)
+        parts.append(channel_name[pos:])
+        cleaned = "".join(parts)
+        # 替换后又拼出了可匹配的内容
+        if pattern.search(cleaned):
+            return clean_channel_name_sequential(channel_name, removal_list, rewrite_list)
+        return cleaned
+
+    return clean_channel_name
+
+@lru_cache(maxsize=None)
+def get_channel_name_cleaner():
+    return compile_channel_name_cleaner(removal_list, rewrite_list)
+
+def clean_channel_name(channel_name):
+    return get_channel_name_cleaner()(channel_name)
+
+#读取纠错频道名称方法
+def load_corrections_name(filename):
+    corrections = {}
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip(): #跳过空行
+                continue
+            parts = line.strip().split(',')
+            correct_name = parts[0]
+            for name in parts[1:]:
+                corrections[name] = correct_name
+    return corrections
+
+#读取纠错文件（首次使用时加载）
+@lru_cache(maxsize=None)
+def get_corrections_name():
+    return load_corrections_name('assets/corrections_name.txt')
+
+def correct_name_data(name):
+    corrections_name = get_corrections_name()
+    if name in corrections_name and name != corrections_name[name]:
+        name = corrections_name[name]
+    return name
+
+# 频道名标准化：繁转简 -> 清理特定字符 -> 纠错。原始频道名重复率很高，结果用LRU缓存
+@lru_cache(maxsize=65536)
+def normalize_channel_name(raw_name):
+    channel_name = traditional_to_simplified(raw_name)  #繁转简
+    channel_name = clean_channel_name(channel_name)  #分发前清理channel_name中特定字符
+    return correct_name_data(channel_name).strip() #根据纠错文件处理
+    
+# 解析单行直播源：频道名标准化、url清理并确定分类，返回Channel，不是直播源返回None
+def parse_channel_line(line, source=None):
+    if  "#genre#" not in line and "#EXTINF:" not in line and "," in line and "://" in line:
+        channel_name = normalize_channel_name(line.split(',')[0])
+        channel_address = clean_url(line.split(',')[1]).strip()  #把URL中$之后的内容都去掉
+        if len(channel_address) > 0:
+            return Channel(channel_name, channel_address, get_channel_category_index().get(channel_name), source)
+    return None
+
+# 分发：黑名单过滤后按分类存入各分类桶，未匹配的存入other
+class ChannelRouter:
+    def __init__(self, blacklist, equivalence=None):
+        self.blacklist = blacklist
+        self.equivalence = equivalence
+        # 定义多个对象用于存储不同内容的行文本；分类按等价索引合并同一个源（other保持原样，供人工检查）
+        self.category_buckets = {key: ChannelBucket(equivalence=equivalence) for key, _ in channel_categories}
+        self.other_bucket = ChannelBucket(skip_local=False) #其他，为降低other文件大小，剔除重复url
+        self.other_lines = self.other_bucket.lines # 分隔行等直接写入
+
+    # 把解析后的直播源分发到对应分类
+    def dispatch(self, channel):
+        if channel.url not in self.blacklist: # 判断当前源是否在blacklist中
+            # 根据分类存入对应对象，开始分发
+            if channel.category is not None:
+                self.category_buckets[channel.category].add(channel)
+            else:
+                self.other_bucket.add(channel)
+
+    # 分发直播源，归类，把这部分从process_url剥离出来，为以后加入whitelist源清单做准备。
+    def process_channel_line(self, line):
+        channel = parse_channel_line(line)
+        if channel is not None:
+            self.dispatch(channel)
+
+    # 取得分类下的直播源，ordered=True按字典文件顺序排序，否则按 "频道名,url" 文本排序
+    def category_data(self, key, ordered=True):
+        if ordered:
+            return sort_data(get_category_dictionaries()[key], self.category_buckets[key].lines)
+        return sorted(self.category_buckets[key].lines, key=Channel.to_line)
+
+# 解析若干行直播源，返回记录列表
+def parse_lines(lines, source=None):
+    records = []
+    for line in lines:
+        if  "#genre#" not in line and "," in line and "://" in line:
+            # 拆分成频道名和URL部分
+            channel_name, channel_address = line.split(',', 1)
+            #需要加处理带#号源=予加速源
+            if "#" not in channel_address:
+                channel_lines = [line] # 如果没有井号，则照常按照每行规则进行分发
+            else:
+                # 如果有“#”号，则根据“#”号分隔
+                channel_lines = [f'{channel_name},{channel_url}' for channel_url in channel_address.split('#')]
+            for channel_line in channel_lines:
+                channel = parse_channel_line(channel_line, source)
+                if channel is not None:
+                    records.append(channel)
+    return records
+
+# 解析子进程的等价索引（进程池初始化时传入），分类源的指纹在子进程中一并算好
+parse_worker_equivalence = None
+
+def init_parse_worker(equivalence):
+    global parse_worker_equivalence
+    parse_worker_equivalence = equivalence
+
+# 在子进程中解析一个分片，返回 [(频道名, url, 分类, 指纹)]（元组比Channel序列化快）
+def parse_shard(text):
+    equivalence = parse_worker_equivalence
+    with gc_paused():
+        return [(channel.name, channel.url, channel.category,
+                 equivalence.fingerprint(channel.url) if equivalence is not None and channel.category is not None else None)
+                for channel in parse_lines(text.split('\n'))]
+
+# 多进程解析：行数达到 PARSE_PARALLEL_MIN_LINES 的源，边读边按 PARSE_SHARD_LINES 行一块交给进程池，
+# 结果按提交顺序拼接，与单进程的记录顺序完全相同（分发时仍是先出现的url优先）
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "1"))  # 1为不启用
+PARSE_PARALLEL_MIN_LINES = int(os.getenv("PARSE_PARALLEL_MIN_LINES", "50000"))
+PARSE_SHARD_LINES = int(os.getenv("PARSE_SHARD_LINES", "20000"))
+
+def parse_lines_parallel(head, lines, source, pool):
+    futures = [pool.submit(parse_shard, '\n'.join(head[i:i + PARSE_SHARD_LINES])) for i in range(0, len(head), PARSE_SHARD_LINES)]
+    while True:
+        block = list(islice(lines, PARSE_SHARD_LINES))
+        if not block:
+            break
+        futures.append(pool.submit(parse_shard, '\n'.join(block)))
+    records = []
+    fingerprints = {}
+    for future in futures:
+        for name, address, category, key in future.result():
+            records.append(Channel(name, address, category, source))
+            if key is not None:
+                fingerprints[address] = key
+    return records, fingerprints
+
+# 批量创建记录时暂停循环垃圾回收：记录之间没有循环引用，大源的百万个对象会反复触发全量回收
+# gc开关是整个进程的：主进程在主线程中包住整个下载阶段，解析子进程中包住一个分片，不在并发的下载线程中切换
+@contextmanager
+def gc_paused():
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+# 解析直播源的各行（可以是边下载边产出的迭代器），返回 (记录列表, {url: 子进程算好的指纹})
+# 不含黑名单过滤，黑名单在分发时判断；pool 为进程池（None时单进程解析）
+def parse_source_lines(lines, source=None, pool=None, workers=PARSE_WORKERS):
+    if pool is None or workers <= 1:
+        return parse_lines(lines, source), {}
+    lines = iter(lines)
+    head = list(islice(lines, PARSE_PARALLEL_MIN_LINES))
+    if len(head) < PARSE_PARALLEL_MIN_LINES:
+        return parse_lines(head, source), {}
+    return parse_lines_parallel(head, lines, source, pool)
+
+# 解析结果缓存：上游内容没有变化（响应体sha256相同）时，直接使用上次解析、标准化、分类后的记录
+PARSE_CACHE_DIR = os.getenv("PARSE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "parsed"))
+PARSE_CACHE_VERSION = 2  # 2: 内容hash改为响应体（解码前）的sha256
+
+# 分类字典、纠错、清理规则任一变化，缓存的记录都作废
+@lru_cache(maxsize=None)
+def parse_rules_fingerprint():
+    rules = [PARSE_CACHE_VERSION, channel_categories, get_category_dictionaries(), get_corrections_name(), removal_list, rewrite_list]
+    return hashlib.sha256(json.dumps(rules, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+def parse_cache_path(url):
+    return os.path.join(PARSE_CACHE_DIR, hashlib.sha256(url.encode('utf-8')).hexdigest() + ".json")
+
+# 读取url的解析缓存，没有或规则已变化时返回None
+def read_parse_cache(url):
+    try:
+        with open(parse_cache_path(url), 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get("rules") != parse_rules_fingerprint():
+        return None
+    return cached
+
+def cached_records(url, cached):
+    return [Channel(name, address, category, url) for name, address, category in cached["records"]]
+
+def save_parsed_records(url, content_hash, records):
+    try:
+        os.makedirs(PARSE_CACHE_DIR, exist_ok=True)
+        path = parse_cache_path(url)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"url": url, "content_hash": content_hash, "rules": parse_rules_fingerprint(),
+                       "records": [[c.name, c.url, c.category] for c in records]}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"保存解析缓存失败：{e}")
+
+# 上游源的请求头
+FETCH_HEADERS = {
+    'User-Agent': 'PostmanRuntime-ApipostRuntime/1.1.0',
+}
+
+# 下载并解析一个上游源（在下载线程中执行）：边下载边解码、分行、解析，不在内存中保存整个响应体
+# 返回 (记录列表, 行数, {url: 指纹})，内容未变化、使用解析缓存时行数为None
+def load_source(url, pool=None, workers=PARSE_WORKERS, memo=None):
+    cached = read_parse_cache(url)
+    # 经磁盘缓存，内容未变化时服务器返回304，解析缓存中有这个内容时不再读取；GitHub raw 源在各镜像间竞速
+    with open_source(url, headers=FETCH_HEADERS, timeout=10) as body:
+        if cached is not None and body.content_hash == cached["content_hash"]:
+            return cached_records(url, cached), None, {}
+        source_lines = lines = SourceLines(body, convert_m3u_lines, url, memo)
+        if cached is not None and not body.has_validator:
+            # 没有缓存校验信息的源（服务器不给ETag/Last-Modified，每次都是200）：只解码、分行，
+            # 读完算出hash，与上次相同时直接用解析缓存，不再标准化、分类；
+            # 有校验信息的源返回200说明内容变了，直接流式解析
+            lines = list(source_lines)
+            if body.content_hash == cached["content_hash"]:
+                return cached_records(url, cached), None, {}
+        records, fingerprints = parse_source_lines(lines, url, pool, workers)
+    save_parsed_records(url, body.content_hash, records)
+    return records, source_lines.count, fingerprints
+
+# 并发下载，同时下载数和整个下载阶段的时限可通过环境变量调整
+FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "16"))
+FETCH_DEADLINE = float(os.getenv("FETCH_DEADLINE", "180")) # 秒
+
+def fetch_urls_concurrently(urls, max_workers=FETCH_MAX_WORKERS, deadline=FETCH_DEADLINE, load=load_source):
+    """并发下载urls（每个url调用 load），按urls原顺序逐个yield (url, 结果, error)，保证后续分发顺序不变"""
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = [(url, executor.submit(load, url)) for url in urls]
+    stage_end = time.monotonic() + deadline
+    try:
+        for url, future in futures:
+            try:
+                yield url, future.result(timeout=max(0, stage_end - time.monotonic())), None
+            except FuturesTimeoutError:
+                yield url, None, TimeoutError(f"超出下载阶段时限 {deadline}s")
+            except Exception as e:
+                yield url, None, e
+    finally:
+        # 超时未完成的下载不再等待
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def sort_data(order, data):
+    # 创建一个字典来存储每行数据的索引
+    order_dict = {name: i for i, name in enumerate(order)}
+    
+    # 定义一个排序键函数，处理不在 order_dict 中的频道
+    def sort_key(channel):
+        return order_dict.get(channel.name, len(order))
+    
+    # 按照 order 中的顺序对数据进行排序
+    sorted_data = sorted(data, key=sort_key)
+    return sorted_data
+
+# 白名单测速源的可靠性评分清单及最低评分（评分0~1，0.334约相当于一次检测成功且响应时间2s）
+WHITELIST_SCORE_FILE = 'assets/whitelist-blacklist/whitelist_score.txt'
+WHITELIST_MIN_SCORE = float(os.getenv("WHITELIST_MIN_SCORE", "0.334"))
+
+#白名单加入
+def add_whitelist(router):
+    router.other_lines.append("白名单,#genre#")
+    print(f"添加白名单 whitelist.txt")
+    for line in read_txt_to_array('assets/whitelist-blacklist/whitelist_manual.txt'):
+        router.process_channel_line(line)
+
+    #读取whitelist,把高响应源从白名单中抽出加入。
+    router.other_lines.append("白名单测速,#genre#")
+    # 优先使用检测脚本生成的可靠性评分清单（综合历史成功率和响应时间，已按评分从高到低排序）
+    if os.path.exists(WHITELIST_SCORE_FILE):
+        print("添加白名单 whitelist_score.txt")
+        for line in read_txt_to_array(WHITELIST_SCORE_FILE):
+            if  "#genre#" not in line and "," in line and "://" in line:
+                score, channel_line = line.split(",", 1)
+                try:
+                    if float(score) >= WHITELIST_MIN_SCORE:
+                        router.process_channel_line(channel_line)
+                except ValueError:
+                    print(f"score转换失败: {line}")
+        return
+    # 没有评分清单时按单次响应时间筛选
+    print(f"添加白名单 whitelist_auto.txt")
+    for line in read_txt_to_array('assets/whitelist-blacklist/whitelist_auto.txt'):
+        if  "#genre#" not in line and "," in line and "://" in line:
+            parts = line.split(",")
+            try:
+                response_time = float(parts[0].replace("ms", ""))
+            except ValueError:
+                print(f"response_time转换失败: {line}")
+                response_time = 60000  # 单位毫秒，转换失败给个60秒
+            if response_time < 2000: #2s以内的高响应源
+                router.process_channel_line(",".join(parts[1:]))
+
+# 更新时间及关于本源
+def version_rows():
+    # 获取当前的 UTC 时间
+    utc_time = datetime.now(timezone.utc)
+    # 北京时间
+    beijing_time = utc_time + timedelta(hours=8)
+    # 格式化为所需的格式
+    formatted_time = beijing_time.strftime("%Y%m%d %H:%M")
+    about_video1="https://d.kstore.dev/download/8880/%E5%85%AC%E5%91%8A.mp4"
+    about_video2="https://d.kstore.dev/download/8880/%E6%B1%9F%E6%B9%BE%E9%B8%A3%E7%BF%A0103%E5%B9%B3%E8%A3%85%E4%BF%AE%E8%AE%BE%E8%AE%A1%E5%9B%BE%28%E5%8E%9F%E8%A7%86%E9%A2%91%29.mp4"
+    version=formatted_time+","+about_video1
+    about="关于本源(塔利班维护),"+about_video2
+    return [version, about]
+
+# 输出分组：(分组名, 专区文件, 分类key, 是否按字典文件顺序排序)
+# 瘦身版
+output_sections_simple = [
+    ("央视频道", '专区/央视频道.txt', "ys", True),
+    ("卫视频道", '专区/卫视频道.txt', "ws", True),
+    ("港澳台", '专区/港澳台.txt', "gat", True),
+    ("台湾台", '专区/台湾台.txt', "twt", True),
+    ("电影频道", '专区/电影频道.txt', "dy", True),
+    ("电视剧频道", '专区/电视剧频道.txt', "dsj", True),
+    ("综艺频道", None, "zy", True),
+    ("NewTV", None, "newtv", True),
+    ("iHOT", None, "ihot", True),
+    ("体育频道", None, "ty", True),
+    ("咪咕直播", None, "migu", True),
+    ("埋堆堆", None, "mdd", True),
+    ("音乐频道", None, "yy", False),
+    ("游戏频道", None, "game", False),
+    ("解说频道", None, "js", False),
+]
+# 全集版 = 瘦身版 + 以下分组
+output_sections_full = [
+    ("儿童", None, "et", True),
+    ("国际台", None, "gj", True),
+    ("纪录片", None, "jlp", True),
+    ("戏曲频道", None, "xq", True),
+    ("上海频道", None, "sh", True),
+    ("湖南频道", None, "hn", True),
+    ("湖北频道", None, "hb", True),
+    ("广东频道", None, "gd", True),
+    ("浙江频道", None, "zj", True),
+    ("山东频道", None, "shandong", True),
+    ("江苏频道", None, "jsu", False),
+    ("安徽频道", None, "ah", False),
+    ("海南频道", None, "hain", False),
+    ("内蒙频道", None, "nm", False),
+    ("辽宁频道", None, "ln", False),
+    ("陕西频道", None, "sx", False),
+    ("山西频道", None, "shanxi", False),
+    ("云南频道", None, "yunnan", False),
+    ("北京频道", None, "bj", False),
+    ("重庆频道", None, "cq", False),
+    ("福建频道", None, "fj", False),
+    ("甘肃频道", None, "gs", False),
+    ("广西频道", None, "gx", False),
+    ("贵州频道", None, "gz", False),
+    ("河北频道", None, "heb", False),
+    ("河南频道", None, "hen", False),
+    ("黑龙江频道", None, "hlj", False),
+    ("吉林频道", None, "jl", False),
+    ("江西频道", None, "jx", False),
+    ("宁夏频道", None, "nx", False),
+    ("青海频道", None, "qh", False),
+    ("四川频道", None, "sc", False),
+    ("天津频道", None, "tj", False),
+    ("新疆频道", None, "xj", False),
+    ("春晚", None, "cw", True),
+    ("直播中国", None, "zb", False),
+    ("MTV", None, "mtv", False),
+    ("收音机频道", None, "radio", True),
+]
+
+# 按输出顺序逐行产出 (行, 是否属于瘦身版)，分组之间以空行分隔
+def iter_output_rows(router):
+    header = ["更新时间,#genre#"] + version_rows() + ['\n'] + read_txt_to_array('专区/4K.txt') + ['\n']
+    for row in header:
+        yield row, True
+    sections = [(section, True) for section in output_sections_simple] + [(section, False) for section in output_sections_full]
+    for i, ((group_name, zone_file, key, ordered), in_simple) in enumerate(sections):
+        if i > 0:
+            yield '\n', in_simple
+        yield f"{group_name},#genre#", in_simple
+        if zone_file:
+            for row in read_txt_to_array(zone_file):
+                yield row, in_simple
+        for channel in router.category_data(key, ordered):
+            yield channel, in_simple
+
+# 原子写文件：先写临时文件，写完再替换目标文件，中途出错不会留下写了一半的文件
+@contextmanager
+def atomic_open(file_name):
+    tmp_file = file_name + ".tmp"
+    f = open(tmp_file, 'w', encoding='utf-8', buffering=1 << 16)
+    try:
+        yield f
+    except BaseException:
+        f.close()
+        os.remove(tmp_file)
+        raise
+    f.close()
+    os.replace(tmp_file, file_name)
+
+M3U_HEADER = '#EXTM3U x-tvg-url="https://epg.112114.xyz/pp.xml.gz"\n'
+
+# 一行 "频道名,url" 转为m3u条目
+def m3u_entry(group_name, channel_name, channel_url):
+    logo_url="https://epg.112114.xyz/logo/"+channel_name+".png"
+    return f"#EXTINF:-1  tvg-name=\"{channel_name}\" tvg-logo=\"{logo_url}\"  group-title=\"{group_name}\",{channel_name}\n{channel_url}\n"
+
+# 一次遍历分类数据，同时写出 txt/m3u 的全集版和瘦身版，返回全集版行数
+def write_outputs(rows, output_file, output_file_simple, m3u_file, m3u_file_simple):
+    row_count = 0
+    group_name = ""
+    with ExitStack() as stack:
+        live_txt = stack.enter_context(atomic_open(output_file))
+        lite_txt = stack.enter_context(atomic_open(output_file_simple))
+        live_m3u = stack.enter_context(atomic_open(m3u_file))
+        lite_m3u = stack.enter_context(atomic_open(m3u_file_simple))
+        live_m3u.write(M3U_HEADER)
+        lite_m3u.write(M3U_HEADER)
+        for row, in_simple in rows:
+            row = str(row)
+            row_count += 1
+            live_txt.write(row + '\n')
+            if in_simple:
+                lite_txt.write(row + '\n')
+            for line in row.split('\n'):
+                parts = line.split(",")
+                if len(parts) == 2 and "#genre#" in line:
+                    group_name = parts[0]
+                elif len(parts) == 2:
+                    entry = m3u_entry(group_name, parts[0], parts[1])
+                    live_m3u.write(entry)
+                    if in_simple:
+                        lite_m3u.write(entry)
+    return row_count
+
+# 将合并后的文本写入文件，返回live.txt行数
+def render_outputs(router, output_file="live.txt", output_file_simple="live_lite.txt", others_file="others.txt"):
+    all_lines_hj = 0
+    try:
+        all_lines_hj = write_outputs(iter_output_rows(router), output_file, output_file_simple, "live.m3u", "live_lite.m3u")
+        print(f"合并后的文本已保存到文件: {output_file}, {output_file_simple}, live.m3u, live_lite.m3u")
+
+        # 其他（未匹配的）
+        with atomic_open(others_file) as f:
+            for line in router.other_lines:
+                f.write(f"{line}\n")
+        print(f"其他已保存到文件: {others_file}")
+
+    except Exception as e:
+        print(f"保存文件时发生错误：{e}")
+    return all_lines_hj
+
+# 强制加载全部字典、黑名单和简繁转换器（正常流程中会在第一次使用时自动加载，这里单独计时）
+def load_assets():
+    get_combined_blacklist()
+    get_category_dictionaries()
+    get_channel_category_index()
+    get_corrections_name()
+    get_channel_name_cleaner()
+    get_converter()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="汇总直播源，生成 live.txt / live_lite.txt / live.m3u / live_lite.m3u")
+    parser.add_argument("--urls", default='assets/urls.txt', help="自定义源清单文件")
+    parser.add_argument("--workers", type=int, default=FETCH_MAX_WORKERS, help="同时下载的源个数")
+    parser.add_argument("--deadline", type=float, default=FETCH_DEADLINE, help="整个下载阶段的时限(秒)")
+    parser.add_argument("--parse-workers", type=int, default=PARSE_WORKERS, help="解析大源时使用的进程数（1为单进程）")
+    args = parser.parse_args(argv)
+
+    # 执行开始时间
+    timestart = datetime.now()
+    stage_times = {"load": 0.0, "fetch": 0.0, "route": 0.0, "render": 0.0}  # fetch 含边下载边解析
+
+    t = time.perf_counter()
+    load_assets()
+    # 等价索引：镜像host组由检测脚本根据历史检测结果生成
+    router = ChannelRouter(get_combined_blacklist(), EquivalenceIndex(read_host_groups()) if EQUIV_INDEX else None)
+    # 自定义源
+    urls = read_txt_to_array(args.urls)
+    # 解析进程池：在下载线程启动前建好（fork方式下第一次提交任务时启动全部子进程，子进程直接继承已加载的字典）
+    parse_pool = ProcessPoolExecutor(max_workers=args.parse_workers, initializer=init_parse_worker,
+                                     initargs=(router.equivalence,)) if args.parse_workers > 1 else None
+    if parse_pool is not None:
+        parse_pool.submit(get_channel_category_index).result()
+    stage_times["load"] += time.perf_counter() - t
+
+    t = time.perf_counter()
+    add_whitelist(router)
+    stage_times["route"] += time.perf_counter() - t
+
+    #加入配置的url（并发下载并流式解析，按urls.txt顺序分发，同一频道先出现的url优先）
+    encoding_memo = EncodingMemo()
+    load = partial(load_source, pool=parse_pool, workers=args.parse_workers, memo=encoding_memo)
+    # 下载线程解析、主线程分发都在大量创建记录，整个阶段暂停一次垃圾回收
+    with gc_paused():
+        t = time.perf_counter()
+        for url, parsed, error in fetch_urls_concurrently([url for url in urls if url.startswith("http")], args.workers, args.deadline, load):
+            stage_times["fetch"] += time.perf_counter() - t
+            print(f"处理URL: {url}")
+            router.other_lines.append(url+",#genre#")  # 存入other_lines便于check 2024-08-02 10:41
+            try:
+                if error is not None:
+                    raise error
+                records, line_count, fingerprints = parsed
+                if line_count is None:
+                    print(f"内容未变化，使用解析缓存: {len(records)} 条")
+                else:
+                    print(f"行数: {line_count}")
+                t = time.perf_counter()
+                if router.equivalence is not None:
+                    router.equivalence.precomputed = fingerprints  # 解析子进程算好的指纹
+                for channel in records:
+                    router.dispatch(channel)
+                if router.equivalence is not None:
+                    router.equivalence.precomputed = {}  # 黑名单中或url重复的没有取用
+                stage_times["route"] += time.perf_counter() - t
+                router.other_lines.append('\n') #每个url处理完成后，在other_lines加个回车 2024-08-02 10:46
+            except Exception as e:
+                print(f"处理URL时发生错误：{e}")
+            t = time.perf_counter()
+    if parse_pool is not None:
+        parse_pool.shutdown()
+    encoding_memo.save()
+    default_mirror_stats().save()
+
+    t = time.perf_counter()
+    all_lines_hj = render_outputs(router)
+    stage_times["render"] += time.perf_counter() - t
+
+    # 执行结束时间
+    timeend = datetime.now()
+
+    # 计算时间差
+    elapsed_time = timeend - timestart
+    total_seconds = elapsed_time.total_seconds()
+
+    # 转换为分钟和秒
+    minutes = int(total_seconds // 60)
+    seconds = int(total_seconds % 60)
+
+    print(f"执行时间: {minutes} 分 {seconds} 秒")
+    print("各阶段耗时: " + ", ".join(f"{stage} {seconds_:.3f}s" for stage, seconds_ in stage_times.items()))
+
+    combined_blacklist_hj = len(router.blacklist)
+    other_lines_hj = len(router.other_lines)
+    print(f"blacklist行数: {combined_blacklist_hj} ")
+    print(f"live.txt行数: {all_lines_hj} ")
+    print(f"others.txt行数: {other_lines_hj} ")
+    print(f"等价源合并: {sum(bucket.merged for bucket in router.category_buckets.values())} 条")
+    print(f"HTTP缓存: {default_cache().stats}")
+    print(f"GitHub镜像耗时: {default_mirror_stats().summary()}")
+    name_cache_info = normalize_channel_name.cache_info()
+    # 多进程解析时大部分频道名在子进程中标准化，这里只统计主进程
+    scope = "主进程，不含解析子进程" if parse_pool is not None else "单进程解析"
+    print(f"频道名缓存（{scope}）: 命中 {name_cache_info.hits} 次, 未命中 {name_cache_info.misses} 次, 缓存 {name_cache_info.currsize} 条")
+
+if __name__ == "__main__":
+    main()
+
+#备用1：http://tonkiang.us
+#备用2：https://www.zoomeye.hk,https://www.shodan.io,https://tv.cctv.com/live/
+#备用3：(BlackList检测对象)http,rtmp,p3p,rtp（rtsp，p2p）
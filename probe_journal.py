@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+检测结果日志（JSONL，只追加）
+  - 每条检测完成立即追加一行并写入系统缓冲区，进程被杀也不丢已完成的结果
+  - 重新运行时读入日志，已检测过的url不再检测（最后一行可能只写了一半，忽略；之后追加的记录另起一行）
+  - 超过 JOURNAL_MAX_AGE 的记录视为上一轮的残留，不再沿用
+  - 本轮全部完成、结果文件写好后删除日志
+"""
+
+import json
+import os
+import time
+
+JOURNAL_PATH = os.getenv("JOURNAL_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "check_journal.jsonl"))
+# 秒；检测工作流每周运行一次，被中断的日志要到下周才会用到，默认8天
+JOURNAL_MAX_AGE = float(os.getenv("JOURNAL_MAX_AGE", str(8 * 24 * 3600)))
+
+
+def ends_with_newline(path):
+    with open(path, "rb") as file:
+        file.seek(-1, os.SEEK_END)
+        return file.read(1) == b"\n"
+
+
+class ProbeJournal:
+    def __init__(self, path=JOURNAL_PATH, max_age=JOURNAL_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.entries = {}  # url -> 记录
+        self.resumed = 0  # 从已有日志读入的记录数
+        self._file = None
+
+    def load(self, now=None):
+        """读入已有日志，返回 {url: 记录}"""
+        now = time.time() if now is None else now
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # 被中断时写了一半的行
+                    if isinstance(entry, dict) and "url" in entry and now - entry.get("checked_at", 0) < self.max_age:
+                        self.entries[entry["url"]] = entry
+        except FileNotFoundError:
+            pass
+        self.resumed = len(self.entries)
+        return self.entries
+
+    def record(self, url, ok, latency=None, error=None, segment_ttfb=None):
+        """追加一条检测结果"""
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+            if self._file.tell() and not ends_with_newline(self.path):
+                self._file.write("\n")  # 上次被中断时最后一行只写了一半，不能接在后面
+        entry = {"url": url, "ok": bool(ok), "latency": latency, "error": error,
+                 "segment_ttfb": segment_ttfb, "checked_at": time.time()}
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.entries[url] = entry
+        return entry
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        """本轮完成后删除日志"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
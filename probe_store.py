@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+直播源检测结果库（SQLite，按url保存）
+  - 保存最近一次检测的结果、响应时间、检测时间、出错信息及连续成功/失败次数
+  - 自适应有效期：结果越稳定（连续相同结果越多）有效期越长，时好时坏的url很快过期
+  - 检测脚本只重新检测已过期的url，未过期的直接使用上次结果
+  - HLS源另存最近一次深度检测的分片首字节时间（latency为播放列表响应时间）
+  - 历史可靠性：按url和host保存响应时间EWMA、成功率EWMA及最近若干次响应时间（算p95），
+    每次更新O(1)，每条记录大小固定，长期没有检测的记录定期删除；据此给出可靠性评分
+"""
+
+import math
+import os
+import sqlite3
+import time
+import zlib
+from collections import namedtuple
+from urllib.parse import urlparse
+
+PROBE_STORE_PATH = os.getenv("PROBE_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "probe_store.sqlite3"))
+PROBE_TTL_MIN = float(os.getenv("PROBE_TTL_MIN", str(24 * 3600)))  # 秒，刚变化的结果
+PROBE_TTL_MAX = float(os.getenv("PROBE_TTL_MAX", str(14 * 24 * 3600)))  # 秒，长期稳定的结果
+PROBE_TTL_JITTER = float(os.getenv("PROBE_TTL_JITTER", "0.2"))  # 按url在 ±20% 内错开有效期，避免同一批url同时过期
+PROBE_RETENTION = float(os.getenv("PROBE_RETENTION", str(60 * 24 * 3600)))  # 秒，超过这么久没检测的记录删除
+PROBE_EWMA_ALPHA = float(os.getenv("PROBE_EWMA_ALPHA", "0.3"))  # url新样本权重
+PROBE_HOST_EWMA_ALPHA = float(os.getenv("PROBE_HOST_EWMA_ALPHA", "0.01"))  # host每次检测有很多样本，权重取小
+PROBE_RECENT_SAMPLES = int(os.getenv("PROBE_RECENT_SAMPLES", "20"))  # 保留最近多少次成功的响应时间
+SCORE_LATENCY_REF = 1000.0  # ms，p95为该值时响应时间系数为0.5
+SCORE_MIN_SAMPLES = 3  # url样本少于该数时，评分按比例参考所在host
+
+ProbeResult = namedtuple("ProbeResult", "url ok latency checked_at ok_streak fail_streak error samples ewma_latency ewma_success recent segment_ttfb")
+HostStats = namedtuple("HostStats", "host checked_at samples ewma_latency ewma_success recent")
+
+# 历史字段：(样本数, 响应时间EWMA, 成功率EWMA, 最近响应时间)
+EMPTY_HISTORY = (0, None, None, ())
+HISTORY_COLUMNS = [
+    ("samples", "INTEGER NOT NULL DEFAULT 0"),
+    ("ewma_latency", "REAL"),
+    ("ewma_success", "REAL"),
+    ("recent", "TEXT NOT NULL DEFAULT ''"),
+]
+RESULT_COLUMNS = HISTORY_COLUMNS + [("segment_ttfb", "REAL")]
+
+
+def update_history(history, ok, latency, alpha=PROBE_EWMA_ALPHA):
+    """加入一次检测结果，返回新的历史字段；样本少于 1/alpha 时相当于算术平均，之后为EWMA"""
+    samples, ewma_latency, ewma_success, recent = history
+    success = 1.0 if ok else 0.0
+    weight = max(alpha, 1 / (samples + 1))
+    ewma_success = success if ewma_success is None else ewma_success + weight * (success - ewma_success)
+    if ok and latency is not None:
+        ewma_latency = latency if ewma_latency is None else ewma_latency + weight * (latency - ewma_latency)
+        recent = (tuple(recent) + (round(latency, 1),))[-PROBE_RECENT_SAMPLES:]
+    return samples + 1, ewma_latency, ewma_success, tuple(recent)
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def history_score(samples, ewma_success, recent):
+    """可靠性评分 0~1：成功率EWMA × 响应时间系数（按p95）；没有样本返回None"""
+    if not samples:
+        return None
+    p95 = percentile(recent, 0.95)
+    if p95 is None:
+        return 0.0  # 从未成功
+    return ewma_success * SCORE_LATENCY_REF / (SCORE_LATENCY_REF + p95)
+
+
+def encode_recent(recent):
+    return ",".join(f"{value:g}" for value in recent)
+
+
+def decode_recent(text):
+    return tuple(float(value) for value in text.split(",")) if text else ()
+
+
+def get_host(url):
+    return urlparse(url).netloc
+
+
+class ProbeStore:
+    def __init__(self, path=PROBE_STORE_PATH, ttl_min=PROBE_TTL_MIN, ttl_max=PROBE_TTL_MAX):
+        self.path = path
+        self.ttl_min = ttl_min
+        self.ttl_max = ttl_max
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS probe_results ("
+            " url TEXT PRIMARY KEY,"
+            " ok INTEGER NOT NULL,"
+            " latency REAL,"
+            " checked_at REAL NOT NULL,"
+            " ok_streak INTEGER NOT NULL DEFAULT 0,"
+            " fail_streak INTEGER NOT NULL DEFAULT 0,"
+            " error TEXT)")
+        self._add_missing_columns("probe_results", RESULT_COLUMNS)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS host_stats ("
+            " host TEXT PRIMARY KEY,"
+            " checked_at REAL NOT NULL,"
+            " samples INTEGER NOT NULL DEFAULT 0,"
+            " ewma_latency REAL,"
+            " ewma_success REAL,"
+            " recent TEXT NOT NULL DEFAULT '')")
+        self._pending = {}  # 未写入的检测结果
+        self._hosts = {}  # 已读取或更新过的host统计
+        self._dirty_hosts = set()
+
+    def _add_missing_columns(self, table, columns):
+        # 旧版本建的库没有历史字段，补上
+        existing = {row[1] for row in self.db.execute(f"PRAGMA table_info({table})")}
+        for name, definition in columns:
+            if name not in existing:
+                self.db.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+    def get_many(self, urls):
+        """读取多个url的结果，返回 {url: ProbeResult}"""
+        results = {}
+        urls = list(urls)
+        for i in range(0, len(urls), 500):  # SQLite参数个数有上限，分批查询
+            batch = urls[i:i + 500]
+            rows = self.db.execute(
+                f"SELECT url, ok, latency, checked_at, ok_streak, fail_streak, error, samples, ewma_latency, ewma_success, recent, segment_ttfb"
+                f" FROM probe_results WHERE url IN ({','.join('?' * len(batch))})", batch)
+            for row in rows:
+                results[row[0]] = ProbeResult(row[0], bool(row[1]), *row[2:10], decode_recent(row[10]), row[11])
+        for url in urls:
+            if url in self._pending:
+                results[url] = self._pending[url]
+        return results
+
+    def ok_urls(self):
+        """最近一次检测成功的全部url（学习镜像host用）"""
+        urls = {url for (url,) in self.db.execute("SELECT url FROM probe_results WHERE ok = 1")}
+        for url, result in self._pending.items():
+            (urls.add if result.ok else urls.discard)(url)
+        return urls
+
+    def get_host(self, host):
+        stats = self._hosts.get(host)
+        if stats is None:
+            row = self.db.execute(
+                "SELECT host, checked_at, samples, ewma_latency, ewma_success, recent FROM host_stats WHERE host = ?", (host,)).fetchone()
+            stats = HostStats(*row[:5], decode_recent(row[5])) if row else HostStats(host, 0.0, *EMPTY_HISTORY)
+            self._hosts[host] = stats
+        return stats
+
+    def ttl(self, result):
+        """有效期：每多一次相同结果翻倍，最长 ttl_max，再按url固定错开"""
+        streak = max(result.ok_streak, result.fail_streak, 1)
+        ttl = min(self.ttl_max, self.ttl_min * 2 ** min(streak - 1, 32))
+        spread = (zlib.crc32(result.url.encode("utf-8")) % 1000) / 1000 * 2 - 1  # -1 ~ 1
+        return ttl * (1 + PROBE_TTL_JITTER * spread)
+
+    def is_fresh(self, result, now=None):
+        now = time.time() if now is None else now
+        return now - result.checked_at < self.ttl(result)
+
+    def record(self, url, ok, latency=None, previous=None, checked_at=None, error=None, segment_ttfb=None):
+        """记录一次检测结果，previous为该url上次的结果（没有时为None），error为检测出错信息，
+        segment_ttfb为HLS分片首字节时间（非HLS或未深度检测时为None）"""
+        if previous is None:
+            previous = self._pending.get(url)
+        checked_at = time.time() if checked_at is None else checked_at
+        ok_streak = (previous.ok_streak if previous else 0) + 1 if ok else 0
+        fail_streak = 0 if ok else (previous.fail_streak if previous else 0) + 1
+        history = update_history(previous[7:11] if previous else EMPTY_HISTORY, ok, latency)
+        result = ProbeResult(url, bool(ok), latency, checked_at, ok_streak, fail_streak, error, *history, segment_ttfb)
+        self._pending[url] = result
+        host = get_host(url)
+        self._hosts[host] = HostStats(host, checked_at, *update_history(self.get_host(host)[2:], ok, latency, PROBE_HOST_EWMA_ALPHA))
+        self._dirty_hosts.add(host)
+        return result
+
+    def score(self, result):
+        """url的可靠性评分 0~1，样本少时按比例参考host评分；没有任何历史返回None"""
+        if result is None:
+            return None
+        url_score = history_score(result.samples, result.ewma_success, result.recent)
+        host = self.get_host(get_host(result.url))
+        host_score = history_score(host.samples, host.ewma_success, host.recent)
+        if url_score is None or host_score is None or result.samples >= SCORE_MIN_SAMPLES:
+            return url_score if url_score is not None else host_score
+        weight = result.samples / SCORE_MIN_SAMPLES
+        return weight * url_score + (1 - weight) * host_score
+
+    def flush(self):
+        with self.db:
+            if self._pending:
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO probe_results"
+                    " (url, ok, latency, checked_at, ok_streak, fail_streak, error, samples, ewma_latency, ewma_success, recent, segment_ttfb)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(r.url, int(r.ok), *r[2:10], encode_recent(r.recent), r.segment_ttfb) for r in self._pending.values()])
+            if self._dirty_hosts:
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO host_stats (host, checked_at, samples, ewma_latency, ewma_success, recent)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    [(*self._hosts[host][:5], encode_recent(self._hosts[host].recent)) for host in self._dirty_hosts])
+        self._pending.clear()
+        self._dirty_hosts.clear()
+
+    def prune(self, now=None):
+        """删除超过保留期没有检测过的url和host，返回删除的url数"""
+        cutoff = (time.time() if now is None else now) - PROBE_RETENTION
+        with self.db:
+            removed = self.db.execute("DELETE FROM probe_results WHERE checked_at < ?", (cutoff,)).rowcount
+            self.db.execute("DELETE FROM host_stats WHERE checked_at < ?", (cutoff,))
+        return removed
+
+    def close(self):
+        self.flush()
+        self.prune()
+        self.db.close()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+上游直播源内容的流式解码与分行（各脚本共用）
+  - 按块增量解码、分行，收到一块即可产出其中的完整行，不需要整个响应体都在内存中
+  - 开头的ASCII部分各编码结果相同，直接产出；编码由出现非ASCII字节后的 SNIFF_BYTES 字节判定：
+    按源记住上次的编码，先用它严格解码，出错时再依次尝试 utf-8、gbk、iso-8859-1；
+    读到后面解码出错时，剩余部分改用下一个编码，并记住新编码；utf-8 BOM 去掉
+  - 按第一行判断 M3U/TXT，M3U 由调用方给出的转换函数逐行转换为 "频道名,url"
+  - 分行与 str.split('\n') 相同（保留行尾的 \r）
+"""
+
+import codecs
+import json
+import os
+import threading
+from itertools import chain
+
+SNIFF_BYTES = 1024
+ENCODINGS = ("utf-8", "gbk", "iso-8859-1")  # iso-8859-1 不会解码失败，放在最后
+ENCODING_MEMO_PATH = os.getenv("ENCODING_MEMO_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "source_encodings.json"))
+
+
+class EncodingMemo:
+    """记住每个源上次使用的编码（JSON文件）"""
+
+    def __init__(self, path=ENCODING_MEMO_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._changed = False
+        try:
+            with open(path, encoding="utf-8") as file:
+                self._encodings = json.load(file)
+        except (OSError, ValueError):
+            self._encodings = {}
+
+    def get(self, source):
+        return self._encodings.get(source)
+
+    def set(self, source, encoding):
+        with self._lock:
+            if self._encodings.get(source) != encoding:
+                self._encodings[source] = encoding
+                self._changed = True
+
+    def save(self):
+        with self._lock:
+            if not self._changed:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(self._encodings, file, ensure_ascii=False, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            self._changed = False
+
+
+def encoding_order(remembered=None):
+    """依次尝试的编码：上次的编码在前（iso-8859-1 不会解码失败，严格解码也判断不出对错，不提前）"""
+    if remembered in ENCODINGS[:-1]:
+        return (remembered,) + tuple(encoding for encoding in ENCODINGS if encoding != remembered)
+    return ENCODINGS
+
+
+def sniff_encoding(head, remembered=None):
+    """按字节判定编码：按 encoding_order 依次严格解码，返回第一个不出错的编码；有utf-8 BOM时为utf-8"""
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8"
+    for encoding in encoding_order(remembered):
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(head)  # 不要求结尾是完整字符
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return ENCODINGS[-1]
+
+
+class SourceLines:
+    """逐行迭代上游内容（M3U已转换为 "频道名,url"），迭代完成后 count 为产出的行数，encoding 为最终使用的编码"""
+
+    def __init__(self, chunks, m3u_converter=None, source=None, memo=None):
+        self.source = source
+        self.memo = memo
+        self.m3u_converter = m3u_converter
+        self.is_m3u = False
+        self.encoding = None
+        self.count = 0
+        self._chunks = iter(chunks)
+
+    def _decoded(self):
+        remembered = self.memo.get(self.source) if self.memo is not None and self.source else None
+        encodings = encoding_order(remembered)
+        decoder = None
+
+        def decode(chunk, final=False):
+            nonlocal decoder
+            while True:
+                pending = decoder.getstate()[0]
+                try:
+                    return decoder.decode(chunk, final)
+                except UnicodeDecodeError:
+                    # 后面的内容不是这个编码：剩余部分（含上一块未解码完的字节）改用下一个编码
+                    self.encoding = encodings[encodings.index(self.encoding) + 1]
+                    decoder = codecs.getincrementaldecoder(self.encoding)()
+                    chunk = pending + chunk
+
+        def start(head):
+            # 判定编码，返回去掉BOM（只在内容开头）的内容
+            nonlocal decoder
+            self.encoding = sniff_encoding(head[:SNIFF_BYTES], remembered)
+            decoder = codecs.getincrementaldecoder(self.encoding)()
+            if not ascii_prefix and head.startswith(codecs.BOM_UTF8):
+                return head[len(codecs.BOM_UTF8):]
+            return head
+
+        head = b""
+        ascii_prefix = False  # 判定编码前已产出的ASCII部分
+        for chunk in self._chunks:
+            if decoder is None:
+                if not head and chunk.isascii():
+                    ascii_prefix = ascii_prefix or bool(chunk)
+                    yield chunk.decode("ascii")
+                    continue
+                # 攒够判定编码所需的字节
+                head += chunk
+                if len(head) < SNIFF_BYTES:
+                    continue
+                chunk = start(head)
+            text = decode(chunk)
+            if text:
+                yield text
+        if decoder is None and head:
+            yield decode(start(head))
+        if decoder is None:
+            # 全是ASCII：不知道是什么编码，不改记住的编码
+            self.encoding = encodings[0]
+            return
+        yield decode(b"", final=True)
+        if self.memo is not None and self.source:
+            self.memo.set(self.source, self.encoding)
+
+    def _lines(self):
+        rest = ""
+        for text in self._decoded():
+            lines = (rest + text).split("\n")
+            rest = lines.pop()
+            yield from lines
+        yield rest
+
+    def __iter__(self):
+        lines = self._lines()
+        first_line = next(lines)
+        self.is_m3u = first_line.strip().startswith("#EXTM3U")
+        lines = chain([first_line], lines)
+        if self.is_m3u and self.m3u_converter is not None:
+            lines = self.m3u_converter(lines)
+        for line in lines:
+            self.count += 1
+            yield line
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+等价直播源索引（各脚本共用）
+  - 同一路流常以不同的url出现：签名/时间戳参数（token、wsSecret、txTime等）每次不同，或同一路径放在多个镜像CDN上
+  - 指纹 = host组 + 路径 + 稳定参数：去掉易变参数，其余参数排序；host按历史学到的镜像关系归为一组
+  - 同一频道名下指纹相同的url视为同一个源的多个备选，只发布/检测其中一个，其他作为备用；
+    不同频道即使url形式相同（如 go?id=不同的值）也不合并
+  - 镜像host组从检测历史中学习：两个host有足够多相同路径都检测成功，即视为镜像
+"""
+
+import os
+import re
+from collections import defaultdict
+
+from url_dedup import drop_default_port, lower_host, root_path, split_url
+
+# 易变参数名（不区分大小写）：只收各CDN鉴权、防缓存用的参数名，可用环境变量 EQUIV_VOLATILE_PARAMS 追加（逗号分隔）
+# sid、uuid 等名字有的源用来区分频道，不在此列
+VOLATILE_PARAMS = {
+    "token", "access_token", "auth_key", "authkey", "wssecret", "wstime", "txsecret", "txtime",
+    "sign", "signature", "secret", "expires", "expire", "nonce", "vkey", "rand", "random", "_",
+}
+VOLATILE_PARAMS |= {name.strip().lower() for name in os.getenv("EQUIV_VOLATILE_PARAMS", "").split(",") if name.strip()}
+EQUIV_INDEX = os.getenv("EQUIV_INDEX", "1") == "1"  # 为0时关闭等价合并，只按url去重
+HOST_GROUPS_FILE = os.getenv("HOST_GROUPS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "whitelist-blacklist", "host_groups.txt"))
+# 较短、含义不唯一的时间参数名，值是unix时间戳（秒或毫秒）时才视为易变，如 t=1700000000 合并、t=cctv1 不合并
+TIMESTAMP_PARAMS = {"t", "ts", "e", "st", "time", "timestamp"}
+TIMESTAMP_RE = re.compile(r"\d{10}(?:\d{3})?")
+EQUIV_GROUP_MIN_SHARED = int(os.getenv("EQUIV_GROUP_MIN_SHARED", "3"))  # 两个host至少有几个相同路径才算镜像
+EQUIV_GROUP_MAX_HOSTS = int(os.getenv("EQUIV_GROUP_MAX_HOSTS", "8"))  # 超过这么多host都有的路径太通用（如 /live/index.m3u8），不参与学习
+
+
+def stable_query(query):
+    """去掉易变参数，其余排序"""
+    if not query:
+        return ""
+    params = []
+    for param in query.split("&"):
+        if not param:
+            continue
+        name, _, value = param.partition("=")
+        name = name.lower()
+        if name in VOLATILE_PARAMS:
+            continue
+        if name in TIMESTAMP_PARAMS and TIMESTAMP_RE.fullmatch(value):
+            continue
+        params.append(param)
+    return "&".join(sorted(params))
+
+
+def path_key(url):
+    """(协议, host, 路径+稳定参数)，host已转小写、去默认端口；# 后面的内容保留（源中常用 # 连接多个url）"""
+    parts = root_path(drop_default_port(lower_host(split_url(url))))
+    query = stable_query(parts.query)
+    path = parts.path + (f"?{query}" if query else "")
+    return parts.scheme, parts.netloc, path if parts.fragment is None else f"{path}#{parts.fragment}"
+
+
+def learn_host_groups(urls, min_shared=EQUIV_GROUP_MIN_SHARED, max_hosts=EQUIV_GROUP_MAX_HOSTS):
+    """从检测成功的url学习镜像host组，返回 [host组, ...]（每组按host排序）"""
+    hosts_by_path = defaultdict(set)
+    for url in urls:
+        scheme, host, path = path_key(url)
+        if host and path.count("/") > 1:  # 至少两级路径，过短的路径太通用
+            hosts_by_path[scheme, path].add(host)
+    shared = defaultdict(int)
+    for hosts in hosts_by_path.values():
+        if 1 < len(hosts) <= max_hosts:
+            hosts = sorted(hosts)
+            for i, a in enumerate(hosts):
+                for b in hosts[i + 1:]:
+                    shared[a, b] += 1
+    # 并查集合并镜像host
+    parent = {}
+
+    def find(host):
+        parent.setdefault(host, host)
+        while parent[host] != host:
+            parent[host] = parent[parent[host]]
+            host = parent[host]
+        return host
+
+    for (a, b), count in shared.items():
+        if count >= min_shared:
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+    groups = defaultdict(list)
+    for host in parent:
+        groups[find(host)].append(host)
+    return sorted(sorted(hosts) for hosts in groups.values())
+
+
+def read_host_groups(file_path=HOST_GROUPS_FILE):
+    """读取host组文件（每行一组，空格分隔），文件不存在返回空列表"""
+    try:
+        with open(file_path, encoding="utf-8") as file:
+            return [line.split() for line in file if line.strip() and not line.startswith("#")]
+    except FileNotFoundError:
+        return []
+
+
+def write_host_groups(groups, file_path=HOST_GROUPS_FILE):
+    with open(file_path, "w", encoding="utf-8") as file:
+        file.write("# 镜像host组（检测脚本根据历史检测结果生成），每行一组\n")
+        for hosts in groups:
+            file.write(" ".join(hosts) + "\n")
+
+
+class EquivalenceIndex:
+    def __init__(self, host_groups=()):
+        self.host_group = {}  # host -> 组名（组内第一个host）
+        for hosts in host_groups:
+            for host in hosts:
+                self.host_group[host] = hosts[0]
+        self.groups = {}  # (频道名, 指纹) -> [加入顺序的备选]
+        self.precomputed = {}  # url -> 已在别处（如解析子进程）算好的指纹，取用一次后删除
+
+    def fingerprint(self, url):
+        """url的指纹，如 http://镜像组/live/1.m3u8?id=5；不含频道名，调用方与频道名一起作为键"""
+        key = self.precomputed.pop(url, None)
+        if key is not None:
+            return key
+        scheme, host, path = path_key(url)
+        return f"{scheme}://{self.host_group.get(host, host)}{path}"
+
+    def add(self, url, item=None, name=""):
+        """加入频道name的url（item为要保存的对象，默认url本身），返回是否为该源的第一个"""
+        alternates = self.groups.setdefault((name, self.fingerprint(url)), [])
+        alternates.append(url if item is None else item)
+        return len(alternates) == 1
+
+    @property
+    def merged(self):
+        """被合并为备选的url个数"""
+        return sum(len(alternates) - 1 for alternates in self.groups.values())
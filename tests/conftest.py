@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+# 测试直接引用仓库根目录的模块和检测脚本目录下的模块（stream_checker 等）；
+# 两处都有 main.py，import main 得到的是根目录的
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "assets", "whitelist-blacklist"))
+sys.path.insert(0, ROOT)
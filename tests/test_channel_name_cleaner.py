@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""编译版频道名清理与逐条replace的结果一致"""
+
+import os
+import random
+
+import main
+from conftest import ROOT
+
+
+def live_txt_names():
+    names = []
+    with open(os.path.join(ROOT, "live.txt"), encoding="utf-8") as file:
+        for line in file:
+            if "," in line and "#genre#" not in line:
+                names.append(line.split(",", 1)[0])
+    return names
+
+
+def expected(name):
+    return main.clean_channel_name_sequential(name, main.removal_list, main.rewrite_list)
+
+
+def test_live_txt_names():
+    names = live_txt_names()
+    assert names
+    clean = main.compile_channel_name_cleaner(main.removal_list, main.rewrite_list)
+    mismatches = [name for name in names if clean(name) != expected(name)]
+    assert mismatches == []
+
+
+def test_rule_combinations():
+    # 规则片段随机拼接，覆盖相邻、交叠、剔除后拼出新匹配等情况
+    pieces = main.removal_list + [old for old, _ in main.rewrite_list] + ["CCTV", "-", "0", "1", "New", "_", "卫视", "H", "D"]
+    rng = random.Random(4)
+    clean = main.compile_channel_name_cleaner(main.removal_list, main.rewrite_list)
+    for _ in range(20000):
+        name = "".join(rng.choice(pieces) for _ in range(rng.randint(1, 6)))
+        assert clean(name) == expected(name), name
+
+
+def test_overlapping_rules():
+    # 后面的规则与前面的规则交叠，一次扫描结果不同，必须回退到逐条replace
+    removal_list, rewrite_list = ["bc"], [("ab", "X"), ("c", "Y")]
+    clean = main.compile_channel_name_cleaner(removal_list, rewrite_list)
+    for name in ["abc", "aabcc", "abbcc", "xbcx", "abcab"]:
+        assert clean(name) == main.clean_channel_name_sequential(name, removal_list, rewrite_list)
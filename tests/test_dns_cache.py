@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""DnsCache：用替身解析函数测试缓存有效期、失败缓存与超时快速失败"""
+
+import asyncio
+import gc
+import socket
+import threading
+import time
+
+import pytest
+
+from dns_cache import DnsCache
+
+
+class StandInResolver:
+    # 按表返回IP，不在表中的host解析失败；delay 模拟慢DNS；记录每个host被解析的次数
+    def __init__(self, table, delay=0.0):
+        self.table = table
+        self.delay = delay
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, host):
+        with self._lock:
+            self.calls[host] = self.calls.get(host, 0) + 1
+        time.sleep(self.delay)
+        if host not in self.table:
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        return list(self.table[host])
+
+
+def test_positive_entry_expires_after_ttl():
+    resolver = StandInResolver({"a.example": ["10.0.0.1"]})
+    dns = DnsCache(resolver, ttl=0.1)
+    assert dns.resolve("a.example") == ["10.0.0.1"]
+    resolver.table["a.example"] = ["10.0.0.2"]
+    assert dns.resolve("a.example") == ["10.0.0.1"]  # 有效期内用缓存
+    time.sleep(0.15)
+    assert dns.resolve("a.example") == ["10.0.0.2"]
+    assert resolver.calls["a.example"] == 2
+    assert dns.stats["hit"] == 1 and dns.stats["miss"] == 2
+
+
+def test_failure_is_cached():
+    resolver = StandInResolver({})
+    dns = DnsCache(resolver, negative_ttl=0.1)
+    for _ in range(3):
+        with pytest.raises(socket.gaierror):
+            dns.resolve("missing.example")
+    assert resolver.calls["missing.example"] == 1
+    assert dns.stats["negative_hit"] == 2
+    time.sleep(0.15)
+    with pytest.raises(socket.gaierror):
+        dns.resolve("missing.example")
+    assert resolver.calls["missing.example"] == 2  # 失败记录过期后重新解析
+
+
+def test_slow_lookup_fails_fast():
+    resolver = StandInResolver({"slow.example": ["10.0.0.3"]}, delay=0.5)
+    dns = DnsCache(resolver, timeout=0.1)
+    start = time.monotonic()
+    with pytest.raises(socket.timeout):
+        dns.resolve("slow.example")
+    # 超时按失败缓存：后续请求直接失败，不再等
+    with pytest.raises(socket.timeout):
+        dns.resolve("slow.example")
+    assert time.monotonic() - start < 0.4
+    time.sleep(0.5)
+    # 解析线程稍后完成，成功的结果覆盖超时记录
+    assert dns.resolve("slow.example") == ["10.0.0.3"]
+    assert resolver.calls["slow.example"] == 1
+
+
+def test_concurrent_lookups_share_one_resolution():
+    resolver = StandInResolver({"a.example": ["10.0.0.1"]}, delay=0.1)
+    dns = DnsCache(resolver)
+
+    async def run():
+        return await asyncio.gather(*(dns.resolve_async("a.example") for _ in range(20)))
+
+    assert asyncio.run(run()) == [["10.0.0.1"]] * 20
+    assert resolver.calls["a.example"] == 1
+
+
+def test_ip_address_is_not_resolved():
+    resolver = StandInResolver({})
+    dns = DnsCache(resolver)
+    assert dns.resolve("127.0.0.1") == ["127.0.0.1"]
+    assert resolver.calls == {}
+
+
+def test_prefetched_failures_are_not_left_unretrieved():
+    # 预解析失败、等待者超时放弃的解析，之后都不应报 "Future exception was never retrieved"
+    resolver = StandInResolver({"a.example": ["10.0.0.1"]}, delay=0.2)
+    dns = DnsCache(resolver, timeout=0.05)
+    unhandled = []
+
+    async def run():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: unhandled.append(context["message"]))
+        assert dns.prefetch(["a.example", "b.example", "c.example", "a.example", "10.0.0.9", None]) == 3
+        for host in ("b.example", "c.example"):
+            with pytest.raises(socket.timeout):
+                await dns.resolve_async(host)
+        await asyncio.sleep(0.4)  # 解析线程全部结束
+        gc.collect()
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert unhandled == []
+    assert dns.resolve("a.example") == ["10.0.0.1"]
+    with pytest.raises(socket.gaierror):
+        dns.resolve("b.example")
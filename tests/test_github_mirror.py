@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""GitHub镜像竞速：本地替身镜像（正常/慢/失败/空文件）上的 race_open 与 split_raw_url"""
+
+import hashlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError
+
+import pytest
+
+from github_mirror import MirrorStats, race_open, split_raw_url
+from http_cache import HttpCache
+
+PATH = "user/repo/main/live.txt"
+BODY = "CCTV1,http://x/1\n".encode() * 50
+
+
+class MirrorHandler(BaseHTTPRequestHandler):
+    # 路径第一段是镜像的行为：fast 正常，slow 过一会才响应，fail* 返回500，empty 空文件
+    def do_GET(self):
+        kind, _, path = self.path.lstrip("/").partition("/")
+        self.server.requests.append((kind, self.headers.get("If-None-Match")))
+        if kind.startswith("fail") or path != PATH:
+            self.send_error(500)
+            return
+        if kind == "slow":
+            time.sleep(self.server.slow_seconds)
+        body = b"" if kind == "empty" else BODY
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def mirrors():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), MirrorHandler)
+    httpd.requests = []
+    httpd.slow_seconds = 0.6
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.prefix = lambda kind: f"{base}/{kind}/"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def stats(tmp_path):
+    return MirrorStats(str(tmp_path / "mirrors.json"))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HttpCache(str(tmp_path / "http"))
+
+
+def wait_for(condition, seconds=3):
+    deadline = time.monotonic() + seconds
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_split_raw_url():
+    raw = "https://raw.githubusercontent.com/"
+    assert split_raw_url(raw + PATH) == (raw, PATH)
+    assert split_raw_url(f"https://ghfast.top/{raw}{PATH}") == (f"https://ghfast.top/{raw}", PATH)
+    assert split_raw_url(f"https://raw.bgithub.xyz/{PATH}") == ("https://raw.bgithub.xyz/", PATH)
+    assert split_raw_url(raw + "user/repo/live.txt") is None  # 缺少分支
+    assert split_raw_url("https://example.com/user/repo/main/live.txt") is None
+    assert split_raw_url(f"https://gh-proxy.com/{raw}user/repo/main/https://x/a.txt") is None
+
+
+def test_fast_mirror_wins(mirrors, stats, cache):
+    prefix, body = race_open([mirrors.prefix("fast"), mirrors.prefix("slow")], PATH, hedge_delay=1, stats=stats, cache=cache)
+    with body:
+        assert prefix == mirrors.prefix("fast") and body.read() == BODY
+    assert [kind for kind, _ in mirrors.requests] == ["fast"]  # 第一个镜像及时到达，不发对冲请求
+
+
+def test_first_mirror_failing_falls_back(mirrors, stats, cache):
+    fail, fast = mirrors.prefix("fail"), mirrors.prefix("fast")
+    prefix, body = race_open([fail, fast], PATH, hedge_delay=5, stats=stats, cache=cache)
+    with body:
+        assert prefix == fast and body.read() == BODY
+    assert stats._mirrors[fail]["fail"] == 1 and stats._mirrors[fast]["ok"] == 1
+
+
+def test_slow_mirror_loses_race(mirrors, stats, cache):
+    slow, fast = mirrors.prefix("slow"), mirrors.prefix("fast")
+    start = time.monotonic()
+    prefix, body = race_open([slow, fast], PATH, hedge_delay=0.1, stats=stats, cache=cache)
+    with body:
+        assert prefix == fast and body.read() == BODY
+    assert time.monotonic() - start < mirrors.slow_seconds  # 不等慢镜像
+    # 慢镜像的响应到达后关闭，记为取消，不留下写了一半的缓存文件
+    assert wait_for(lambda: stats._mirrors.get(slow, {}).get("cancel") == 1)
+    assert stats.order([slow, fast]) == [fast, slow]
+    assert not [name for name in os.listdir(cache.cache_dir) if name.endswith(".tmp")]
+
+
+def test_all_mirrors_failing_raises_first_error(mirrors, stats, cache):
+    prefixes = [mirrors.prefix("fail"), mirrors.prefix("fail2")]
+    with pytest.raises(HTTPError) as info:
+        race_open(prefixes, PATH, hedge_delay=0.05, stats=stats, cache=cache)
+    assert info.value.code == 500
+    assert stats._mirrors[prefixes[0]]["fail"] == 1 and stats._mirrors[prefixes[1]]["fail"] == 1
+
+
+def test_empty_file(mirrors, stats, cache):
+    prefix, body = race_open([mirrors.prefix("empty")], PATH, stats=stats, cache=cache)
+    with body:
+        assert body.read() == b""
+
+
+def test_mirrors_share_cache_entry(mirrors, stats, cache):
+    # 第一次从 fast 下载；第二次换成 slow 镜像，带上同一个ETag，304后用缓存
+    with race_open([mirrors.prefix("fast")], PATH, stats=stats, cache=cache)[1] as body:
+        body.read()
+    with race_open([mirrors.prefix("slow")], PATH, stats=stats, cache=cache)[1] as body:
+        assert body.from_cache and body.read() == BODY
+    assert mirrors.requests[-1][1] is not None
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""HLS深度检测：本地替身服务器上的 主播放列表 -> 子播放列表 -> 分片、空播放列表、字节预算"""
+
+import asyncio
+
+import stream_checker
+from stream_checker import HlsError, StreamChecker
+
+MASTER = (b"#EXTM3U\n"
+          b"#EXT-X-STREAM-INF:BANDWIDTH=2000000,RESOLUTION=1920x1080\nhi/index.m3u8\n"
+          b"#EXT-X-STREAM-INF:BANDWIDTH=500000,RESOLUTION=640x360\nlo/index.m3u8\n")
+VARIANT = b"#EXTM3U\n#EXT-X-TARGETDURATION:6\n#EXTINF:6.0,\nseg0.ts\n#EXTINF:6.0,\nseg1.ts\n"
+SEGMENT = b"\x47" * 1000
+FILES = {
+    "/master.m3u8": MASTER,
+    "/hi/index.m3u8": VARIANT,
+    "/lo/index.m3u8": VARIANT,
+    "/lo/seg0.ts": SEGMENT,
+    "/empty.m3u8": b"#EXTM3U\n#EXT-X-VERSION:3\n",
+}
+
+
+async def start_server():
+    # 按 FILES 返回内容（不支持Range，总是返回整个文件），记录 (路径, Range请求头)
+    requests = []
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+                path = head[0].split(" ")[1]
+                headers = dict(line.split(": ", 1) for line in head[1:] if ": " in line)
+                requests.append((path, headers.get("Range")))
+                body = FILES.get(path)
+                if body is None:
+                    writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n")
+                else:
+                    content_type = "application/vnd.apple.mpegurl" if path.endswith(".m3u8") else "video/mp2t"
+                    writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\n"
+                                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}", requests
+
+
+def run_check(path):
+    async def run():
+        server, base, requests = await start_server()
+        errors = []
+        checker = StreamChecker(timeout=5, hls_deep=True, on_error=lambda url, e: errors.append(e))
+        url = base + path
+        try:
+            result = await checker.check(url)
+        finally:
+            checker.close_connections()
+            checker.close()
+            server.close()
+        return result, checker.hls_results.get(url), requests, errors, checker._breaker(url).state
+
+    return asyncio.run(run())
+
+
+def test_master_playlist_walks_to_lowest_variant_segment():
+    (elapsed, ok), probe, requests, errors, _ = run_check("/master.m3u8")
+    assert ok and elapsed is not None and errors == []
+    size = stream_checker.HLS_SEGMENT_BYTES
+    assert requests == [("/master.m3u8", None), ("/lo/index.m3u8", None), ("/lo/seg0.ts", f"bytes=0-{size - 1}")]
+    assert probe.bytes_read == len(MASTER) + len(VARIANT) + min(size, len(SEGMENT))
+    assert probe.segment_ttfb_ms is not None
+
+
+def test_empty_playlist_fails_without_tripping_breaker():
+    (elapsed, ok), probe, requests, errors, state = run_check("/empty.m3u8")
+    assert (elapsed, ok, probe) == (None, False, None)
+    assert len(errors) == 1 and isinstance(errors[0], HlsError)
+    assert [path for path, _ in requests] == ["/empty.m3u8"]
+    assert state == "closed"  # 播放列表无效说明host可达，不计入熔断
+
+
+def test_segment_read_is_capped_by_byte_budget(monkeypatch):
+    monkeypatch.setattr(stream_checker, "HLS_BYTE_BUDGET", len(MASTER) + len(VARIANT) + 100)
+    (_, ok), probe, requests, _, _ = run_check("/master.m3u8")
+    assert ok and requests[-1] == ("/lo/seg0.ts", "bytes=0-99")
+    assert probe.bytes_read == stream_checker.HLS_BYTE_BUDGET
+
+
+def test_playlists_exhausting_byte_budget_fail(monkeypatch):
+    monkeypatch.setattr(stream_checker, "HLS_BYTE_BUDGET", len(MASTER) + len(VARIANT))
+    (_, ok), probe, requests, errors, _ = run_check("/master.m3u8")
+    assert not ok and probe is None
+    assert isinstance(errors[0], HlsError) and "字节预算" in str(errors[0])
+    assert [path for path, _ in requests] == ["/master.m3u8", "/lo/index.m3u8"]  # 不再请求分片
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""HttpCache：本地HTTP服务器返回200/304时的缓存、重新验证与淘汰"""
+
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_cache import CachedBody, HttpCache
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # 内容按路径取自 server.bodies；带 If-None-Match 且与当前ETag相同时返回304
+    def do_GET(self):
+        body = self.server.bodies[self.path]
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        self.server.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    httpd.bodies = {}
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    httpd.base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def read(cache, url, **kwargs):
+    with cache.open(url, **kwargs) as body:
+        return body.read(), body
+
+
+def test_200_is_stored(server, tmp_path):
+    server.bodies["/a.txt"] = "CCTV1,http://x/1\n".encode() * 100
+    cache = HttpCache(str(tmp_path))
+    data, body = read(cache, server.base + "/a.txt")
+    assert data == server.bodies["/a.txt"]
+    assert cache.stats == {"hit": 0, "miss": 1, "store": 1, "evict": 0}
+    assert body.content_hash == hashlib.sha256(data).hexdigest()
+    body_path, meta_path = cache._paths(server.base + "/a.txt")
+    assert os.path.exists(body_path) and os.path.exists(meta_path)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_304_reuses_cached_body(server, tmp_path):
+    server.bodies["/a.txt"] = "湖南卫视,http://y/hn\n".encode()
+    cache = HttpCache(str(tmp_path))
+    first, _ = read(cache, server.base + "/a.txt")
+    # 第二次请求带上ETag，服务器返回304，内容来自缓存，hash一开始就知道
+    with cache.open(server.base + "/a.txt") as body:
+        assert body.from_cache
+        assert body.content_hash == hashlib.sha256(first).hexdigest()
+        assert body.read() == first
+    assert server.requests[0][1] is None and server.requests[1][1] is not None
+    assert cache.stats["hit"] == 1 and cache.stats["miss"] == 1
+
+
+def test_changed_content_replaces_entry(server, tmp_path):
+    server.bodies["/a.txt"] = b"old\n"
+    cache = HttpCache(str(tmp_path))
+    read(cache, server.base + "/a.txt")
+    server.bodies["/a.txt"] = b"new\n"
+    data, _ = read(cache, server.base + "/a.txt")
+    assert data == b"new\n"
+    data, body = read(cache, server.base + "/a.txt")
+    assert data == b"new\n" and body.from_cache
+
+
+def test_eviction_over_size_limit(server, tmp_path):
+    for i in range(4):
+        server.bodies[f"/{i}.txt"] = bytes([65 + i]) * 1000
+    cache = HttpCache(str(tmp_path), max_bytes=2500)
+    for i in range(4):
+        read(cache, f"{server.base}/{i}.txt")
+        os.utime(cache._paths(f"{server.base}/{i}.txt")[0], (1000 + i, 1000 + i))  # 使用时间依次递增
+    cache.evict()
+    # 只剩最近使用的两条，最久未使用的body和meta都已删除
+    kept = [i for i in range(4) if os.path.exists(cache._paths(f"{server.base}/{i}.txt")[0])]
+    assert kept == [2, 3]
+    assert not os.path.exists(cache._paths(f"{server.base}/0.txt")[1])
+    assert cache.stats["evict"] == 2
+    # 被淘汰的url再次请求时不带条件，重新下载并缓存
+    server.requests.clear()
+    data, _ = read(cache, f"{server.base}/0.txt")
+    assert data == b"A" * 1000 and server.requests == [("/0.txt", None)]
+
+
+def test_304_after_body_evicted_refetches(server, tmp_path):
+    server.bodies["/a.txt"] = b"CCTV2,http://x/2\n"
+    cache = HttpCache(str(tmp_path))
+    read(cache, server.base + "/a.txt")
+    body_path, _ = cache._paths(server.base + "/a.txt")
+    load = cache._load
+
+    def load_then_evict(url):
+        # 读到校验信息之后、收到304之前，body被（另一个进程的）淘汰删除
+        meta = load(url)
+        os.remove(body_path)
+        return meta
+
+    cache._load = load_then_evict
+    server.requests.clear()
+    data, body = read(cache, server.base + "/a.txt")
+    # 先发条件请求得到304，发现缓存内容没了，再不带条件重新下载
+    assert server.requests == [("/a.txt", server.requests[0][1]), ("/a.txt", None)]
+    assert server.requests[0][1] is not None
+    assert data == b"CCTV2,http://x/2\n" and not body.from_cache
+    assert os.path.exists(body_path)
+
+
+def test_peek_then_close_discards_partial_entry(server, tmp_path):
+    server.bodies["/big.txt"] = b"x" * (1 << 20)
+    cache = HttpCache(str(tmp_path))
+    body = cache.open(server.base + "/big.txt")
+    assert body.peek()
+    body.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_empty_body(server, tmp_path):
+    server.bodies["/empty.txt"] = b""
+    cache = HttpCache(str(tmp_path))
+    with cache.open(server.base + "/empty.txt") as body:
+        assert body.peek() == b""
+        assert body.read() == b""
+        assert body.content_hash == hashlib.sha256(b"").hexdigest()
+
+
+class BrokenSource:
+    # 第一次读取就出错的响应
+    def read(self, size):
+        raise ConnectionResetError("reset by peer")
+
+    def close(self):
+        pass
+
+
+def test_first_read_error_is_not_hidden(tmp_path):
+    body = CachedBody(HttpCache(str(tmp_path)), "http://x/a.txt", BrokenSource(), headers={"ETag": '"1"'})
+    with pytest.raises(ConnectionResetError):
+        body.peek()
+    body.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_has_validator(server, tmp_path):
+    server.bodies["/a.txt"] = b"a\n"
+    cache = HttpCache(str(tmp_path))
+    assert read(cache, server.base + "/a.txt")[1].has_validator
+    assert read(cache, server.base + "/a.txt")[1].has_validator  # 304
+    # 没有 ETag / Last-Modified 的200响应
+    assert not CachedBody(cache, "http://x/a.txt", None, headers={}).has_validator
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""ProbeJournal：从被中断（最后一行只写了一半）的日志恢复"""
+
+import json
+
+import pytest
+
+from probe_journal import ProbeJournal
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "journal.jsonl")
+
+
+def write_journal(path, urls):
+    journal = ProbeJournal(path)
+    for i, url in enumerate(urls):
+        journal.record(url, i % 2 == 0, 100.0 + i if i % 2 == 0 else None, None if i % 2 == 0 else "timed out")
+    journal.close()
+
+
+def load(path, **kwargs):
+    journal = ProbeJournal(path, **kwargs)
+    journal.load()
+    return journal
+
+
+def test_truncated_last_line_is_ignored(path):
+    write_journal(path, ["http://a/1", "http://a/2"])
+    with open(path, "a", encoding="utf-8") as file:
+        file.write('{"url": "http://a/3", "ok": tr')  # 写到一半被杀
+    journal = load(path)
+    assert list(journal.entries) == ["http://a/1", "http://a/2"] and journal.resumed == 2
+    assert journal.entries["http://a/1"]["latency"] == 100.0
+    assert journal.entries["http://a/2"]["error"] == "timed out"
+
+
+def test_records_after_truncated_line_are_kept(path):
+    write_journal(path, ["http://a/1"])
+    with open(path, "a", encoding="utf-8") as file:
+        file.write('{"url": "http://a/2", "o')
+    journal = load(path)
+    journal.record("http://a/2", True, 50.0)
+    journal.close()
+    # 新记录另起一行，再次恢复时不丢
+    assert list(load(path).entries) == ["http://a/1", "http://a/2"]
+
+
+def test_garbage_and_stale_lines_are_skipped(path):
+    write_journal(path, ["http://a/1"])
+    with open(path, "a", encoding="utf-8") as file:
+        file.write("\n[1, 2]\n{}\nnot json\n")
+        file.write(json.dumps({"url": "http://a/old", "ok": True, "latency": 1, "error": None,
+                               "segment_ttfb": None, "checked_at": 0}) + "\n")
+    assert list(load(path).entries) == ["http://a/1"]
+
+
+def test_later_line_wins(path):
+    write_journal(path, ["http://a/1", "http://a/1"])
+    assert load(path).entries["http://a/1"]["ok"] is False
+
+
+def test_missing_and_removed_journal(path):
+    assert load(path).entries == {}
+    write_journal(path, ["http://a/1"])
+    journal = load(path)
+    journal.remove()
+    assert load(path).entries == {}
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""ProbeStore：自适应有效期、持久化、可靠性评分"""
+
+import pytest
+
+from probe_store import (PROBE_EWMA_ALPHA, PROBE_TTL_JITTER, SCORE_LATENCY_REF, ProbeStore, history_score,
+                         update_history)
+
+URL = "http://a.example/live/1.m3u8"
+HOUR = 3600
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ProbeStore(str(tmp_path / "probe.sqlite3"), ttl_min=HOUR, ttl_max=16 * HOUR)
+    yield store
+    store.db.close()
+
+
+def record_many(store, results, url=URL):
+    result = None
+    for i, ok in enumerate(results):
+        result = store.record(url, ok, 100.0 if ok else None, checked_at=1000.0 + i)
+    return result
+
+
+def test_ttl_doubles_with_each_repeated_success_up_to_max(store):
+    jitter = store.ttl(record_many(store, [True])) / HOUR  # 按url固定的错开系数
+    assert 1 - PROBE_TTL_JITTER <= jitter <= 1 + PROBE_TTL_JITTER
+    ttls = [store.ttl(store.record(URL, True, 100.0)) / (HOUR * jitter) for _ in range(6)]
+    assert ttls == pytest.approx([2, 4, 8, 16, 16, 16])
+
+
+def test_failure_resets_ttl(store):
+    result = record_many(store, [True] * 5 + [False])
+    assert (result.ok_streak, result.fail_streak) == (0, 1)
+    jitter = store.ttl(result) / HOUR
+    assert 1 - PROBE_TTL_JITTER <= jitter <= 1 + PROBE_TTL_JITTER
+    # 连续失败的有效期同样增长，再次成功后重置
+    assert store.ttl(store.record(URL, False)) == pytest.approx(2 * HOUR * jitter)
+    result = store.record(URL, True, 80.0)
+    assert (result.ok_streak, result.fail_streak) == (1, 0)
+    assert store.ttl(result) == pytest.approx(HOUR * jitter)
+
+
+def test_is_fresh_follows_ttl(store):
+    result = record_many(store, [True] * 3)
+    ttl = store.ttl(result)
+    assert store.is_fresh(result, now=result.checked_at + ttl - 1)
+    assert not store.is_fresh(result, now=result.checked_at + ttl + 1)
+
+
+def test_results_persist_across_reopen(store, tmp_path):
+    record_many(store, [True, True, False])
+    store.flush()
+    reopened = ProbeStore(store.path)
+    result = reopened.get_many([URL, "http://other.example/x"])
+    reopened.db.close()
+    assert list(result) == [URL]
+    assert (result[URL].ok, result[URL].ok_streak, result[URL].fail_streak) == (False, 0, 1)
+
+
+def test_history_starts_as_average_then_ewma():
+    history = (0, None, None, ())
+    for ok in (True, False, True):
+        history = update_history(history, ok, 100.0 if ok else None)
+    assert history[0] == 3 and history[2] == pytest.approx(2 / 3)  # 样本少时为算术平均
+    samples = 3
+    while 1 / (samples + 1) > PROBE_EWMA_ALPHA:
+        history = update_history(history, True, 100.0)
+        samples += 1
+    before = history[2]
+    history = update_history(history, False, None)
+    assert history[2] == pytest.approx(before * (1 - PROBE_EWMA_ALPHA))
+
+
+def test_score_decays_with_failures(store):
+    result = record_many(store, [True] * 10)
+    assert store.score(result) == pytest.approx(SCORE_LATENCY_REF / (SCORE_LATENCY_REF + 100.0))
+    scores = [store.score(store.record(URL, False)) for _ in range(3)]
+    assert scores[0] > scores[1] > scores[2] > 0
+    assert scores[1] / scores[0] == pytest.approx(1 - PROBE_EWMA_ALPHA)
+    assert scores[2] / scores[1] == pytest.approx(1 - PROBE_EWMA_ALPHA)
+    # 恢复成功后评分回升
+    assert store.score(store.record(URL, True, 100.0)) > scores[2]
+
+
+def test_score_uses_latency_p95():
+    assert history_score(0, None, ()) is None
+    assert history_score(3, 0.0, ()) == 0.0  # 从未成功
+    assert history_score(20, 1.0, (SCORE_LATENCY_REF,) * 20) == pytest.approx(0.5)
+    # 偶尔的慢响应拉低评分
+    fast = history_score(20, 1.0, (100.0,) * 20)
+    assert history_score(20, 1.0, (100.0,) * 18 + (3000.0,) * 2) < fast
+
+
+def test_new_url_borrows_host_score(store):
+    record_many(store, [True] * 10, url="http://a.example/live/2.m3u8")
+    host_score = store.score(store.get_many(["http://a.example/live/2.m3u8"])["http://a.example/live/2.m3u8"])
+    result = store.record(URL, False)
+    host = store.get_host("a.example")
+    # 只有1个样本（失败，评分0）：按 1/3 参考自己、2/3 参考所在host
+    assert store.score(result) == pytest.approx(2 / 3 * history_score(host.samples, host.ewma_success, host.recent))
+    assert 0 < store.score(result) < host_score
+    assert store.score(None) is None
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""SourceLines：编码判定、BOM、块边界上的多字节字符与行、按源记住的编码"""
+
+import pytest
+
+from source_lines import EncodingMemo, SourceLines, sniff_encoding
+
+TEXT = "央视频道,#genre#\nCCTV1综合,http://a.example/1.m3u8\r\nCCTV2财经,http://a.example/2.m3u8\n"
+
+
+def split_every(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def read_lines(chunks, **kwargs):
+    source_lines = SourceLines(chunks, **kwargs)
+    return list(source_lines), source_lines
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "gbk"])
+def test_detects_encoding(encoding):
+    lines, source_lines = read_lines([TEXT.encode(encoding)])
+    assert lines == TEXT.split("\n")  # 与 str.split('\n') 相同，保留 \r
+    assert source_lines.encoding == encoding and source_lines.count == 4
+
+
+def test_utf8_bom_is_removed():
+    m3u = "#EXTM3U\n#EXTINF:-1,CCTV1\nhttp://a.example/1.m3u8\n"
+    lines, source_lines = read_lines([b"\xef\xbb\xbf" + m3u.encode()], m3u_converter=list)
+    assert source_lines.is_m3u and source_lines.encoding == "utf-8"
+    assert lines[0] == "#EXTM3U"
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "gbk"])
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_chunk_boundaries_split_characters_and_lines(encoding, size):
+    lines, source_lines = read_lines(split_every(TEXT.encode(encoding), size))
+    assert lines == TEXT.split("\n") and source_lines.encoding == encoding
+
+
+def test_encoding_decided_after_long_ascii_prefix():
+    # 开头超过判定字节数的ASCII，之后才出现gbk
+    data = ("#" * 3000 + "\n" + TEXT).encode("gbk")
+    lines, source_lines = read_lines(split_every(data, 512))
+    assert lines == ("#" * 3000 + "\n" + TEXT).split("\n") and source_lines.encoding == "gbk"
+
+
+def test_encoding_switches_when_later_content_fails():
+    # 判定用的开头是合法utf-8，后面出现gbk：剩余部分改用gbk
+    data = "频道".encode() * 600 + "\n".encode() + TEXT.encode("gbk")
+    lines, source_lines = read_lines(split_every(data, 4096))
+    assert lines[-4:] == TEXT.split("\n")[-4:] and source_lines.encoding == "gbk"
+
+
+def test_memo_is_decoded_strictly(tmp_path):
+    memo = EncodingMemo(str(tmp_path / "encodings.json"))
+    url = "http://a.example/live.txt"
+    # 第一次检测为gbk并记住；开头是ASCII也不会直接沿用，要能严格解码非ASCII部分
+    ascii_head = "#" * 2000 + "\n"
+    read_lines([(ascii_head + TEXT).encode("gbk")], source=url, memo=memo)
+    assert memo.get(url) == "gbk"
+    lines, source_lines = read_lines([(ascii_head + TEXT).encode("utf-8")], source=url, memo=memo)
+    assert lines[-4:] == TEXT.split("\n")[-4:] and source_lines.encoding == "utf-8"
+    assert memo.get(url) == "utf-8"
+    # 全是ASCII时不改记住的编码
+    read_lines([b"a,http://a.example/1\n"], source=url, memo=memo)
+    assert memo.get(url) == "utf-8"
+
+
+def test_sniff_encoding_prefers_memo_that_decodes():
+    gbk = TEXT.encode("gbk")
+    assert sniff_encoding(gbk) == "gbk"
+    assert sniff_encoding(TEXT.encode()) == "utf-8"
+    assert sniff_encoding(TEXT.encode(), remembered="gbk") == "utf-8"  # 用gbk解码出错，重新判定
+    assert sniff_encoding(gbk, remembered="iso-8859-1") == "gbk"  # iso-8859-1 不会出错，不提前
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""StreamChecker：本地HTTP服务器上的全局/单host并发上限，host熔断"""
+
+import asyncio
+
+import socket
+
+from stream_checker import HostCircuitBreaker, StreamChecker
+
+
+async def start_fleet(count, delay):
+    # 每个请求delay秒后返回200，记录全局与各端口同时在途的请求数峰值
+    state = {"active": 0, "peak": 0, "hosts": {}}
+
+    async def handle(reader, writer):
+        port = writer.get_extra_info("sockname")[1]
+        host = state["hosts"].setdefault(port, [0, 0])
+        try:
+            while True:
+                await reader.readuntil(b"\r\n\r\n")
+                state["active"] += 1
+                host[0] += 1
+                state["peak"] = max(state["peak"], state["active"])
+                host[1] = max(host[1], host[0])
+                await asyncio.sleep(delay)
+                state["active"] -= 1
+                host[0] -= 1
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    servers = [await asyncio.start_server(handle, "127.0.0.1", 0) for _ in range(count)]
+    return servers, state
+
+
+def run_checks(count, urls_per_server, max_concurrency, per_host, delay=0.05):
+    async def run():
+        servers, state = await start_fleet(count, delay)
+        checker = StreamChecker(max_concurrency=max_concurrency, per_host=per_host, timeout=5)
+        urls = [f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/live/{i}.ts"
+                for server in servers for i in range(urls_per_server)]
+        try:
+            results = await asyncio.gather(*(checker.check(url) for url in urls))
+        finally:
+            checker.close_connections()
+            checker.close()
+            for server in servers:
+                server.close()
+        return results, state
+
+    return asyncio.run(run())
+
+
+def test_per_host_limit():
+    results, state = run_checks(count=2, urls_per_server=20, max_concurrency=100, per_host=4)
+    assert all(ok for _, ok in results)
+    assert [host[1] for host in state["hosts"].values()] == [4, 4]
+
+
+def test_global_limit():
+    results, state = run_checks(count=4, urls_per_server=10, max_concurrency=6, per_host=4)
+    assert all(ok for _, ok in results)
+    assert state["peak"] == 6
+    assert max(host[1] for host in state["hosts"].values()) <= 4
+
+
+def closed_port_url(path):
+    # 绑定后不监听的端口，连接被拒绝
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    return sock, f"http://127.0.0.1:{port}{path}"
+
+
+def test_breaker_trips_then_half_open_trial_decides():
+    async def run():
+        breaker = HostCircuitBreaker(threshold=2, window=60, cooldown=0.05, trials=2, defer=False)
+        assert await breaker.allow() == "probe"
+        assert not breaker.record_failure()
+        assert breaker.record_failure()  # 第二次失败熔断
+        assert await breaker.allow() == "reject"  # 冷却中
+        await asyncio.sleep(0.06)
+        assert await breaker.allow() == "trial"
+        assert await breaker.allow() == "reject"  # 试探期间其他检测不等待时跳过
+        breaker.record_failure(trial=True)
+        assert breaker.state == breaker.OPEN
+        await asyncio.sleep(0.06)
+        assert await breaker.allow() == "trial"
+        breaker.record_success(trial=True)
+        assert breaker.state == breaker.CLOSED and await breaker.allow() == "probe"
+        # 试探次数用完后不再试探
+        breaker.record_failure()
+        breaker.record_failure()
+        await asyncio.sleep(0.06)
+        return await breaker.allow()
+
+    assert asyncio.run(run()) == "reject"
+
+
+def test_rejected_urls_are_skipped_not_failed():
+    async def run():
+        errors = []
+        checker = StreamChecker(per_host=1, timeout=2, on_error=lambda url, e: errors.append(url))
+        sock, base = closed_port_url("")
+        breaker = checker._breaker(base)
+        breaker.threshold, breaker.cooldown, breaker.defer = 2, 60, False
+        urls = [f"{base}/{i}.m3u8" for i in range(5)]
+        try:
+            results = await asyncio.gather(*(checker.check(url) for url in urls))
+        finally:
+            checker.close_connections()
+            checker.close()
+            sock.close()
+        return urls, results, errors, checker
+
+    urls, results, errors, checker = asyncio.run(run())
+    assert results == [(None, False)] * 5
+    # 前两个检测失败并熔断，其余没有检测：不回调 on_error，记入 skipped
+    assert errors == urls[:2]
+    assert checker.skipped == set(urls[2:])
+    assert checker.stats["trip"] == 1 and checker.stats["short_circuit"] == 3
+
+
+def test_cancelled_trial_hands_over_to_waiting_check():
+    async def run():
+        # /hang 不响应直到客户端断开，其他路径返回200
+        async def handle(reader, writer):
+            path = (await reader.readuntil(b"\r\n\r\n")).split(b" ")[1]
+            if path == b"/hang":
+                await reader.read()
+            else:
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        base = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+        checker = StreamChecker(timeout=5)
+        breaker = checker._breaker(base)
+        breaker.cooldown = 0
+        for _ in range(breaker.threshold):
+            breaker.record_failure()
+        try:
+            trial = asyncio.create_task(checker.check(base + "/hang"))
+            await asyncio.sleep(0.1)
+            assert breaker.state == breaker.HALF_OPEN
+            waiting = asyncio.create_task(checker.check(base + "/ok"))
+            await asyncio.sleep(0.1)
+            trial.cancel()
+            # 试探被取消后，等待中的检测接着试探，不会一直等下去
+            result = await asyncio.wait_for(waiting, 2)
+        finally:
+            checker.close_connections()
+            checker.close()
+            server.close()
+        return result, breaker.state, checker.stats["trial"]
+
+    (_, ok), state, trials = asyncio.run(run())
+    assert ok and state == "closed" and trials == 2
+
+
+async def start_rtmp():
+    # 只回 S0/S1 的 rtmp 替身
+    async def handle(reader, writer):
+        await reader.readexactly(1 + 1536)
+        writer.write(b"\x03" + b"\x00" * 1536)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, f"rtmp://127.0.0.1:{server.sockets[0].getsockname()[1]}/live/ch"
+
+
+def test_missing_ffprobe_disables_deep_check(monkeypatch):
+    monkeypatch.setenv("PATH", "")
+    checker = StreamChecker(ffprobe_deep=True)
+    checker.close()
+    assert checker.ffprobe_deep is False
+
+
+def test_ffprobe_launch_error_is_not_a_host_failure():
+    async def run():
+        server, url = await start_rtmp()
+        errors = []
+        checker = StreamChecker(timeout=2, on_error=lambda url, e: errors.append(e))
+        # 启动后ffprobe被删除等情况：进程启动失败
+        checker.ffprobe_deep, checker.ffprobe_path = True, "/nonexistent/ffprobe"
+        breaker = checker._breaker(url)
+        breaker.threshold = 1
+        try:
+            results = [await checker.check(url) for _ in range(3)]
+        finally:
+            checker.close()
+            server.close()
+        return results, errors, breaker.state, checker.ffprobe_deep
+
+    results, errors, state, deep = asyncio.run(run())
+    assert all(ok for _, ok in results)  # 按握手结果判定
+    assert errors == [] and state == "closed" and deep is False
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""等价源指纹：哪些参数视为易变"""
+
+from channel_record import Channel
+from main import ChannelBucket
+from stream_equivalence import EquivalenceIndex, stable_query
+
+
+def test_token_params_are_dropped():
+    assert stable_query("wsSecret=abc&wsTime=65a0b1c2&id=5") == "id=5"
+    assert stable_query("token=x1&txSecret=y&txTime=z") == ""
+    assert stable_query("sign=" + "a" * 32 + "&ch=1") == "ch=1"
+
+
+def test_unknown_param_with_hex_value_is_kept():
+    # 有的源用hex串区分频道（如 go?id=<hex>），参数名不在列表中就不去掉
+    value = "5807dd9aa7a50a68f5e3768116930afc361263489f88b1366196c2b8afd5fcdd"
+    assert stable_query(f"id={value}") == f"id={value}"
+
+
+def test_ambiguous_names_need_timestamp_value():
+    assert stable_query("t=1700000000&id=1") == "id=1"
+    assert stable_query("ts=1700000000123") == ""
+    assert stable_query("t=cctv1") == "t=cctv1"
+    assert stable_query("e=2&st=hd") == "e=2&st=hd"
+
+
+def test_channel_ids_are_kept():
+    index = EquivalenceIndex()
+    assert index.add("http://a.example/live.m3u8?sid=101")
+    assert index.add("http://a.example/live.m3u8?sid=102")
+    assert index.add("http://a.example/play?uuid=cctv1&session=x")
+    assert index.add("http://a.example/play?uuid=cctv2&session=x")
+    assert not index.add("http://a.example/live.m3u8?sid=101&token=t2")
+    assert index.merged == 1
+
+
+def test_fingerprint_format():
+    index = EquivalenceIndex([["a.example", "b.example"]])
+    assert index.fingerprint("HTTP://B.example:80/live/1.m3u8?token=x&id=5") == "http://a.example/live/1.m3u8?id=5"
+    assert index.fingerprint("http://c.example") == "http://c.example/"
+
+
+def test_different_channels_with_same_url_shape_both_survive():
+    # iptv.zkbhj.com/tv/url/go?id=<hex>：不同频道的url只有id的值不同
+    urls = {
+        "东方卫视": "http://iptv.zkbhj.com/tv/url/go?id=5807dd9aa7a50a68f5e3768116930afc361263489f88b1366196c2b8afd5fcdd",
+        "北京卫视": "http://iptv.zkbhj.com/tv/url/go?id=5807dd9aa7a50a68f5e3768116930afc39c6d75a20f6a08cff4747da97ede008",
+    }
+    index = EquivalenceIndex()
+    assert all(index.add(url, name=name) for name, url in urls.items())
+    # url完全相同、频道名不同时也各自保留
+    assert index.add(urls["东方卫视"], name="深圳卫视")
+    assert index.merged == 0
+    # 同一频道只换了token才合并
+    assert not index.add(urls["东方卫视"] + "&token=abc", name="东方卫视")
+    assert index.merged == 1
+
+
+def test_channel_bucket_keeps_channels_sharing_url_shape():
+    bucket = ChannelBucket(equivalence=EquivalenceIndex())
+    assert bucket.add(Channel("东方卫视", "http://iptv.zkbhj.com/tv/url/go?id=" + "a" * 64))
+    assert bucket.add(Channel("北京卫视", "http://iptv.zkbhj.com/tv/url/go?id=" + "b" * 64))
+    assert not bucket.add(Channel("东方卫视", "http://iptv.zkbhj.com/tv/url/go?id=" + "a" * 64 + "&token=1"))
+    assert len(bucket) == 2 and bucket.merged == 1
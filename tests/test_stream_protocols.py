@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""原生协议检测：本地UDP端点（回包/不回包/端口关闭）、udpxy 替身服务器、rtsp/rtmp 替身服务器（认证、握手、超时）"""
+
+import asyncio
+import hashlib
+import re
+import socket
+import time
+from urllib.parse import unquote
+
+import pytest
+
+from dns_cache import default_dns_cache
+from stream_checker import StreamChecker
+from stream_protocols import ProtocolError, RTSPStatusError, is_udpxy_url, probe_rtmp, probe_rtp, probe_rtsp, udpxy_url
+
+TS_PACKET = b"\x47" + b"\x00" * 187
+
+
+class Echo(asyncio.DatagramProtocol):
+    # 收到任何包都回一个RTP头
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.transport.sendto(b"\x80" + b"\x00" * 11, addr)
+
+
+async def open_endpoint(protocol=asyncio.DatagramProtocol):
+    transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(protocol, local_addr=("127.0.0.1", 0))
+    return transport, transport.get_extra_info("sockname")[1]
+
+
+def closed_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_unicast_endpoints():
+    async def run():
+        echo, echo_port = await open_endpoint(Echo)
+        silent, silent_port = await open_endpoint()
+        dns = default_dns_cache()
+        try:
+            start = time.monotonic()
+            results = await asyncio.gather(
+                probe_rtp(f"rtp://127.0.0.1:{echo_port}/ch1", dns, 1),
+                probe_rtp(f"udp://127.0.0.1:{echo_port}", dns, 1),
+                probe_rtp(f"rtp://127.0.0.1:{silent_port}/ch2", dns, 0.3),
+                probe_rtp("rtp://127.0.0.1/no-port", dns, 1))
+            return results, time.monotonic() - start
+        finally:
+            echo.close()
+            silent.close()
+
+    results, seconds = asyncio.run(run())
+    assert results == [True, True, False, False]
+    assert seconds < 1  # 回包的端点不等超时，不回包的端点按自己的超时结束
+
+
+def test_closed_port_fails_without_waiting():
+    start = time.monotonic()
+    assert asyncio.run(probe_rtp(f"rtp://127.0.0.1:{closed_port()}/x", default_dns_cache(), 5)) is False
+    assert time.monotonic() - start < 1  # 端口不可达（ICMP）立刻返回
+
+
+def test_each_endpoint_has_its_own_deadline():
+    # 200个不回包的端点同时检测，总耗时约等于一个超时，而不是按线程数排队
+    async def run():
+        endpoints = [await open_endpoint() for _ in range(200)]
+        checker = StreamChecker(timeout=0.5, per_host=256)
+        try:
+            start = time.monotonic()
+            results = await asyncio.gather(*(checker.check(f"rtp://127.0.0.1:{port}/{i}")
+                                             for i, (_, port) in enumerate(endpoints)))
+            return results, time.monotonic() - start
+        finally:
+            checker.close()
+            for transport, _ in endpoints:
+                transport.close()
+
+    results, seconds = asyncio.run(run())
+    assert not any(ok for _, ok in results)
+    assert seconds < 1.5
+
+
+def test_multicast_group_receives_data():
+    group = "239.255.7.7"
+
+    async def run():
+        port = closed_port()
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)  # 与 probe_rtp 加入组相同，走默认网卡
+        stop = asyncio.Event()
+
+        async def send():
+            while not stop.is_set():
+                sender.sendto(b"\x80" + b"\x00" * 11, (group, port))
+                await asyncio.sleep(0.02)
+
+        try:
+            sender.sendto(b"", (group, port))
+        except OSError as e:
+            pytest.skip(f"本机不支持组播: {e}")
+        task = asyncio.create_task(send())
+        try:
+            return await probe_rtp(f"rtp://{group}:{port}", default_dns_cache(), 1)
+        finally:
+            stop.set()
+            await task
+            sender.close()
+
+    assert asyncio.run(run()) is True
+
+
+def test_udpxy_url_forms():
+    proxy = "http://192.168.1.1:4022"
+    assert udpxy_url("rtp://239.1.1.1:1234", proxy) == f"{proxy}/rtp/239.1.1.1:1234"
+    assert udpxy_url("udp://239.1.1.1:1234", proxy) == f"{proxy}/udp/239.1.1.1:1234"
+    assert udpxy_url("rtp://10.0.0.1:1234", proxy) is None  # 单播直接检测
+    assert udpxy_url("rtp://239.1.1.1:1234", "") is None
+    assert is_udpxy_url(f"{proxy}/udp/239.1.1.1:1234") and is_udpxy_url(f"{proxy}/rtp/@239.1.1.1:1234")
+    assert not is_udpxy_url(f"{proxy}/live/239.1.1.1.m3u8")
+
+
+async def start_udpxy():
+    # udpxy 替身：239.1.1.1 有数据，239.1.1.2 只回200不发数据，其他组404
+    async def handle(reader, writer):
+        path = unquote((await reader.readuntil(b"\r\n\r\n")).split(b" ")[1].decode())
+        group = path.split("/")[2].lstrip("@").split(":")[0]
+        try:
+            if group in ("239.1.1.1", "239.1.1.2"):
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/octet-stream\r\n\r\n")
+                await writer.drain()
+                if group == "239.1.1.1":
+                    await asyncio.sleep(0.05)
+                    writer.write(TS_PACKET * 7)
+                    await writer.drain()
+                await reader.read()  # 直到客户端断开
+            else:
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+
+def test_udpxy_requires_data():
+    async def run():
+        server, proxy = await start_udpxy()
+        errors = {}
+        checker = StreamChecker(timeout=0.5, on_error=lambda url, e: errors.__setitem__(url, type(e).__name__))
+        urls = [f"{proxy}/udp/239.1.1.1:1234", f"{proxy}/rtp/@239.1.1.1:5000",
+                f"{proxy}/rtp/239.1.1.2:1234", f"{proxy}/udp/239.1.1.9:1234"]
+        try:
+            results = await asyncio.gather(*(checker.check(url) for url in urls))
+        finally:
+            checker.close_connections()
+            checker.close()
+            server.close()
+        return [ok for _, ok in results], errors, urls
+
+    results, errors, urls = asyncio.run(run())
+    assert results == [True, True, False, False]
+    # 200但超时内没有数据：服务器在线，按协议错误处理，不计入熔断
+    assert errors == {urls[2]: "ProtocolError", urls[3]: "HTTPStatusError"}
+
+
+SDP = b"v=0\r\ns=live\r\nm=video 0 RTP/AVP 96\r\na=rtpmap:96 H264/90000\r\n"
+
+
+def md5_hex(text):
+    return hashlib.md5(text.encode()).hexdigest()
+
+
+async def start_rtsp(users=None, qop=True, body=SDP):
+    # rtsp 替身：OPTIONS 总是200；users 不为None时 DESCRIBE 要求Digest认证；记录 (方法, CSeq, 是否带认证)
+    requests = []
+    realm, nonce = "stand-in", "0a1b2c3d"
+
+    def authorized(method, header):
+        params = dict(re.findall(r'(\w+)="?([^",]*)"?', header[len("Digest "):]))
+        password = users.get(params.get("username"))
+        if password is None or params.get("nonce") != nonce:
+            return False
+        ha1 = md5_hex(f"{params['username']}:{realm}:{password}")
+        ha2 = md5_hex(f"{method}:{params['uri']}")
+        if qop:
+            expected = md5_hex(f"{ha1}:{nonce}:{params['nc']}:{params['cnonce']}:auth:{ha2}")
+        else:
+            expected = md5_hex(f"{ha1}:{nonce}:{ha2}")
+        return params.get("response") == expected
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                lines = (await reader.readuntil(b"\r\n\r\n")).decode().split("\r\n")
+                method = lines[0].split(" ")[0]
+                headers = dict(line.split(": ", 1) for line in lines[1:] if ": " in line)
+                requests.append((method, headers["CSeq"], "Authorization" in headers))
+                reply = f"RTSP/1.0 200 OK\r\nCSeq: {headers['CSeq']}\r\n"
+                if method == "DESCRIBE":
+                    if users is not None and not authorized(method, headers.get("Authorization", "")):
+                        challenge = f'Digest realm="{realm}", nonce="{nonce}"' + (', qop="auth"' if qop else "")
+                        reply = (f"RTSP/1.0 401 Unauthorized\r\nCSeq: {headers['CSeq']}\r\n"
+                                 f"WWW-Authenticate: {challenge}\r\n")
+                    else:
+                        reply += f"Content-Type: application/sdp\r\nContent-Length: {len(body)}\r\n\r\n"
+                        writer.write(reply.encode() + body)
+                        continue
+                writer.write((reply + "\r\n").encode())
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1], requests
+
+
+def run_rtsp(url_path, credentials="", **server_options):
+    async def run():
+        server, port, requests = await start_rtsp(**server_options)
+        try:
+            return await probe_rtsp(f"rtsp://{credentials}127.0.0.1:{port}{url_path}", default_dns_cache()), requests
+        except Exception as e:
+            return e, requests
+        finally:
+            server.close()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("qop", [True, False])
+def test_rtsp_digest_auth_after_401(qop):
+    result, requests = run_rtsp("/live/ch1?id=1", "admin:p%40ss@", users={"admin": "p@ss"}, qop=qop)
+    assert result is True
+    assert requests == [("OPTIONS", "1", False), ("DESCRIBE", "2", False), ("DESCRIBE", "3", True)]
+
+
+def test_rtsp_auth_failures():
+    result, _ = run_rtsp("/live", "admin:wrong@", users={"admin": "p@ss"})
+    assert isinstance(result, RTSPStatusError) and result.code == 401
+    # 没有用户名密码时不重试
+    result, requests = run_rtsp("/live", users={"admin": "p@ss"})
+    assert isinstance(result, RTSPStatusError) and result.code == 401
+    assert [method for method, _, _ in requests] == ["OPTIONS", "DESCRIBE"]
+
+
+def test_rtsp_describe_without_media_is_protocol_error():
+    result, _ = run_rtsp("/live", body=b"v=0\r\ns=empty\r\n")
+    assert isinstance(result, ProtocolError)
+
+
+async def start_rtmp(version=3):
+    # rtmp 替身：检查 C0/C1，回 S0/S1（S0为version）
+    handshakes = []
+
+    async def handle(reader, writer):
+        try:
+            c0c1 = await reader.readexactly(1 + 1536)
+            handshakes.append((c0c1[0], len(c0c1) - 1))
+            writer.write(bytes([version]) + b"\x00" * 1536)
+            await writer.drain()
+            await reader.read()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, f"rtmp://127.0.0.1:{server.sockets[0].getsockname()[1]}/live/ch", handshakes
+
+
+def test_rtmp_handshake():
+    async def run(version):
+        server, url, handshakes = await start_rtmp(version)
+        try:
+            return await probe_rtmp(url, default_dns_cache()), handshakes
+        except ProtocolError as e:
+            return e, handshakes
+        finally:
+            server.close()
+
+    assert asyncio.run(run(3)) == (True, [(3, 1536)])
+    result, _ = asyncio.run(run(6))
+    assert isinstance(result, ProtocolError)
+
+
+def test_silent_rtsp_and_rtmp_servers_time_out():
+    # 接受连接但不响应：按检测超时失败，连接随之关闭
+    async def run():
+        closed = []
+
+        async def handle(reader, writer):
+            await reader.read()
+            closed.append(True)
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        errors = []
+        checker = StreamChecker(timeout=0.3, on_error=lambda url, e: errors.append(type(e).__name__))
+        try:
+            start = time.monotonic()
+            results = await asyncio.gather(checker.check(f"rtsp://127.0.0.1:{port}/live"),
+                                           checker.check(f"rtmp://127.0.0.1:{port}/live/ch"))
+            seconds = time.monotonic() - start
+            await asyncio.sleep(0.1)
+        finally:
+            checker.close()
+            server.close()
+        return results, seconds, errors, closed
+
+    results, seconds, errors, closed = asyncio.run(run())
+    assert results == [(None, False)] * 2
+    assert seconds < 1
+    assert errors == ["TimeoutError"] * 2 and closed == [True, True]
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""检测脚本 check_channels：host熔断跳过的url沿用上次结果或不判定，不进黑名单和检测结果库"""
+
+import importlib.util
+import os
+import socket
+import time
+
+import pytest
+
+from channel_record import Channel
+from conftest import ROOT
+from probe_journal import ProbeJournal
+from probe_store import ProbeStore
+import stream_checker
+
+spec = importlib.util.spec_from_file_location("whitelist_main", os.path.join(ROOT, "assets", "whitelist-blacklist", "main.py"))
+whitelist_main = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(whitelist_main)
+
+
+class NoDeferChecker(stream_checker.StreamChecker):
+    # 同一host逐个检测，失败2次即熔断，熔断期间的url直接跳过
+    def __init__(self, **kwargs):
+        super().__init__(per_host=1, timeout=2, **kwargs)
+
+    def _breaker(self, url):
+        breaker = super()._breaker(url)
+        breaker.threshold, breaker.cooldown, breaker.defer = 2, 60, False
+        return breaker
+
+
+@pytest.fixture
+def closed_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    yield sock.getsockname()[1]
+    sock.close()
+
+
+def test_skipped_urls_carry_previous_result_or_stay_undecided(tmp_path, monkeypatch, closed_port):
+    monkeypatch.setattr(whitelist_main, "StreamChecker", NoDeferChecker)
+    lines = [Channel(f"频道{i}", f"http://127.0.0.1:{closed_port}/{i}.m3u8") for i in range(5)]
+    store = ProbeStore(str(tmp_path / "probe.sqlite3"))
+    long_ago = time.time() - 365 * 24 * 3600  # 已过期，需要重新检测
+    store.record(lines[3].url, False, checked_at=long_ago, error="timed out")
+    store.record(lines[4].url, True, 123.0, checked_at=long_ago)
+    store.flush()
+    previous_results = store.get_many(channel.url for channel in lines)
+    journal = ProbeJournal(str(tmp_path / "journal.jsonl"))
+    counts = dict.fromkeys(["reused", "resumed", "probed", "skipped", "carried"], 0)
+
+    successlist, blacklist, deferred, checker = whitelist_main.check_channels(
+        lines, set(), store, previous_results, journal, counts)
+    journal.close()
+
+    # 前两个检测失败并熔断；上次成功的沿用，上次失败的和没有结果的本轮不判定
+    assert blacklist == lines[:2]
+    assert successlist == [lines[4]] and lines[4].latency == 123.0
+    assert deferred == lines[2:4]
+    assert set(journal.entries) == {lines[0].url, lines[1].url}
+    assert set(store._pending) == {lines[0].url, lines[1].url}
+    assert counts == {"reused": 0, "resumed": 0, "probed": 2, "skipped": 3, "carried": 1}
+    assert not set(whitelist_main.check_errors) & checker.skipped
@@ -1,7 +1,8 @@
-import requests
 import os
 import re
 from datetime import datetime, timedelta, timezone
+from channel_record import Channel
+from github_mirror import default_mirror_stats, fetch_source as fetch_mirrored
 
 # ===== 颜色定义 =====
 RED = "\033[91m"
@@ -12,7 +13,7 @@ RESET = "\033[0m"
 
 live_file = "live.txt"
 
-# ===== 接口地址 =====
+# ===== 接口地址（GitHub raw 地址会在各镜像间竞速，前缀写哪个镜像都可以） =====
 sources = {
     "TXT": "https://hk.gh-proxy.com/https://raw.githubusercontent.com/AnonymousOrz/IPTV/main/Live/collect/央卫内地主流频道cs推流250824(4).txt",
     "M3U": "https://raw.githubusercontent.com/develop202/migu_video/refs/heads/main/interface.txt",
@@ -38,10 +39,7 @@ def simplify_name(name: str) -> str:
 
 def fetch_source(name, url, color):
     try:
-        resp = requests.get(url, timeout=15)
-        resp.raise_for_status()
-        resp.encoding = "utf-8"
-        lines = resp.text.splitlines()
+        lines = fetch_mirrored(url, timeout=15).decode("utf-8", errors="replace").splitlines()
         print(f"{color}[{name}] 抓取成功，共 {len(lines)} 行{RESET}")
         return lines
     except Exception as e:
@@ -50,12 +48,10 @@ def fetch_source(name, url, color):
 
 # ===== 初始化分组 =====
 yangshi, weishi = [], []
-yangshi_detail, weishi_detail = [], []
 
 # ===== 解析 新 M3U =====
 lines_m3u_new = fetch_source("M3U_NEW", sources["M3U_NEW"], BLUE)
-temp_yangshi, temp_yangshi_detail = [], []
-temp_weishi, temp_weishi_detail = [], []
+temp_yangshi, temp_weishi = [], []
 
 current_group, current_name = None, None
 for line in lines_m3u_new:
@@ -68,28 +64,22 @@ for line in lines_m3u_new:
         else:
             current_group = None
     elif line.startswith("http") and current_group and current_name:
-        record = f"{current_name},{line.strip()}"
+        record = Channel(current_name, line.strip(), category=current_group, source="M3U_NEW")
         if current_group == "yangshi":
             temp_yangshi.append(record)
-            temp_yangshi_detail.append(f"{current_name} -> {line.strip()} (M3U_NEW)")
         elif current_group == "weishi":
             temp_weishi.append(record)
-            temp_weishi_detail.append(f"{current_name} -> {line.strip()} (M3U_NEW)")
 
 # ===== CCTV编号排序：小到大 =====
 def cctv_sort_key(record):
-    name = record.split(",")[0]
-    match = re.match(r"CCTV(\d+)", name)
+    match = re.match(r"CCTV(\d+)", record.name)
     return int(match.group(1)) if match else 999
 
 temp_yangshi_sorted = sorted(temp_yangshi, key=cctv_sort_key)
-temp_yangshi_detail_sorted = [x for _, x in sorted(zip(temp_yangshi, temp_yangshi_detail), key=lambda pair: cctv_sort_key(pair[0]))]
 
 # ===== 插入到主列表最前面 =====
 yangshi = temp_yangshi_sorted + yangshi
-yangshi_detail = temp_yangshi_detail_sorted + yangshi_detail
 weishi = temp_weishi + weishi
-weishi_detail = temp_weishi_detail + weishi_detail
 
 # ===== 解析 TXT =====
 lines_txt = fetch_source("TXT", sources["TXT"], GREEN)
@@ -100,11 +90,9 @@ for line in lines_txt:
     name = simplify_name(name.strip())
     url = url.strip()
     if name.startswith("CCTV") or "央视" in name:
-        yangshi.append(f"{name},{url}")
-        yangshi_detail.append(f"{name} -> {url} (TXT)")
+        yangshi.append(Channel(name, url, category="yangshi", source="TXT"))
     elif "卫视" in name:
-        weishi.append(f"{name},{url}")
-        weishi_detail.append(f"{name} -> {url} (TXT)")
+        weishi.append(Channel(name, url, category="weishi", source="TXT"))
 
 # ===== 解析 原 M3U =====
 lines_m3u = fetch_source("M3U", sources["M3U"], YELLOW)
@@ -119,13 +107,14 @@ for line in lines_m3u:
         else:
             current_group = None
     elif line.startswith("http") and current_group and current_name:
-        record = f"{current_name},{line.strip()}"
+        record = Channel(current_name, line.strip(), category=current_group, source="M3U")
         if current_group == "yangshi":
             yangshi.append(record)
-            yangshi_detail.append(f"{current_name} -> {line.strip()} (M3U)")
         elif current_group == "weishi":
             weishi.append(record)
-            weishi_detail.append(f"{current_name} -> {line.strip()} (M3U)")
+
+# 保存各镜像耗时，下次运行按它排序
+default_mirror_stats().save()
 
 # ===== live.txt 更新逻辑 =====
 if os.path.exists(live_file):
@@ -163,8 +152,8 @@ def insert_group_front_fixed(existing_lines, tag, new_records):
 
     return updated_lines
 
-lines_after_yangshi = insert_group_front_fixed(old_lines, yangshi_tag, yangshi)
-lines_after_weishi = insert_group_front_fixed(lines_after_yangshi, weishi_tag, weishi)
+lines_after_yangshi = insert_group_front_fixed(old_lines, yangshi_tag, [record.to_line() for record in yangshi])
+lines_after_weishi = insert_group_front_fixed(lines_after_yangshi, weishi_tag, [record.to_line() for record in weishi])
 lines_final = lines_after_weishi
 
 with open(live_file, "w", encoding="utf-8") as f:
@@ -211,11 +200,11 @@ if os.path.exists("README.md"):
         f.write(readme_content)
 
 # ===== 日志输出频道详细信息 =====
-def log_channels(name, records, detail_list, color):
+def log_channels(name, records, color):
     print(f"{color}{name}: 新增 {len(records)} 条{RESET}")
-    for i, rec in enumerate(detail_list, 1):
-        print(f"{color}{i}. {rec}{RESET}")
+    for i, rec in enumerate(records, 1):
+        print(f"{color}{i}. {rec.name} -> {rec.url} ({rec.source}){RESET}")
 
-log_channels("央视频道", yangshi, yangshi_detail, GREEN)
-log_channels("卫视频道", weishi, weishi_detail, YELLOW)
+log_channels("央视频道", yangshi, GREEN)
+log_channels("卫视频道", weishi, YELLOW)
 print(f"{RED}更新完成 ✅ 新M3U、TXT、M3U源已更新，旧源保留，重复源不会累加{RESET}")
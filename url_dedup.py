@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+直播源url去重（各脚本共用）
+  - 按规范化后的url建哈希索引，每条O(1)，保留先出现的url（原样保留，不改写）
+  - 规范化规则可插拔：CANONICAL_RULES 按顺序执行，也可用环境变量 DEDUP_RULES 选用部分规则
+  - 统计每条规则去掉了多少重复：一条url算在第一个使它与所重复的url相同的规则上，完全相同的算 exact
+"""
+
+import os
+from collections import namedtuple
+
+# query/fragment 为None表示url中没有 ?/#，为空字符串表示只有 ?/# 没有内容
+UrlParts = namedtuple("UrlParts", "scheme netloc path query fragment")
+DEFAULT_PORTS = {"http": "80", "https": "443", "rtsp": "554", "rtmp": "1935"}
+
+
+def split_url(url):
+    """拆分url，比 urlsplit 快，且保留 ? 和 # 是否出现"""
+    rest, has_fragment, fragment = url.partition("#")
+    rest, has_query, query = rest.partition("?")
+    scheme, _, rest = rest.partition("://")
+    netloc, slash, path = rest.partition("/")
+    return UrlParts(scheme, netloc, slash + path, query if has_query else None, fragment if has_fragment else None)
+
+
+def join_url(parts):
+    url = f"{parts.scheme}://{parts.netloc}{parts.path}"
+    if parts.query is not None:
+        url += "?" + parts.query
+    if parts.fragment is not None:
+        url += "#" + parts.fragment
+    return url
+
+
+def split_netloc(netloc):
+    """返回 (用户名密码@, host:端口)"""
+    userinfo, at, hostport = netloc.rpartition("@")
+    return userinfo + at, hostport
+
+
+# 规则不需要改动时原样返回；构造 UrlParts 不用 _replace（慢）
+def lower_host(parts):
+    """协议和host不区分大小写（用户名密码区分）"""
+    scheme, netloc, path, query, fragment = parts
+    userinfo, hostport = split_netloc(netloc)
+    lower_scheme, lower_hostport = scheme.lower(), hostport.lower()
+    if lower_scheme == scheme and lower_hostport == hostport:
+        return parts
+    return UrlParts(lower_scheme, userinfo + lower_hostport, path, query, fragment)
+
+
+def drop_default_port(parts):
+    """去掉协议默认端口，如 http 的 :80"""
+    scheme, netloc, path, query, fragment = parts
+    default_port = DEFAULT_PORTS.get(scheme.lower())
+    if default_port is None or not netloc.endswith(":" + default_port):
+        return parts
+    userinfo, hostport = split_netloc(netloc)
+    host = hostport[:-len(default_port) - 1]
+    if not host or host.endswith(":"):
+        return parts
+    return UrlParts(scheme, userinfo + host, path, query, fragment)
+
+
+def root_path(parts):
+    """没有路径等同于根路径 /"""
+    if parts.path:
+        return parts
+    return UrlParts(parts.scheme, parts.netloc, "/", parts.query, parts.fragment)
+
+
+def drop_empty_query(parts):
+    """去掉末尾空的 ? 和 #"""
+    if parts.query != "" and parts.fragment != "":
+        return parts
+    return UrlParts(parts.scheme, parts.netloc, parts.path, parts.query or None, parts.fragment or None)
+
+
+def sort_query(parts):
+    """query参数与顺序无关"""
+    query = parts.query
+    if not query or "&" not in query:
+        return parts
+    return UrlParts(parts.scheme, parts.netloc, parts.path, "&".join(sorted(param for param in query.split("&") if param)), parts.fragment)
+
+
+CANONICAL_RULES = [
+    ("host_case", lower_host),
+    ("default_port", drop_default_port),
+    ("root_path", root_path),
+    ("empty_query", drop_empty_query),
+    ("query_order", sort_query),
+]
+
+
+def selected_rules(names=os.getenv("DEDUP_RULES")):
+    """按名称选用规则（逗号分隔），为空时使用全部规则"""
+    if not names:
+        return list(CANONICAL_RULES)
+    wanted = [name.strip() for name in names.split(",") if name.strip()]
+    rules = dict(CANONICAL_RULES)
+    return [(name, rules[name]) for name in wanted if name in rules]
+
+
+class UrlDeduplicator:
+    def __init__(self, rules=None):
+        self.rules = selected_rules() if rules is None else list(rules)
+        self._urls = set()  # 出现过的原始url，完全相同的直接判重
+        self._index = {}  # 规范化后的url -> 保留的原始url
+        self.stats = dict.fromkeys(["exact"] + [name for name, _ in self.rules], 0)
+
+    def canonical(self, url, rules=None):
+        """依次执行规则（默认全部规则）后的url"""
+        parts = split_url(url)
+        for _, rule in self.rules if rules is None else rules:
+            parts = rule(parts)
+        return join_url(parts)
+
+    def _matched_rule(self, url, kept):
+        # 逐步增加规则，第一个使两条url相同的规则
+        for step in range(1, len(self.rules) + 1):
+            if self.canonical(url, self.rules[:step]) == self.canonical(kept, self.rules[:step]):
+                return self.rules[step - 1][0]
+        return self.rules[-1][0]
+
+    def add(self, url):
+        """url是新的返回True并加入索引，与已有url重复返回False并计入统计"""
+        if url in self._urls:
+            self.stats["exact"] += 1
+            return False
+        self._urls.add(url)
+        key = self.canonical(url)
+        kept = self._index.setdefault(key, url)
+        if kept is url:
+            return True
+        self.stats[self._matched_rule(url, kept)] += 1
+        return False
+
+    @property
+    def removed(self):
+        return sum(self.stats.values())